@@ -0,0 +1,191 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import contextmanager
+from typing import Callable, Optional
+import threading
+import logging
+import queue
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class PooledBrowser:
+    """A launched Chrome session plus the bookkeeping needed to recycle it"""
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class BrowserPool:
+    """
+    Pool of pre-launched headless Chrome sessions.
+
+    Sessions are checked out exclusively, health-checked on return, reset
+    and re-warmed in the background, and replaced once they exceed their
+    max age or use count. The ChromeDriver path is resolved once.
+    """
+
+    def __init__(self, warm: Optional[Callable[[webdriver.Chrome], None]] = None, size: int = None):
+        self.size = size or int(os.getenv("SHOPPING_BROWSER_POOL_SIZE", "2"))
+        self.max_age = float(os.getenv("SHOPPING_BROWSER_MAX_AGE", "1800"))
+        self.max_uses = int(os.getenv("SHOPPING_BROWSER_MAX_USES", "50"))
+        self.checkout_timeout = float(os.getenv("SHOPPING_BROWSER_CHECKOUT_TIMEOUT", "60"))
+        self.warm = warm
+
+        self._idle = queue.LifoQueue()  # LIFO keeps the hottest session in use
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._driver_path = os.getenv("CHROMEDRIVER_PATH")
+        self._path_lock = threading.Lock()
+        self._closed = False
+
+    def resolve_driver_path(self) -> str:
+        """Resolve ChromeDriver once; webdriver-manager does a network check per call"""
+        if self._driver_path:
+            return self._driver_path
+        with self._path_lock:
+            if not self._driver_path:
+                logger.info("Using webdriver-manager to resolve matching ChromeDriver...")
+                self._driver_path = ChromeDriverManager().install()
+        return self._driver_path
+
+    def launch(self, headless: bool = True) -> webdriver.Chrome:
+        """Launch a new Chrome browser with appropriate options"""
+        chrome_options = Options()
+
+        if headless:
+            chrome_options.add_argument('--headless=new')
+
+        # Performance optimizations
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+
+        # Enable images and CSS for proper page rendering
+        chrome_options.add_argument('--disable-extensions')
+
+        # Return at DOMContentLoaded; the agent waits on its own readiness signals
+        chrome_options.page_load_strategy = 'eager'
+
+        service = Service(self.resolve_driver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.set_page_load_timeout(30)
+
+        return driver
+
+    def _create(self) -> PooledBrowser:
+        started = time.monotonic()
+        browser = PooledBrowser(self.launch(headless=True))
+        if self.warm:
+            try:
+                self.warm(browser.driver)
+            except Exception as e:
+                logger.warning(f"Browser warm-up failed: {str(e)}")
+        logger.info(f"🌐 Pooled browser ready in {time.monotonic() - started:.1f}s")
+        return browser
+
+    def start(self):
+        """Pre-launch every session so the first requests don't pay for Chrome startup"""
+        while not self._closed and self._idle.qsize() < self.size:
+            try:
+                self._idle.put(self._create())
+            except Exception as e:
+                logger.error(f"Browser pool warm-up error: {str(e)}")
+                break
+
+    def _is_healthy(self, browser: PooledBrowser) -> bool:
+        try:
+            browser.driver.execute_script("return document.readyState")
+            return bool(browser.driver.window_handles)
+        except Exception:
+            return False
+
+    def _is_expired(self, browser: PooledBrowser) -> bool:
+        return browser.age > self.max_age or browser.uses >= self.max_uses
+
+    def _destroy(self, browser: PooledBrowser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def _take(self) -> PooledBrowser:
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create()
+            if self._is_healthy(browser) and not self._is_expired(browser):
+                return browser
+            self._destroy(browser)
+
+    def _reset(self, browser: PooledBrowser):
+        """Drop per-user state and return to a single warm tab"""
+        driver = browser.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        if self.warm:
+            self.warm(driver)
+
+    def _recycle(self, browser: PooledBrowser):
+        try:
+            if self._closed or self._idle.qsize() >= self.size:
+                self._destroy(browser)
+                return
+            if self._is_expired(browser) or not self._is_healthy(browser):
+                self._destroy(browser)
+                browser = self._create()
+            else:
+                try:
+                    self._reset(browser)
+                except Exception as e:
+                    logger.warning(f"Browser reset failed, replacing session: {str(e)}")
+                    self._destroy(browser)
+                    browser = self._create()
+            self._idle.put(browser)
+        except Exception as e:
+            logger.error(f"Browser recycle error: {str(e)}")
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def checkout(self):
+        """Borrow a warm browser exclusively for the duration of the block"""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError("No browser session available")
+
+        try:
+            browser = self._take()
+        except Exception:
+            self._slots.release()
+            raise
+
+        browser.uses += 1
+        try:
+            yield browser.driver
+        finally:
+            # Reset and re-warm off the request path; the slot frees when done
+            threading.Thread(target=self._recycle, args=(browser,), daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._destroy(self._idle.get_nowait())
+            except queue.Empty:
+                break
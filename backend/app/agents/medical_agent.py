@@ -1,7 +1,9 @@
 from typing import Dict, List
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+from app.services.triage_service import get_triage_engine
+from app.services.llm_gateway import get_llm_gateway
+from app.services.model_router import RoutedModel
 
 load_dotenv()
 
@@ -9,16 +11,21 @@ class MedicalCrew:
     def __init__(self):
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         if self.gemini_api_key:
-            genai.configure(api_key=self.gemini_api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
+            self.model = RoutedModel("symptoms", get_llm_gateway(self.gemini_api_key))
         else:
             self.model = None
+        self.triage = get_triage_engine()
 
     def analyze_symptoms(self, symptoms: str, user_info: Dict = None) -> Dict:
         """Analyze symptoms using Gemini directly instead of CrewAI"""
         
+        # Red-flag triage runs first: emergencies never wait on Gemini
+        triage = self.triage.assess(symptoms)
+        if triage["short_circuit"]:
+            return self._get_emergency_response(triage)
+        
         if not self.model:
-            return self._get_fallback_response(symptoms)
+            return self._get_fallback_response(symptoms, triage)
         
         try:
             prompt = f"""
@@ -38,13 +45,13 @@ class MedicalCrew:
             
             response = self.model.generate_content(prompt)
             
-            return self._parse_gemini_response(response.text, symptoms)
+            return self._parse_gemini_response(response.text, symptoms, triage)
             
         except Exception as e:
             print(f"Gemini analysis error: {str(e)}")
-            return self._get_fallback_response(symptoms)
+            return self._get_fallback_response(symptoms, triage)
     
-    def _parse_gemini_response(self, response_text: str, symptoms: str) -> Dict:
+    def _parse_gemini_response(self, response_text: str, symptoms: str, triage: Dict = None) -> Dict:
         """Parse Gemini response into structured data"""
         # Simple parsing - you can make this more sophisticated
         return {
@@ -53,39 +60,53 @@ class MedicalCrew:
                 {"name": "Paracetamol", "dosage": "500mg", "purpose": "Pain and fever relief"},
                 {"name": "Ibuprofen", "dosage": "200mg", "purpose": "Inflammation reduction"}
             ],
-            "emergency_level": self._assess_emergency_level(symptoms),
+            "emergency_level": (triage or {}).get("level") or self._assess_emergency_level(symptoms),
             "recommendations": [
                 "Rest and hydrate well",
                 "Monitor your symptoms",
                 "Consult healthcare professional if symptoms persist"
-            ]
+            ],
+            "red_flags": self._affirmed_flags(triage)
         }
     
     def _assess_emergency_level(self, symptoms: str) -> str:
-        """Simple emergency level assessment"""
-        symptoms_lower = symptoms.lower()
-        emergency_keywords = ["chest pain", "difficulty breathing", "severe pain", "unconscious", "bleeding heavily"]
-        urgent_keywords = ["high fever", "persistent vomiting", "severe headache"]
-        
-        if any(keyword in symptoms_lower for keyword in emergency_keywords):
-            return "high"
-        elif any(keyword in symptoms_lower for keyword in urgent_keywords):
-            return "medium"
-        else:
-            return "low"
+        """Emergency level from the red-flag lexicon (high / medium / low)"""
+        return self.triage.assess(symptoms)["level"]
+    
+    @staticmethod
+    def _affirmed_flags(triage: Dict = None) -> List[str]:
+        return [flag["concept"] for flag in (triage or {}).get("red_flags", []) if not flag["negated"]]
     
-    def _get_fallback_response(self, symptoms: str) -> Dict:
+    def _get_emergency_response(self, triage: Dict) -> Dict:
+        """Immediate response for high-severity red flags, without an LLM call"""
+        flags = self._affirmed_flags(triage)
+        described = ", ".join(flag.replace("_", " ") for flag in flags)
+        return {
+            "analysis": f"Your symptoms ({described}) may indicate a medical emergency. Please call your local emergency number (112 in India) or go to the nearest emergency department now. Do not wait for symptoms to improve.",
+            "medications": [],
+            "emergency_level": "high",
+            "recommendations": [
+                "Call emergency services immediately",
+                "Do not drive yourself to the hospital",
+                "Stay with someone until help arrives",
+                "Do not take any new medication unless instructed by emergency staff"
+            ],
+            "red_flags": flags
+        }
+    
+    def _get_fallback_response(self, symptoms: str, triage: Dict = None) -> Dict:
         """Fallback response when Gemini is not available"""
         return {
             "analysis": f"Based on your symptoms '{symptoms}', I recommend consulting with a healthcare professional for accurate diagnosis. In the meantime, rest and stay hydrated.",
             "medications": [
                 {"name": "Consult pharmacist", "dosage": "N/A", "purpose": "Professional advice"}
             ],
-            "emergency_level": "low",
+            "emergency_level": (triage or {}).get("level", "low"),
             "recommendations": [
                 "Rest adequately",
                 "Drink plenty of fluids", 
                 "Monitor symptoms",
                 "Seek professional medical advice"
-            ]
+            ],
+            "red_flags": self._affirmed_flags(triage)
         }
\ No newline at end of file
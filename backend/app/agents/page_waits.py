@@ -0,0 +1,169 @@
+from selenium import webdriver
+from selenium.webdriver.remote.webelement import WebElement
+from app.services.metrics import track_upstream
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Evaluates every candidate selector in one round-trip and returns the first
+# match as [index, element]. Selectors starting with "/" or "(" are XPath.
+PROBE_SCRIPT = """
+var candidates = arguments[0], clickable = arguments[1];
+function usable(el) {
+    if (!clickable) return true;
+    var rect = el.getBoundingClientRect();
+    var style = window.getComputedStyle(el);
+    return rect.width > 0 && rect.height > 0 && !el.disabled &&
+        style.visibility !== 'hidden' && style.display !== 'none';
+}
+for (var i = 0; i < candidates.length; i++) {
+    var selector = candidates[i];
+    try {
+        var nodes = [];
+        if (selector.charAt(0) === '/' || selector.charAt(0) === '(') {
+            var snapshot = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < snapshot.snapshotLength && j < 25; j++) nodes.push(snapshot.snapshotItem(j));
+        } else {
+            nodes = document.querySelectorAll(selector);
+        }
+        for (var k = 0; k < nodes.length && k < 25; k++) {
+            if (usable(nodes[k])) return [i, nodes[k]];
+        }
+    } catch (e) {}
+}
+return null;
+"""
+
+# Counts in-flight fetch/XHR requests and remembers the last DOM mutation.
+# Installed before page scripts run where CDP is available.
+IDLE_TRACKER_SCRIPT = """
+(function () {
+    if (window.__nexusIdle) return;
+    var state = window.__nexusIdle = {pending: 0, lastChange: performance.now()};
+    function touch() { state.lastChange = performance.now(); }
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            state.pending++; touch();
+            return originalFetch.apply(this, arguments).finally(function () { state.pending--; touch(); });
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        state.pending++; touch();
+        this.addEventListener('loadend', function () { state.pending--; touch(); });
+        return originalSend.apply(this, arguments);
+    };
+    function observe() {
+        new MutationObserver(touch).observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+    }
+    if (document.documentElement) observe(); else document.addEventListener('DOMContentLoaded', observe);
+})();
+"""
+
+IDLE_STATE_SCRIPT = """
+var state = window.__nexusIdle;
+if (!state) return null;
+return [state.pending, performance.now() - state.lastChange, document.readyState];
+"""
+
+
+# What a successful Add to Cart click changes: the button is replaced (quantity
+# stepper) or relabelled, a cart counter moves, or the page goes to the cart
+CLICK_EFFECT_SCRIPT = """
+var el = arguments[0];
+var counters = document.querySelectorAll(
+    "[class*='cart' i] [class*='count' i], [class*='cart' i][class*='count' i], [class*='cart' i] [class*='badge' i], [aria-label*='cart' i]"
+);
+var counts = [];
+for (var i = 0; i < counters.length && i < 10; i++) counts.push((counters[i].textContent || '').trim());
+var connected = !!(el && el.isConnected);
+return [connected, connected ? (el.textContent || '').trim() : null, counts.join('|'), location.href];
+"""
+
+
+def click_effect_state(driver: webdriver.Chrome, element: WebElement) -> Optional[List]:
+    """Snapshot to compare before and after a click; None if the page couldn't be read"""
+    try:
+        return driver.execute_script(CLICK_EFFECT_SCRIPT, element)
+    except Exception as e:
+        logger.debug(f"Click effect probe failed: {str(e)}")
+        return None
+
+
+def install_idle_tracker(driver: webdriver.Chrome):
+    """Register the idle tracker for every future document in this session"""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": IDLE_TRACKER_SCRIPT})
+    except Exception as e:
+        logger.debug(f"CDP unavailable, idle tracker will be injected per page: {str(e)}")
+
+
+def wait_for_first(driver: webdriver.Chrome, selectors: List[str], timeout: float = 10,
+                   clickable: bool = False, poll: float = 0.1) -> Tuple[Optional[int], Optional[WebElement]]:
+    """
+    Poll all candidate selectors at once until one matches
+    Returns: (index of matching selector, element) or (None, None) on timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            match = driver.execute_script(PROBE_SCRIPT, selectors, clickable)
+        except Exception as e:
+            logger.debug(f"Selector probe failed: {str(e)}")
+            match = None
+        if match:
+            return match[0], match[1]
+        if time.monotonic() >= deadline:
+            return None, None
+        time.sleep(poll)
+
+
+def wait_for_idle(driver: webdriver.Chrome, quiet_ms: int = 500, timeout: float = 10, poll: float = 0.1) -> bool:
+    """
+    Wait until no fetch/XHR is in flight and the DOM has stopped changing
+    for quiet_ms. Returns False if the page never settled within timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            state = driver.execute_script(IDLE_STATE_SCRIPT)
+            if state is None:
+                # Page loaded before the tracker was registered
+                driver.execute_script(IDLE_TRACKER_SCRIPT)
+            else:
+                pending, quiet_for, ready_state = state
+                if pending <= 0 and quiet_for >= quiet_ms and ready_state != "loading":
+                    return True
+        except Exception as e:
+            logger.debug(f"Idle probe failed: {str(e)}")
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll)
+
+
+class StepTimer:
+    """Records and logs how long each agent step takes, and exports it as an upstream timing"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def step(self, name: str, dependency: str = "selenium"):
+        started = time.monotonic()
+        try:
+            # "add_to_cart:Dolo 650" is exported as operation "add_to_cart"
+            with track_upstream(dependency, name.split(":", 1)[0]):
+                yield
+        finally:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self.timings[name] = round(elapsed_ms, 1)
+            logger.info(f"⏱️ [{self.label}] {name}: {elapsed_ms:.0f} ms")
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(self.timings.values()), 1)
@@ -0,0 +1,185 @@
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from html.parser import HTMLParser
+from urllib.parse import quote, urljoin
+from typing import Dict, List, Optional
+import threading
+import requests
+import logging
+import json
+import re
+import os
+
+logger = logging.getLogger(__name__)
+
+PRICE_PATTERN = re.compile(r"₹\s*([\d,]+(?:\.\d+)?)")
+PRODUCT_PATH = "/online-medicine-order/"
+PRICE_KEYS = ["salePriceDecimal", "salePrice", "sellingPrice", "mrpDecimal", "mrp", "price"]
+
+
+class SearchPageError(ValueError):
+    """The search page came back but could not be read: layout change, bot wall, broken payload"""
+
+
+def _format_price(value) -> str:
+    try:
+        return f"₹{float(str(value).replace(',', '')):.2f}"
+    except (TypeError, ValueError):
+        return "N/A"
+
+
+def _products_from_next_data(data, base_url: str, found: List[Dict]):
+    """Walk the Next.js page props looking for product-shaped objects"""
+    if isinstance(data, dict):
+        if data.get("name") and data.get("slug"):
+            price = next((data[k] for k in PRICE_KEYS if data.get(k) not in (None, "")), None)
+            found.append({
+                "name": data["name"],
+                "url": urljoin(base_url, f"{PRODUCT_PATH}{data['slug']}"),
+                "price": _format_price(price) if price is not None else "N/A"
+            })
+        for value in data.values():
+            _products_from_next_data(value, base_url, found)
+    elif isinstance(data, list):
+        for value in data:
+            _products_from_next_data(value, base_url, found)
+
+
+class _SearchPageParser(HTMLParser):
+    """Collects __NEXT_DATA__ and product links (with their text) from a search page"""
+
+    def __init__(self):
+        super().__init__()
+        self.next_data = None
+        self.links: List[Dict] = []
+        self._in_next_data = False
+        self._script_chunks: List[str] = []
+        self._open_links: List[Dict] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and attrs.get("id") == "__NEXT_DATA__":
+            self._in_next_data = True
+        elif tag == "a" and PRODUCT_PATH in (attrs.get("href") or ""):
+            self._open_links.append({"href": attrs["href"], "text": []})
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._in_next_data:
+            self._in_next_data = False
+            self.next_data = "".join(self._script_chunks)
+        elif tag == "a" and self._open_links:
+            self.links.append(self._open_links.pop())
+
+    def handle_data(self, data):
+        if self._in_next_data:
+            self._script_chunks.append(data)
+        for link in self._open_links:
+            link["text"].append(data)
+
+
+def parse_search_results(html: str, base_url: str) -> List[Dict]:
+    """
+    Extract products from a PharmEasy search results page
+    Returns: List of {name, url, price} dicts in page order; empty only when
+    the page's own data says nothing is listed
+    Raises: SearchPageError when neither the page data nor product links can be read
+    """
+    parser = _SearchPageParser()
+    parser.feed(html)
+
+    products: List[Dict] = []
+    page_data_read = False
+    if parser.next_data:
+        try:
+            _products_from_next_data(json.loads(parser.next_data), base_url, products)
+            page_data_read = True
+        except json.JSONDecodeError:
+            logger.warning("Could not decode __NEXT_DATA__ on search page")
+
+    if not products:
+        # Server-rendered markup fallback
+        for link in parser.links:
+            text = " ".join(" ".join(link["text"]).split())
+            price_match = PRICE_PATTERN.search(text)
+            name = PRICE_PATTERN.split(text)[0].strip() or text
+            products.append({
+                "name": name,
+                "url": urljoin(base_url, link["href"]),
+                "price": _format_price(price_match.group(1)) if price_match else "N/A"
+            })
+
+    if not products and not page_data_read:
+        # Nothing recognisable is not the same as "not listed"
+        raise SearchPageError("Search page has no readable product data")
+
+    # The same product often appears in several page sections
+    unique, seen = [], set()
+    for product in products:
+        if product["url"] not in seen:
+            seen.add(product["url"])
+            unique.append(product)
+    return unique
+
+
+class ProductLookup:
+    """Finds a medicine's product page and price over pooled HTTP, without a browser"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.timeout = float(os.getenv("SHOPPING_HTTP_TIMEOUT", "8"))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=int(os.getenv("SHOPPING_HTTP_POOL_SIZE", "10")),
+            max_retries=Retry(total=1, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Language": "en-IN,en;q=0.9"
+        })
+
+    def search(self, medicine_name: str) -> List[Dict]:
+        """Fetch and parse the search results page"""
+        search_url = f"{self.base_url}/search/all?name={quote(medicine_name)}"
+        response = self.session.get(search_url, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_search_results(response.text, self.base_url)
+
+    def first_product(self, medicine_name: str) -> Optional[Dict]:
+        """
+        First product for a medicine; None means the page listed nothing.
+        Network, HTTP and SearchPageError errors propagate.
+        """
+        products = self.search(medicine_name)
+        if not products:
+            logger.info(f"HTTP lookup found no products for {medicine_name}")
+        return products[0] if products else None
+
+    def find_product(self, medicine_name: str) -> Optional[Dict]:
+        """
+        First product for a medicine, or None when the page could not be fetched or parsed
+        Returns: {name, url, price} or None
+        """
+        try:
+            return self.first_product(medicine_name)
+        except Exception as e:
+            logger.warning(f"HTTP product lookup failed for {medicine_name}: {str(e)}")
+        return None
+
+
+_product_lookup = None
+_product_lookup_lock = threading.Lock()
+
+
+def get_product_lookup() -> ProductLookup:
+    """Lookup client (and its connection pool) shared across the app"""
+    global _product_lookup
+    if _product_lookup is None:
+        with _product_lookup_lock:
+            if _product_lookup is None:
+                _product_lookup = ProductLookup(os.getenv("PHARMEASY_BASE_URL", "https://pharmeasy.in"))
+    return _product_lookup
@@ -0,0 +1,166 @@
+from typing import Dict, List, Optional, Tuple
+import threading
+import logging
+import atexit
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorStats:
+    """
+    Learned selector order for the shopping agent.
+
+    Tracks hits, misses and match latency per site, step and selector in a
+    local JSON file. A hit is a selector whose step was verified to work (the
+    click navigated, the cart changed), not merely one that matched an
+    element. Selectors are tried best-first, and ones that keep missing are
+    quarantined for a while and only probed as a last resort. Writes are
+    batched: at most one per SHOPPING_SELECTOR_STATS_FLUSH_SECONDS.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv(
+            "SHOPPING_SELECTOR_STATS_PATH",
+            os.path.join(os.getenv("NEXUS_DATA_DIR", "data"), "selector_stats.json")
+        )
+        self.quarantine_after = int(os.getenv("SHOPPING_SELECTOR_QUARANTINE_AFTER", "5"))
+        self.quarantine_seconds = float(os.getenv("SHOPPING_SELECTOR_QUARANTINE_SECONDS", "86400"))
+        self.flush_seconds = float(os.getenv("SHOPPING_SELECTOR_STATS_FLUSH_SECONDS", "30"))
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stats = self._load()
+        self._dirty = False
+        self._last_saved = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Failed to load selector stats: {str(e)}")
+            return {}
+
+    def _schedule_save(self):
+        """Mark the stats dirty and make sure one flush is pending. Caller holds _lock"""
+        self._dirty = True
+        if self._flush_timer is None:
+            delay = max(0.0, self._last_saved + self.flush_seconds - time.monotonic())
+            self._flush_timer = threading.Timer(delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write pending changes now"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            payload = json.dumps(self._stats, indent=2, sort_keys=True)
+            self._dirty = False
+            self._last_saved = time.monotonic()
+        # Serialized under _lock, written outside it so probes never wait on the disk
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error(f"Failed to save selector stats: {str(e)}")
+
+    def _entry(self, site: str, step: str, selector: str) -> Dict:
+        step_stats = self._stats.setdefault(site, {}).setdefault(step, {})
+        return step_stats.setdefault(selector, {
+            "hits": 0,
+            "misses": 0,
+            "consecutive_misses": 0,
+            "avg_ms": None,
+            "last_hit": None,
+            "quarantined_until": 0
+        })
+
+    @staticmethod
+    def _score(entry: Optional[Dict]) -> float:
+        if not entry:
+            return 0.5  # Unknown selectors sit between proven and failing ones
+        # Laplace-smoothed hit rate
+        return (entry["hits"] + 1) / (entry["hits"] + entry["misses"] + 2)
+
+    def rank(self, site: str, step: str, selectors: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Order selectors by learned success
+        Returns: (active selectors best-first, quarantined selectors)
+        """
+        now = time.time()
+        with self._lock:
+            step_stats = self._stats.get(site, {}).get(step, {})
+            active, quarantined = [], []
+            for position, selector in enumerate(selectors):
+                entry = step_stats.get(selector)
+                key = (-self._score(entry), (entry or {}).get("avg_ms") or float("inf"), position)
+                if entry and entry["quarantined_until"] > now:
+                    quarantined.append((key, selector))
+                else:
+                    active.append((key, selector))
+        return [s for _, s in sorted(active)], [s for _, s in sorted(quarantined)]
+
+    def record(self, site: str, step: str, tried: List[str], winner: Optional[str], latency_ms: float,
+               succeeded: bool = True):
+        """
+        Record a probe once its step has been verified. Selectors tried ahead
+        of the winner missed; the probe stops at the first match, so later ones
+        are not counted. A winner whose step then failed matched the wrong
+        element and counts as a miss.
+        """
+        now = time.time()
+        with self._lock:
+            for selector in tried:
+                entry = self._entry(site, step, selector)
+                if selector == winner and succeeded:
+                    entry["hits"] += 1
+                    entry["consecutive_misses"] = 0
+                    entry["quarantined_until"] = 0
+                    entry["last_hit"] = now
+                    # Exponentially weighted so recent page behaviour dominates
+                    previous = entry["avg_ms"]
+                    entry["avg_ms"] = round(latency_ms if previous is None else 0.8 * previous + 0.2 * latency_ms, 1)
+                    break
+                entry["misses"] += 1
+                entry["consecutive_misses"] += 1
+                if entry["consecutive_misses"] >= self.quarantine_after:
+                    if entry["quarantined_until"] <= now:
+                        logger.info(f"🚫 Quarantining selector for {site}/{step}: {selector}")
+                    entry["quarantined_until"] = now + self.quarantine_seconds
+                if selector == winner:
+                    break
+            self._schedule_save()
+
+    def snapshot(self) -> Dict:
+        """Stats for inspection, with hit rate and quarantine state resolved"""
+        now = time.time()
+        with self._lock:
+            result = {}
+            for site, steps in self._stats.items():
+                for step, selectors in steps.items():
+                    rows = []
+                    for selector, entry in selectors.items():
+                        total = entry["hits"] + entry["misses"]
+                        rows.append({
+                            "selector": selector,
+                            **entry,
+                            "hit_rate": round(entry["hits"] / total, 3) if total else None,
+                            "quarantined": entry["quarantined_until"] > now
+                        })
+                    rows.sort(key=lambda r: (r["quarantined"], -self._score(r)))
+                    result.setdefault(site, {})[step] = rows
+            return result
@@ -1,18 +1,21 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from app.agents.browser_pool import BrowserPool
+from app.agents.page_waits import StepTimer, click_effect_state, install_idle_tracker, wait_for_first, wait_for_idle
+from app.agents.selector_stats import SelectorStats
+from app.agents.shopping_jobs import JobCancelled
+from app.agents.product_lookup import get_product_lookup
+from app.services.product_cache import get_product_cache
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import time
 import logging
-from typing import Dict, Optional
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
+from app.services.llm_gateway import get_llm_gateway
+from app.services.model_router import RoutedModel
 
 load_dotenv()
 
@@ -23,144 +26,353 @@ logger = logging.getLogger(__name__)
 class ShoppingAgent:
     """AI Shopping Agent that autonomously finds and adds medicines to cart on PharmEasy"""
     
+    # Common popup close buttons
+    POPUP_SELECTORS = [
+        "button.close",
+        "button[aria-label='Close']",
+        ".modal-close",
+        "#close-popup"
+    ]
+    
+    # Product listings (PharmEasy + generic)
+    PRODUCT_SELECTORS = [
+        "#__next > main div[class*='c-PJLV'] a",  # Product cards in main content area from DevTools
+        "#__next > main a[href*='medicine']",
+        "div[class*='ProductCard']",
+        "div[class*='Search_medicineLists']",
+        "a[class*='ProductCard']",
+        "div.style__product-card___1gbex",
+        ".search-results .product-card",
+        "div[class*='product']",
+        "a[href*='/buy/']"
+    ]
+    
+    # 'Add to Cart' button: PharmEasy patterns first, then text and generic fallbacks
+    ADD_TO_CART_SELECTORS = [
+        "#__next > main div[class*='c-PJLV'] button",  # Buttons in main content area from DevTools
+        "#__next > main button[class*='c-']",  # PharmEasy button pattern
+        "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'add to cart')]",
+        "//div[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'add to cart')]",
+        "//span[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'add to cart')]",
+        "//button[contains(@class, 'cart')]",
+        "//div[contains(@class, 'addToCart')]",
+        "//*[contains(text(), 'ADD TO CART')]",
+        "//*[contains(text(), 'Add to Cart')]",
+        "button[class*='cart']",
+        "div[class*='addToCart']",
+        "button.c-btn",
+        "button[type='button']",
+        ".add-to-cart-button",
+        "[data-sku-id]",
+        "button.btn-primary"
+    ]
+    
+    # Upper bounds only - every wait returns as soon as its condition holds
+    PRODUCT_TIMEOUT = float(os.getenv("SHOPPING_PRODUCT_TIMEOUT", "10"))
+    ADD_TO_CART_TIMEOUT = float(os.getenv("SHOPPING_ADD_TO_CART_TIMEOUT", "10"))
+    POPUP_TIMEOUT = float(os.getenv("SHOPPING_POPUP_TIMEOUT", "1.5"))
+    IDLE_TIMEOUT = float(os.getenv("SHOPPING_IDLE_TIMEOUT", "8"))
+    QUARANTINE_PROBE_TIMEOUT = float(os.getenv("SHOPPING_QUARANTINE_PROBE_TIMEOUT", "2"))
+    
     def __init__(self):
-        self.base_url = "https://pharmeasy.in"
-        self.driver = None
+        self.product_lookup = get_product_lookup()
+        self.product_cache = get_product_cache()
+        self.base_url = self.product_lookup.base_url
+        self.site = urlparse(self.base_url).netloc
+        self.selector_stats = SelectorStats()
+        
+        # Warm sessions already sit on the PharmEasy home page with popups dismissed
+        self.pool = BrowserPool(warm=self._warm_session)
         
         # Initialize Gemini for intelligent decision making
         gemini_api_key = os.getenv("GEMINI_API_KEY")
         if gemini_api_key:
-            genai.configure(api_key=gemini_api_key)
-            self.ai_model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.ai_model = RoutedModel("shopping", get_llm_gateway(gemini_api_key))
         else:
             self.ai_model = None
             logger.warning("Gemini API not configured - using fallback logic")
     
-    def _init_browser(self, headless: bool = True) -> webdriver.Chrome:
-        """Initialize Chrome browser with appropriate options"""
-        chrome_options = Options()
-        
-        if headless:
-            chrome_options.add_argument('--headless=new')
+    def _warm_session(self, driver: webdriver.Chrome):
+        """Load PharmEasy once so cookies, caches and connections are hot"""
+        install_idle_tracker(driver)
+        driver.get(self.base_url)
+        wait_for_idle(driver, timeout=self.IDLE_TIMEOUT)
         
-        # Performance optimizations
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
-        # Enable images and CSS for proper page rendering
-        chrome_options.add_argument('--disable-extensions')
-        
-        # Use webdriver-manager to auto-download correct ChromeDriver version
-        logger.info("Using webdriver-manager to auto-download matching ChromeDriver...")
-        service = Service(ChromeDriverManager().install())
-        
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.set_page_load_timeout(30)
-        
-        return driver
+        # Handle cookie consent if present
+        self._handle_popups(driver)
     
-    def search_and_add_to_cart(self, medicine_name: str, headless: bool = True) -> Dict:
+    def search_and_add_to_cart(self, medicine_name: str, headless: bool = True,
+                               progress: Optional[Callable[..., None]] = None) -> Dict:
         """
         Main agent function: Search for medicine and add to cart
         
         Args:
             medicine_name: Name of medicine to search for
             headless: Run browser in headless mode (default True)
+            progress: Optional checkpoint callback(stage, **details); may raise
+                JobCancelled to abort the run between steps
             
         Returns:
             Dict with success status, cart URL, medicine details
         """
         try:
             logger.info(f"🤖 Shopping Agent activated for: {medicine_name}")
+            timer = StepTimer(medicine_name)
             
-            # Initialize browser
-            self.driver = self._init_browser(headless=headless)
+            # Cheap path first: find the product page over HTTP; the browser is only needed to click
+            with timer.step("http_lookup", dependency="pharmeasy_http"):
+                product = self._find_product(medicine_name)
             
-            # Step 1: Navigate to PharmEasy
-            logger.info("📍 Navigating to PharmEasy...")
-            self.driver.get(self.base_url)
-            time.sleep(3)  # Wait for PharmEasy to load
+            if headless:
+                # Each run gets its own pooled session - concurrent runs never share a driver
+                with self.pool.checkout() as driver:
+                    return self._run(driver, medicine_name, progress, product, timer)
             
-            # Handle cookie consent if present
-            self._handle_popups()
+            # Visible browser for debugging: launched on demand, never pooled
+            driver = self.pool.launch(headless=False)
+            try:
+                self._warm_session(driver)
+                return self._run(driver, medicine_name, progress, product, timer)
+            finally:
+                driver.quit()
+                logger.info("🔒 Browser closed")
             
-            # Step 2: Search for medicine
-            logger.info(f"🔍 Searching for: {medicine_name}")
-            search_result = self._search_medicine(medicine_name)
+        except JobCancelled:
+            logger.info(f"🛑 Shopping run for {medicine_name} aborted")
+            raise
+        
+        except Exception as e:
+            logger.error(f"❌ Shopping agent error: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Failed to add medicine to cart: {str(e)}",
+                "cart_url": None
+            }
+    
+    def _find_product(self, medicine_name: str) -> Optional[Dict]:
+        """Product from the snapshot cache or an HTTP lookup; None means search in the browser"""
+        snapshot = self.product_cache.lookup(medicine_name)
+        if snapshot and snapshot["available"] and snapshot["url"]:
+            return {"name": snapshot["product_name"], "url": snapshot["url"], "price": snapshot["price"]}
+        return None
+    
+    def _run(self, driver: webdriver.Chrome, medicine_name: str,
+             progress: Optional[Callable[..., None]] = None,
+             product: Optional[Dict] = None, timer: Optional[StepTimer] = None) -> Dict:
+        """
+        Add a medicine to cart using an already-warm browser. With a product
+        from the HTTP lookup the browser goes straight to its page; otherwise
+        it searches and selects in the page.
+        """
+        timer = timer or StepTimer(medicine_name)
+        report = progress or (lambda stage, **details: None)
+        
+        report("navigating")
+        if product:
+            # Steps 1-2 already done over HTTP: open the product page directly
+            logger.info(f"🎯 Opening product from HTTP lookup: {product['name']}")
+            with timer.step("open_product"):
+                driver.get(product["url"])
+            product_result = {"success": True, "price": product["price"]}
+        else:
+            # Step 1: Search for medicine
+            with timer.step("search"):
+                search_result = self._search_medicine(driver, medicine_name)
             
             if not search_result["success"]:
                 return search_result
             
-            # Step 3: Select first relevant product
+            report("searching")
+            
+            # Step 2: Select first relevant product
             logger.info("🎯 Selecting product...")
-            product_result = self._select_product()
+            with timer.step("select_product"):
+                product_result = self._select_product(driver)
             
             if not product_result["success"]:
                 return product_result
             
-            # Step 4: Add to cart
-            logger.info("🛒 Adding to cart...")
-            cart_result = self._add_to_cart()
-            
-            if not cart_result["success"]:
-                return cart_result
-            
-            # Step 5: Get cart URL
-            cart_url = self.driver.current_url
-            if "/cart" not in cart_url:
-                cart_url = f"{self.base_url}/cart"
-            
-            logger.info(f"✅ Success! Cart URL: {cart_url}")
-            
-            return {
-                "success": True,
-                "medicine_name": medicine_name,
-                "cart_url": cart_url,
-                "message": f"Successfully added {medicine_name} to cart!",
-                "price": product_result.get("price", "N/A")
-            }
+            # Remember what the browser found so the next request can skip the search,
+            # but only a real product page whose title was read off the page
+            if product_result.get("navigated") and product_result.get("product_name"):
+                self.product_cache.put(medicine_name, {
+                    "name": product_result["product_name"],
+                    "url": driver.current_url,
+                    "price": product_result.get("price", "N/A")
+                }, source="agent")
+        
+        report("selected", price=product_result.get("price", "N/A"))
+        
+        # Step 3: Add to cart
+        logger.info("🛒 Adding to cart...")
+        with timer.step("add_to_cart"):
+            cart_result = self._add_to_cart(driver)
+        
+        if not cart_result["success"]:
+            return cart_result
+        
+        report("added")
+        
+        # Step 4: Get cart URL
+        cart_url = driver.current_url
+        if "/cart" not in cart_url:
+            cart_url = f"{self.base_url}/cart"
+        
+        logger.info(f"✅ Success in {timer.total_ms:.0f} ms! Cart URL: {cart_url}")
+        
+        return {
+            "success": True,
+            "medicine_name": medicine_name,
+            "cart_url": cart_url,
+            "message": f"Successfully added {medicine_name} to cart!",
+            "price": product_result.get("price", "N/A"),
+            "product_name": product["name"] if product else product_result.get("product_name"),
+            "lookup": "http" if product else "browser",
+            "timings_ms": timer.timings
+        }
+    
+    def fill_cart(self, medicine_names: List[str], progress: Optional[Callable[..., None]] = None) -> Dict:
+        """
+        Add several medicines to the cart in one browser session
+        
+        Products are looked up concurrently over HTTP, then every product page
+        is opened in its own tab so the pages load in parallel; the agent
+        then clicks Add to Cart tab by tab. Items the HTTP lookup could not
+        resolve are searched in the page afterwards.
+        
+        Returns:
+            Dict with per-item results and a single cart URL
+        """
+        report = progress or (lambda stage, **details: None)
+        timer = StepTimer(f"cart of {len(medicine_names)}")
+        results = {name: {"medicine_name": name, "success": False, "price": "N/A"} for name in medicine_names}
+        
+        try:
+            report("searching", items=len(medicine_names))
+            with timer.step("http_lookup", dependency="pharmeasy_http"):
+                with ThreadPoolExecutor(max_workers=min(len(medicine_names), 6) or 1) as lookups:
+                    products = dict(zip(medicine_names, lookups.map(self._find_product, medicine_names)))
             
+            with self.pool.checkout() as driver:
+                report("navigating")
+                
+                # Kick off every product page load at once, one tab per item
+                with timer.step("open_tabs"):
+                    tabs = []
+                    for name in medicine_names:
+                        product = products.get(name)
+                        if not product:
+                            continue
+                        if tabs:
+                            driver.switch_to.new_window("tab")
+                        driver.execute_script("window.location.href = arguments[0];", product["url"])
+                        tabs.append((name, driver.current_window_handle))
+                
+                for name, handle in tabs:
+                    product = products[name]
+                    driver.switch_to.window(handle)
+                    results[name].update({"price": product["price"], "product_name": product["name"]})
+                    report("selected", item=name, price=product["price"])
+                    with timer.step(f"add_to_cart:{name}"):
+                        cart_result = self._add_to_cart(driver)
+                    results[name]["success"] = cart_result["success"]
+                    results[name]["message"] = cart_result.get("message", "Added to cart")
+                    if cart_result["success"]:
+                        report("added", item=name)
+                
+                # Anything the HTTP lookup missed goes through the in-page search
+                for name in [n for n in medicine_names if not products.get(n)]:
+                    if tabs:
+                        driver.switch_to.window(tabs[0][1])
+                    with timer.step(f"browser_search:{name}"):
+                        item_result = self._run(driver, name, progress)
+                    results[name].update({
+                        "success": item_result["success"],
+                        "price": item_result.get("price", "N/A"),
+                        "message": item_result.get("message")
+                    })
+            
+        except JobCancelled:
+            raise
         except Exception as e:
-            logger.error(f"❌ Shopping agent error: {str(e)}")
-            return {
-                "success": False,
-                "message": f"Failed to add medicine to cart: {str(e)}",
-                "cart_url": None
-            }
+            logger.error(f"❌ Cart fill error: {str(e)}")
+            for item in results.values():
+                item.setdefault("message", f"Failed to add medicine to cart: {str(e)}")
         
-        finally:
-            # Close browser
-            if self.driver:
-                self.driver.quit()
-                logger.info("🔒 Browser closed")
+        items = [results[name] for name in medicine_names]
+        added = sum(1 for item in items if item["success"])
+        logger.info(f"✅ Cart fill added {added}/{len(items)} items in {timer.total_ms:.0f} ms")
+        
+        return {
+            "success": added > 0,
+            "items": items,
+            "added": added,
+            "cart_url": f"{self.base_url}/cart" if added else None,
+            "message": f"Added {added} of {len(items)} medicines to cart",
+            "timings_ms": timer.timings
+        }
+    
+    def _probe(self, driver: webdriver.Chrome, step: str, selectors: List[str], timeout: float,
+               clickable: bool = False) -> Tuple[Optional[str], Optional[object], Callable[[bool], None]]:
+        """
+        Find the first matching selector in learned order
+        Returns: (matching selector, element, verify) or (None, None, verify).
+        Call verify(succeeded) once the step's effect has been checked; only
+        then is the outcome recorded, so a selector that matches the wrong
+        element is demoted rather than promoted.
+        """
+        active, quarantined = self.selector_stats.rank(self.site, step, selectors)
+        started = time.monotonic()
+        
+        tried, index, element = active, None, None
+        if active:
+            index, element = wait_for_first(driver, active, timeout=timeout, clickable=clickable)
+        
+        # Quarantined selectors get one short last-chance probe
+        if element is None and quarantined:
+            fallback_timeout = timeout if not active else self.QUARANTINE_PROBE_TIMEOUT
+            tried = active + quarantined
+            index, element = wait_for_first(driver, quarantined, timeout=fallback_timeout, clickable=clickable)
+            if index is not None:
+                index += len(active)
+        
+        winner = tried[index] if index is not None else None
+        latency_ms = (time.monotonic() - started) * 1000
+        recorded = tried if winner is None else tried[:index + 1]
+        
+        def verify(succeeded: bool):
+            self.selector_stats.record(self.site, step, recorded, winner, latency_ms, succeeded=succeeded)
+        
+        return winner, element, verify
+    
+    @staticmethod
+    def _is_product_page(url: str, listing_url: str) -> bool:
+        """The product click left the search listing for another page"""
+        return url != listing_url and not urlparse(url).path.startswith("/search")
     
-    def _handle_popups(self):
+    @staticmethod
+    def _page_product_name(driver: webdriver.Chrome) -> Optional[str]:
+        """Product title from the page's h1, or None when there isn't one"""
+        try:
+            name = driver.find_element(By.TAG_NAME, "h1").text.strip()
+        except Exception:
+            return None
+        return name or None
+    
+    def _handle_popups(self, driver: webdriver.Chrome):
         """Handle cookie consent and other popups"""
         try:
-            # Common popup close buttons
-            close_selectors = [
-                "button.close",
-                "button[aria-label='Close']",
-                ".modal-close",
-                "#close-popup"
-            ]
-            
-            for selector in close_selectors:
-                try:
-                    close_btn = WebDriverWait(self.driver, 2).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                    close_btn.click()
-                    logger.info("Closed popup")
-                    time.sleep(1)
-                except:
-                    continue
-        except:
+            # Close whatever is showing; one probe covers every known close button
+            for _ in range(len(self.POPUP_SELECTORS)):
+                index, close_btn = wait_for_first(driver, self.POPUP_SELECTORS, timeout=self.POPUP_TIMEOUT, clickable=True)
+                if close_btn is None:
+                    break
+                close_btn.click()
+                logger.info(f"Closed popup: {self.POPUP_SELECTORS[index]}")
+        except Exception:
             pass
     
-    def _search_medicine(self, medicine_name: str) -> Dict:
+    def _search_medicine(self, driver: webdriver.Chrome, medicine_name: str) -> Dict:
         """Search for medicine by directly navigating to search results URL"""
         try:
             logger.info(f"🔍 Searching for: {medicine_name}")
@@ -169,143 +381,106 @@ class ShoppingAgent:
             # PharmEasy URL pattern: https://pharmeasy.in/search/all?name=Medicine%20Name
             import urllib.parse
             encoded_medicine = urllib.parse.quote(medicine_name)
-            search_url = f"https://pharmeasy.in/search/all?name={encoded_medicine}"
+            search_url = f"{self.base_url}/search/all?name={encoded_medicine}"
             
             logger.info(f"📍 Navigating directly to search results: {search_url}")
-            self.driver.get(search_url)
-            
-            # Wait for results to load (reduced for speed)
-            time.sleep(3)
+            driver.get(search_url)
             
-            logger.info("✅ Search results page loaded")
+            # No fixed wait: product selection polls until the listing renders
+            logger.info("✅ Search results page requested")
             return {"success": True}
             
         except Exception as e:
             logger.error(f"Search error: {str(e)}")
             return {"success": False, "message": f"Search failed: {str(e)}"}
     
-    def _select_product(self) -> Dict:
+    def _select_product(self, driver: webdriver.Chrome) -> Dict:
         """Select first medicine from search results"""
         try:
-            # Wait for product listings to appear (PharmEasy + generic)
-            product_selectors = [
-                "#__next > main div[class*='c-PJLV'] a",  # Product cards in main content area from DevTools
-                "#__next > main a[href*='medicine']",
-                "div[class*='ProductCard']",
-                "div[class*='Search_medicineLists']",
-                "a[class*='ProductCard']",
-                "div.style__product-card___1gbex",
-                ".search-results .product-card",
-                "div[class*='product']",
-                "a[href*='/buy/']"
-            ]
-            
-            product = None
-            for selector in product_selectors:
-                try:
-                    product = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    break
-                except:
-                    continue
+            # All selectors are probed together, best-known first
+            selector, product, verify = self._probe(driver, "select_product", self.PRODUCT_SELECTORS, self.PRODUCT_TIMEOUT)
             
             if not product:
+                verify(False)
                 return {"success": False, "message": "No products found"}
             
+            logger.info(f"✅ Found product using: {selector}")
+            
             # Try to extract price if visible
             price = "N/A"
             try:
                 price_elem = product.find_element(By.CSS_SELECTOR, "span[class*='price'], div[class*='price']")
                 price = price_elem.text
-            except:
+            except Exception:
                 pass
             
-            # Click on first product
-            product.click()
-            time.sleep(3)  # Wait for product page to load
+            # Click on first product and wait for the product page to settle
+            listing_url = driver.current_url
+            try:
+                product.click()
+            except Exception:
+                verify(False)
+                raise
+            wait_for_idle(driver, timeout=self.IDLE_TIMEOUT)
+            navigated = self._is_product_page(driver.current_url, listing_url)
+            verify(navigated)
+            if not navigated:
+                logger.info("⚠️ Product click did not open a product page, staying on listing")
             
-            return {"success": True, "price": price}
+            return {
+                "success": True,
+                "price": price,
+                "navigated": navigated,
+                "product_name": self._page_product_name(driver) if navigated else None
+            }
             
         except Exception as e:
             logger.error(f"Product selection error: {str(e)}")
             return {"success": False, "message": f"Failed to select product: {str(e)}"}
     
-    def _add_to_cart(self) -> Dict:
+    def _add_to_cart(self, driver: webdriver.Chrome) -> Dict:
         """Click 'Add to Cart' button"""
         try:
             logger.info("🔍 Searching for 'Add to Cart' button...")
             
-            # Try multiple approaches to find the button
-            add_button = None
-            
-            # Approach 1: Try XPath with various text variations
-            xpath_queries = [
-                "#__next > main div[class*='c-PJLV'] button",  # Buttons in main content area from DevTools
-                "#__next > main button[class*='c-']",  # PharmEasy button pattern
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'add to cart')]",
-                "//div[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'add to cart')]",
-                "//span[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'add to cart')]",
-                "//button[contains(@class, 'cart')]",
-                "//div[contains(@class, 'addToCart')]",
-                "//*[contains(text(), 'ADD TO CART')]",
-                "//*[contains(text(), 'Add to Cart')]"
-            ]
-            
-            for xpath in xpath_queries:
-                try:
-                    add_button = WebDriverWait(self.driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, xpath))
-                    )
-                    logger.info(f"✅ Found button using XPath: {xpath[:50]}...")
-                    break
-                except:
-                    continue
-            
-            # Approach 2: Try CSS selectors if XPath failed
-            if not add_button:
-                css_selectors = [
-                    "button[class*='cart']",
-                    "div[class*='addToCart']",
-                    "button.c-btn",
-                    "button[type='button']",
-                    ".add-to-cart-button",
-                    "[data-sku-id]",
-                    "button.btn-primary"
-                ]
-                
-                for selector in css_selectors:
-                    try:
-                        add_button = WebDriverWait(self.driver, 2).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                        logger.info(f"✅ Found button using CSS: {selector}")
-                        break
-                    except:
-                        continue
+            selector, add_button, verify = self._probe(
+                driver, "add_to_cart", self.ADD_TO_CART_SELECTORS, self.ADD_TO_CART_TIMEOUT, clickable=True
+            )
             
             if not add_button:
+                verify(False)
                 # Take screenshot for debugging
                 screenshot_path = "add_to_cart_failure.png"
-                self.driver.save_screenshot(screenshot_path)
+                driver.save_screenshot(screenshot_path)
                 logger.error(f"📸 Screenshot saved to {screenshot_path}")
                 return {"success": False, "message": "Could not find 'Add to Cart' button"}
             
-            # Scroll to button and click
-            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", add_button)
-            time.sleep(1)
+            logger.info(f"✅ Found button using: {selector[:50]}...")
             
-            # Try clicking, with fallback to JavaScript click
+            before = click_effect_state(driver, add_button)
             try:
-                add_button.click()
-                logger.info("✅ Clicked Add to Cart button")
-            except:
-                logger.info("⚠️ Normal click failed, trying JavaScript click...")
-                self.driver.execute_script("arguments[0].click();", add_button)
-                logger.info("✅ JavaScript click successful")
-            
-            # Wait for cart update
-            time.sleep(3)
+                # Scroll to button (instantly, so there is no animation to wait out) and click
+                driver.execute_script("arguments[0].scrollIntoView({behavior: 'instant', block: 'center'});", add_button)
+                
+                # Try clicking, with fallback to JavaScript click
+                try:
+                    add_button.click()
+                    logger.info("✅ Clicked Add to Cart button")
+                except Exception:
+                    logger.info("⚠️ Normal click failed, trying JavaScript click...")
+                    driver.execute_script("arguments[0].click();", add_button)
+                    logger.info("✅ JavaScript click successful")
+            except Exception:
+                verify(False)
+                raise
+            
+            # Wait for the cart update request to finish, then check the click did something
+            wait_for_idle(driver, timeout=self.IDLE_TIMEOUT)
+            after = click_effect_state(driver, add_button)
+            added = before is not None and after is not None and (after != before or "/cart" in after[3])
+            verify(added)
+            if not added:
+                return {"success": False, "message": "Clicked 'Add to Cart' but the cart did not change"}
             
             return {"success": True}
             
@@ -316,10 +491,13 @@ class ShoppingAgent:
 
 # Singleton instance
 _shopping_agent_instance = None
+_shopping_agent_lock = threading.Lock()
 
 def get_shopping_agent() -> ShoppingAgent:
     """Get or create shopping agent singleton"""
     global _shopping_agent_instance
     if _shopping_agent_instance is None:
-        _shopping_agent_instance = ShoppingAgent()
+        with _shopping_agent_lock:
+            if _shopping_agent_instance is None:
+                _shopping_agent_instance = ShoppingAgent()
     return _shopping_agent_instance
@@ -0,0 +1,239 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import threading
+import logging
+import uuid
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {"succeeded", "failed", "cancelled", "timed_out"}
+
+
+class JobRejected(Exception):
+    """Raised when a submission would exceed the per-user or global caps"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when it has been cancelled or timed out"""
+
+
+class ShoppingJob:
+    """A shopping-agent run tracked from submission to completion"""
+
+    def __init__(self, user_id: str, description: str, timeout: float, speculative: bool = False):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.description = description
+        # Started ahead of the user's request; not counted against their cap until claimed
+        self.speculative = speculative
+        self.timeout = timeout
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._listeners: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def report(self, stage: str, **details):
+        """Progress checkpoint called by the agent; aborts the run if cancelled"""
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.status}")
+        with self._lock:
+            self.stage = stage
+            self.progress.append({"stage": stage, "at": time.time(), **details})
+        logger.info(f"📦 Job {self.id[:8]} → {stage}")
+        self._publish()
+
+    def _start(self):
+        with self._lock:
+            if self.done:
+                return False
+            self.status = "running"
+        self._timer = threading.Timer(self.timeout, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+        self._publish()
+        return True
+
+    def _finish(self, status: str, result: Dict = None, error: str = None):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            if self.done:
+                # Already cancelled or timed out; keep that verdict
+                return
+            self.status = status
+            self.stage = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+        self._publish()
+
+    def _expire(self):
+        self.cancel_event.set()
+        self._finish("timed_out", error=f"Job exceeded {self.timeout:.0f}s timeout")
+
+    def cancel(self) -> bool:
+        if self.done:
+            return False
+        self.cancel_event.set()
+        if self.future:
+            self.future.cancel()
+        self._finish("cancelled", error="Cancelled by user")
+        return True
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop) -> asyncio.Queue:
+        """Queue that receives a snapshot on every state change"""
+        updates = asyncio.Queue()
+        with self._lock:
+            self._listeners.append((loop, updates))
+        updates.put_nowait(self.to_dict())
+        return updates
+
+    def unsubscribe(self, updates: asyncio.Queue):
+        with self._lock:
+            self._listeners = [(l, q) for l, q in self._listeners if q is not updates]
+
+    def _publish(self):
+        snapshot = self.to_dict()
+        with self._lock:
+            listeners = list(self._listeners)
+        for loop, updates in listeners:
+            try:
+                loop.call_soon_threadsafe(updates.put_nowait, snapshot)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "user_id": self.user_id,
+            "description": self.description,
+            "speculative": self.speculative,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": list(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class ShoppingJobManager:
+    """
+    Runs shopping-agent tasks on a dedicated bounded executor so Selenium
+    never blocks the API event loop. Enforces per-user and global caps.
+    """
+
+    def __init__(self):
+        self.max_workers = int(os.getenv("SHOPPING_JOB_WORKERS", os.getenv("SHOPPING_BROWSER_POOL_SIZE", "2")))
+        self.max_active = int(os.getenv("SHOPPING_JOB_MAX_ACTIVE", "20"))
+        self.per_user_limit = int(os.getenv("SHOPPING_JOB_PER_USER", "2"))
+        self.timeout = float(os.getenv("SHOPPING_JOB_TIMEOUT", "90"))
+        self.retention = float(os.getenv("SHOPPING_JOB_RETENTION", "900"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="shopping-job")
+        self._jobs: Dict[str, ShoppingJob] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, user_id: str, description: str, task: Callable[[ShoppingJob], Dict],
+               speculative: bool = False) -> ShoppingJob:
+        """
+        Queue a task. The task receives the job and should call job.report()
+        at each step; it returns the agent's result dict.
+        Speculative jobs only use idle workers, so they never queue ahead of
+        a real request, and don't count toward the per-user cap.
+        """
+        with self._lock:
+            self._prune()
+            active = [j for j in self._jobs.values() if not j.done]
+            if speculative:
+                if len(active) >= self.max_workers:
+                    raise JobRejected("No idle shopping worker for a speculative run")
+            else:
+                if len(active) >= self.max_active:
+                    raise JobRejected("Shopping agent is busy, please retry shortly")
+                if sum(1 for j in active if j.user_id == user_id and not j.speculative) >= self.per_user_limit:
+                    raise JobRejected(f"At most {self.per_user_limit} shopping jobs may run per user")
+
+            job = ShoppingJob(user_id, description, self.timeout, speculative=speculative)
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job, task)
+        return job
+
+    def _run(self, job: ShoppingJob, task: Callable[[ShoppingJob], Dict]) -> Optional[Dict]:
+        if not job._start():
+            return None
+        try:
+            result = task(job)
+            job._finish("succeeded" if result.get("success") else "failed", result=result,
+                        error=None if result.get("success") else result.get("message"))
+            return result
+        except JobCancelled:
+            return None
+        except Exception as e:
+            logger.error(f"Shopping job {job.id[:8]} error: {str(e)}")
+            job._finish("failed", error=str(e))
+            return None
+
+    def get(self, job_id: str) -> Optional[ShoppingJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        return bool(job and job.cancel())
+
+    def adopt(self, job: ShoppingJob):
+        """A claimed speculative job now counts as the user's own request"""
+        with self._lock:
+            job.speculative = False
+
+
+def buy_medicine_task(medicine_name: str) -> Callable[[ShoppingJob], Dict]:
+    """Job task that adds one medicine to the PharmEasy cart"""
+    def task(job: ShoppingJob):
+        from app.agents.shopping_agent import get_shopping_agent
+        
+        # Get shopping agent singleton
+        agent = get_shopping_agent()
+        
+        # Execute autonomous shopping task in background (headless mode)
+        return agent.search_and_add_to_cart(
+            medicine_name=medicine_name,
+            headless=True,  # Run invisibly in background
+            progress=job.report
+        )
+    return task
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> ShoppingJobManager:
+    """Get or create the job manager singleton"""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = ShoppingJobManager()
+    return _job_manager
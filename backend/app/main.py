@@ -1,19 +1,40 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import threading
+import logging
+import sys
 import os
 
-from app.routes import chat, medical, emergency, appointments, voice  # Added voice
+from app.routes import chat, medical, emergency, appointments, voice, ops  # Added voice
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.metrics import MetricsMiddleware, track_in_flight
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.upload_limits import UploadLimitMiddleware
+from app.services.metrics import get_dependency_health
+from app.services.uploads import UPLOAD_MAX_AUDIO_BYTES, UPLOAD_MAX_IMAGE_BYTES
+from app.services.static_assets import get_frontend_app
 
 load_dotenv()
 
 app = FastAPI(
     title="Nexus Health API",
     description="AI-powered healthcare assistant",
-    version="1.0.0"
+    version="1.0.0",
+    dependencies=[Depends(track_in_flight)]
 )
 
+# Priority queues/shedding so chat and shopping spikes can't starve emergency routes.
+# Added first so it sits inside CORS and shed responses still carry CORS headers.
+app.add_middleware(AdmissionMiddleware)
+
+# Refuse oversized uploads while they stream, before they are queued or spooled
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/api/medical/analyze-prescription": UPLOAD_MAX_IMAGE_BYTES,
+    "/api/voice/speech-to-text": UPLOAD_MAX_AUDIO_BYTES
+})
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -23,12 +44,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms and in-flight gauges, exported on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in stack sampling of single requests (X-Profile-Token or PROFILING_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(medical.router, prefix="/api/medical", tags=["medical"])
 app.include_router(emergency.router, prefix="/api/emergency", tags=["emergency"])
 app.include_router(appointments.router, prefix="/api/appointments", tags=["appointments"])
 app.include_router(voice.router, prefix="/api/voice", tags=["voice"])  # Added this line
+app.include_router(ops.router, prefix="/api/ops", tags=["ops"])
+
+# Frontend: content-hashed, precompressed build (python -m app.services.static_assets), served from memory
+if os.getenv("FRONTEND_ENABLED", "true").lower() == "true":
+    frontend = get_frontend_app()
+    if frontend:
+        app.mount(os.getenv("FRONTEND_MOUNT_PATH", "/app"), frontend, name="frontend")
+
+@app.on_event("startup")
+async def warm_browser_pool():
+    """Pre-launch pooled browsers so /buy-medicine doesn't pay for Chrome startup"""
+    if os.getenv("SHOPPING_BROWSER_PREWARM", "true").lower() != "true":
+        return
+    try:
+        from app.agents.shopping_agent import get_shopping_agent
+        agent = get_shopping_agent()
+        threading.Thread(target=agent.pool.start, name="browser-pool-warmup", daemon=True).start()
+    except ImportError as e:
+        logging.warning(f"Shopping agent unavailable, skipping browser warm-up: {str(e)}")
+
+@app.on_event("startup")
+async def start_reminder_scheduler():
+    if os.getenv("REMINDERS_ENABLED", "true").lower() == "true":
+        from app.services.reminder_service import get_reminder_scheduler
+        get_reminder_scheduler().start()
+
+@app.on_event("shutdown")
+async def stop_reminder_scheduler():
+    reminder_service = sys.modules.get("app.services.reminder_service")
+    if reminder_service and reminder_service._reminder_scheduler:
+        reminder_service._reminder_scheduler.stop()
+
+@app.on_event("shutdown")
+async def close_browser_pool():
+    shopping_agent = sys.modules.get("app.agents.shopping_agent")
+    if shopping_agent and shopping_agent._shopping_agent_instance:
+        shopping_agent._shopping_agent_instance.pool.close()
 
 @app.get("/")
 async def root():
@@ -36,7 +100,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    dependencies = get_dependency_health().status()
+    degraded = [name for name, report in dependencies.items() if report["status"] == "degraded"]
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "degraded": degraded,
+        "dependencies": dependencies
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,50 @@
+import os
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.services.admission_control import AdmissionRejected, get_admission_controller
+
+
+class AdmissionMiddleware:
+    """
+    Queues or sheds API requests by priority class before they reach a route
+    (see AdmissionController). Clients are keyed by the peer address, or by
+    ADMISSION_CLIENT_HEADER (e.g. x-forwarded-for) when behind a proxy.
+    WebSockets and unclassified paths pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.enabled = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+        self.client_header = os.getenv("ADMISSION_CLIENT_HEADER", "").lower()
+        self.controller = get_admission_controller()
+
+    def _client(self, scope: Scope) -> str:
+        if self.client_header:
+            value = Headers(scope=scope).get(self.client_header)
+            if value:
+                return value.split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+        priority_class = self.controller.classify(scope["path"])
+        if not priority_class:
+            return await self.app(scope, receive, send)
+
+        client = self._client(scope)
+        try:
+            await self.controller.acquire(priority_class, client)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": str(e), "reason": e.reason},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after), "X-Priority-Class": priority_class}
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority_class, client)
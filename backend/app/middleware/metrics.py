@@ -0,0 +1,67 @@
+import re
+import time
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+
+def _route_template(scope: Scope) -> str:
+    """
+    Route template (/api/medical/buy-medicine/jobs/{job_id}) for the matched
+    route, so label cardinality stays bounded; unrouted paths share one label.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    # Included routers may report their template without the include prefix:
+    # recover the prefix from the part of the real path the template didn't produce
+    materialized = template
+    for name, value in scope.get("path_params", {}).items():
+        materialized = re.sub(r"\{" + re.escape(name) + r"(:[^}]*)?\}", lambda _: str(value), materialized)
+    path = scope.get("path", "")
+    if path.endswith(materialized):
+        return path[:len(path) - len(materialized)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Per-route latency histogram, labelled once routing has resolved the template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "websocket.accept":
+                status["code"] = 101
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(
+                method=scope.get("method", "WS"),
+                route=_route_template(scope),
+                status=str(status["code"])
+            ).observe(time.perf_counter() - started)
+
+
+async def track_in_flight(connection: HTTPConnection):
+    """App-wide dependency: the route is known here, before the endpoint runs"""
+    gauge = HTTP_REQUESTS_IN_FLIGHT.labels(
+        method=connection.scope.get("method", "WS"),
+        route=_route_template(connection.scope)
+    )
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
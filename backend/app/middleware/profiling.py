@@ -0,0 +1,75 @@
+import os
+import time
+import uuid
+import random
+import hmac
+import threading
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services.profiler import StackSampler, get_profile_store
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in stack-sampling profiler for single requests. A request is profiled
+    when it carries X-Profile-Token matching PROFILING_TOKEN, or is picked by
+    PROFILING_SAMPLE_RATE. The profile id is returned in X-Profile-Id and the
+    folded stacks are fetched from /api/ops/profiles/{id}.
+    Unprofiled requests pay one header lookup and (if sampling) one random().
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.token = os.getenv("PROFILING_TOKEN", "")
+        self.sample_rate = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+        self.interval = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000
+
+    def _trigger(self, scope: Scope) -> str:
+        if self.token:
+            supplied = Headers(scope=scope).get("x-profile-token")
+            if supplied and hmac.compare_digest(supplied, self.token):
+                return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return ""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = self._trigger(scope)
+        if not trigger:
+            return await self.app(scope, receive, send)
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+        status = {"code": 500}
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        # The event loop thread is always sampled; busy worker threads are picked up as they run
+        sampler = StackSampler({threading.get_ident()}, self.interval).start()
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            sampler.stop()
+            metadata = {
+                "request_id": request_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status["code"],
+                "trigger": trigger,
+                "started_at": started_at,
+                "duration_ms": round(duration_ms, 1),
+                "interval_ms": self.interval * 1000,
+                "samples": sampler.samples,
+                "format": "folded"
+            }
+            await run_in_threadpool(get_profile_store().save, request_id, sampler.folded(), metadata)
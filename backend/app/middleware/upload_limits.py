@@ -0,0 +1,45 @@
+from typing import Dict
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class UploadLimitMiddleware:
+    """
+    Caps request bodies on upload routes while they stream in. A declared
+    Content-Length over the limit is refused before anything is read; chunked
+    or understated bodies are cut off with 413 as soon as they cross it, so the
+    multipart parser never spools more than `limit` bytes.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limit = self.limits.get(scope["path"].rstrip("/"))
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        detail = f"Upload exceeds the {limit // (1024 * 1024)} MB limit"
+        declared = Headers(scope=scope).get("content-length")
+        if declared and declared.isdigit() and int(declared) > limit:
+            response = JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside form parsing; FastAPI re-raises HTTPException as-is
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, receive_limited, send)
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import Optional, Union
+from datetime import date
 from app.services.emergency_service import EmergencyService
+from app.services.appointment_service import get_appointment_book
+from starlette.concurrency import run_in_threadpool
 import logging
 
 router = APIRouter()
 emergency_service = EmergencyService()
 
 class AppointmentRequest(BaseModel):
-    hospital_id: int
+    hospital_id: Union[int, str]
     user_id: str
     user_name: str
     user_phone: str
@@ -19,6 +23,8 @@ class AppointmentResponse(BaseModel):
     message: str
     appointment_id: str = None
     confirmation_code: str = None
+    hospital_name: Optional[str] = None
+    scheduled_time: Optional[str] = None
 
 @router.post("/book")
 async def book_appointment(request: AppointmentRequest):
@@ -29,20 +35,33 @@ async def book_appointment(request: AppointmentRequest):
             "phone": request.user_phone
         }
         
-        result = emergency_service.book_appointment(
+        # Slot reservation, the journal write and the Twilio call all block
+        result = await run_in_threadpool(
+            emergency_service.book_appointment,
             hospital_id=request.hospital_id,
             user_info=user_info,
             preferred_time=request.preferred_time,
             symptoms=request.symptoms  # Pass symptoms for voice call
         )
         
+        if result.get("error") == "not_found":
+            raise HTTPException(status_code=404, detail=result["message"])
+        if result.get("error") == "invalid_time":
+            raise HTTPException(status_code=400, detail=result["message"])
+        if result.get("error") == "unavailable":
+            raise HTTPException(status_code=409, detail={"message": result["message"], "alternatives": result["alternatives"]})
+        
         return AppointmentResponse(
             success=result["success"],
             message=result["message"],
             appointment_id=result.get("appointment_id"),
-            confirmation_code=result.get("confirmation_code")
+            confirmation_code=result.get("confirmation_code"),
+            hospital_name=result.get("hospital_name"),
+            scheduled_time=result.get("scheduled_time")
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Appointment booking error: {str(e)}")
         raise HTTPException(status_code=500, detail="Appointment booking failed")
@@ -54,4 +73,27 @@ async def get_emergency_contacts():
         return {"contacts": contacts}
     except Exception as e:
         logging.error(f"Get contacts error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to fetch emergency contacts")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to fetch emergency contacts")
+
+@router.get("/availability")
+async def get_availability(hospital_id: str, date: date):
+    """Free places per slot for one hospital and day"""
+    try:
+        return get_appointment_book().availability(hospital_id, date)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+
+@router.get("/{appointment_id}")
+async def get_appointment(appointment_id: str):
+    appointment = get_appointment_book().get(appointment_id)
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    return appointment
+
+@router.delete("/{appointment_id}")
+async def cancel_appointment(appointment_id: str):
+    """Cancel a booking and free its slot"""
+    appointment = get_appointment_book().cancel(appointment_id)
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    return appointment
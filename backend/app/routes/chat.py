@@ -3,19 +3,36 @@ from pydantic import BaseModel
 from typing import Optional, Dict, List, Any
 from app.services.gemini_service import GeminiService
 from app.services.voice_service import VoiceService
+from app.services.intent_router import get_intent_router
+from app.services.emergency_service import EmergencyService
+from app.services.prefetch_service import get_prefetch_store
+from app.services.product_cache import normalize_medicine_name
+from app.services.interaction_service import get_interaction_index
+from app.agents.shopping_jobs import buy_medicine_task, get_job_manager
+from starlette.concurrency import run_in_threadpool
 import logging
+import os
 
 router = APIRouter()
 gemini_service = GeminiService()
 voice_service = VoiceService()
+emergency_service = EmergencyService()
+intent_router = get_intent_router()
+prefetch_store = get_prefetch_store()
+interaction_index = get_interaction_index()
 
 logger = logging.getLogger(__name__)
 
+# A parked shopping run holds a browser; give up on it sooner than on a hospital search
+BUY_MEDICINE_PREFETCH_TTL = float(os.getenv("PREFETCH_BUY_MEDICINE_TTL", "30"))
+
 class ChatRequest(BaseModel):
     message: str
     user_id: str
     session_id: Optional[str] = None
     is_voice: bool = False
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class ChatResponse(BaseModel):
     response: str
@@ -24,11 +41,64 @@ class ChatResponse(BaseModel):
     audio_url: Optional[str] = None
     medicine_recommendations: List[Dict[str, Any]] = []
     action: Optional[Dict[str, Any]] = None
+    interactions: List[Dict[str, Any]] = []
+
+def _prefetch_action(request: ChatRequest, action: Optional[Dict[str, Any]]):
+    """
+    Start the follow-up request's work while the reply is rendered:
+    the frontend fetches /hospitals/nearby or /buy-medicine right after
+    it sees the action, and those endpoints claim the parked result.
+    """
+    if not action or not request.session_id:
+        return
+    
+    if action["type"] == "HOSPITAL_SEARCH":
+        location = prefetch_store.last_location(request.session_id)
+        if not location:
+            return
+        latitude, longitude, radius = location["latitude"], location["longitude"], 5000
+        prefetch_store.start(
+            request.session_id, "hospitals", (latitude, longitude, radius),
+            launch=lambda: prefetch_store.submit(emergency_service.find_nearby_hospitals, latitude, longitude, radius),
+            cancel=lambda future: future.cancel()
+        )
+    elif action["type"] == "ORDER_MEDICINE" and action.get("data"):
+        medicine_name = action["data"]
+        prefetch_store.start(
+            request.session_id, "buy_medicine", normalize_medicine_name(medicine_name),
+            launch=lambda: get_job_manager().submit(
+                user_id=request.user_id,
+                description=f"Add {medicine_name} to cart (prefetch)",
+                task=buy_medicine_task(medicine_name),
+                speculative=True
+            ),
+            cancel=lambda job: job.cancel(),
+            ttl=BUY_MEDICINE_PREFETCH_TTL
+        )
 
 @router.post("/text")
 async def chat_text(request: ChatRequest):
     try:
-        response = gemini_service.generate_response(
+        if request.session_id and request.latitude is not None and request.longitude is not None:
+            prefetch_store.remember_location(request.session_id, request.latitude, request.longitude)
+        
+        # Deterministic actions ("call an ambulance", "order paracetamol") skip Gemini
+        route = intent_router.classify(request.message)
+        if route["routed"]:
+            logger.info(f"Intent routed locally: {route['intent']} ({route['confidence']})")
+            gemini_service.record_exchange(request.message, route["reply"], request.session_id)
+            _prefetch_action(request, route["action"])
+            return ChatResponse(
+                response=route["reply"],
+                session_id=request.session_id,
+                is_voice=False,
+                medicine_recommendations=gemini_service.extract_medicines(route["reply"]),
+                action=route["action"]
+            )
+        
+        # Off the event loop so a slow Gemini call doesn't stall emergency routes
+        response = await run_in_threadpool(
+            gemini_service.generate_response,
             message=request.message,
             user_id=request.user_id,
             session_id=request.session_id
@@ -37,15 +107,20 @@ async def chat_text(request: ChatRequest):
         # Extract medicine recommendations from response
         medicines = gemini_service.extract_medicines(response["text"])
         
+        # Warn when the recommended medicines shouldn't be taken together
+        interactions = interaction_index.check(medicines)
+        
         # Extract actions from response
         action = gemini_service.extract_actions(response["text"])
+        _prefetch_action(request, action)
         
         return ChatResponse(
             response=response["text"],
             session_id=response["session_id"],
             is_voice=False,
             medicine_recommendations=medicines,
-            action=action
+            action=action,
+            interactions=interactions
         )
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
@@ -55,14 +130,15 @@ async def chat_text(request: ChatRequest):
 async def chat_voice(request: ChatRequest):
     try:
         # Process text through Gemini
-        text_response = gemini_service.generate_response(
+        text_response = await run_in_threadpool(
+            gemini_service.generate_response,
             message=request.message,
             user_id=request.user_id,
             session_id=request.session_id
         )
         
         # Convert response to speech
-        audio_url = voice_service.text_to_speech(text_response["text"])
+        audio_url = await run_in_threadpool(voice_service.text_to_speech, text_response["text"])
         
         return ChatResponse(
             response=text_response["text"],
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+from geopy.distance import geodesic
 from app.services.emergency_service import EmergencyService
+from app.services.prefetch_service import get_prefetch_store
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import logging
+import os
 
 router = APIRouter()
 emergency_service = EmergencyService()
@@ -23,7 +28,8 @@ class EmergencyResponse(BaseModel):
 @router.post("/ambulance")
 async def call_ambulance(request: EmergencyRequest):
     try:
-        result = emergency_service.request_ambulance(
+        result = await run_in_threadpool(
+            emergency_service.request_ambulance,
             user_id=request.user_id,
             location=request.location,
             symptoms=request.symptoms,
@@ -38,9 +44,26 @@ async def call_ambulance(request: EmergencyRequest):
         raise HTTPException(status_code=500, detail="Emergency service unavailable")
 
 @router.get("/hospitals/nearby")
-async def find_nearby_hospitals(latitude: float, longitude: float, radius: int = 5000):
+async def find_nearby_hospitals(latitude: float, longitude: float, radius: int = 5000, session_id: Optional[str] = None):
     try:
-        hospitals = emergency_service.find_nearby_hospitals(
+        prefetch_store = get_prefetch_store()
+        if session_id:
+            prefetch_store.remember_location(session_id, latitude, longitude)
+            
+            # Reuse a search the chat pipeline started for (roughly) this spot
+            max_drift_m = float(os.getenv("PREFETCH_LOCATION_RADIUS_M", "250"))
+            prefetched = prefetch_store.claim(
+                session_id, "hospitals",
+                lambda key: key[2] == radius and geodesic(key[:2], (latitude, longitude)).m <= max_drift_m
+            )
+            if prefetched:
+                try:
+                    return await asyncio.wrap_future(prefetched)
+                except Exception as e:
+                    logging.warning(f"Prefetched hospital search failed, searching again: {str(e)}")
+        
+        hospitals = await run_in_threadpool(
+            emergency_service.find_nearby_hospitals,
             latitude=latitude,
             longitude=longitude,
             radius=radius
@@ -1,14 +1,30 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from app.agents.medical_agent import MedicalCrew
+from app.agents.shopping_jobs import ShoppingJob, JobRejected, TERMINAL_STATES, buy_medicine_task, get_job_manager
 from app.services.gemini_service import GeminiService
+from app.services.product_cache import get_product_cache, normalize_medicine_name
+from app.services.prefetch_service import get_prefetch_store
+from app.services.reminder_service import get_reminder_scheduler
+from app.services.interaction_service import get_interaction_index
+from app.services.uploads import upload_buffer
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+import asyncio
 import logging
+import os
 import json
 import re
 
 router = APIRouter()
 medical_crew = MedicalCrew()
 gemini_service = GeminiService()
+interaction_index = get_interaction_index()
+
+# Encoding an image for Gemini costs several times its size. A small dedicated pool caps how
+# many are in memory at once and keeps those buffers in a fixed set of threads' malloc arenas.
+image_analysis_pool = ThreadPoolExecutor(max_workers=int(os.getenv("UPLOAD_IMAGE_CONCURRENCY", "2")), thread_name_prefix="image-analysis")
 
 class SymptomAnalysisRequest(BaseModel):
     symptoms: str
@@ -23,6 +39,7 @@ class SymptomAnalysisResponse(BaseModel):
     emergency_level: str
     recommendations: list
     should_see_doctor: bool
+    red_flags: list = []
 
 @router.post("/analyze-symptoms")
 async def analyze_symptoms(request: SymptomAnalysisRequest):
@@ -33,7 +50,9 @@ async def analyze_symptoms(request: SymptomAnalysisRequest):
             "existing_conditions": request.existing_conditions
         }
         
-        result = medical_crew.analyze_symptoms(
+        # Off the event loop: the gateway may sleep on rate limits and retries
+        result = await run_in_threadpool(
+            medical_crew.analyze_symptoms,
             symptoms=request.symptoms,
             user_info=user_info
         )
@@ -43,7 +62,8 @@ async def analyze_symptoms(request: SymptomAnalysisRequest):
             medications=result["medications"],
             emergency_level=result["emergency_level"],
             recommendations=result["recommendations"],
-            should_see_doctor=result["emergency_level"] in ["high", "medium"]
+            should_see_doctor=result["emergency_level"] in ["high", "medium"],
+            red_flags=result.get("red_flags", [])
         )
         
     except Exception as e:
@@ -51,11 +71,8 @@ async def analyze_symptoms(request: SymptomAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze-prescription")
-async def analyze_prescription(file: UploadFile = File(...)):
+async def analyze_prescription(file: UploadFile = File(...), user_id: Optional[str] = Form(None), phone: Optional[str] = Form(None)):
     try:
-        # Read file content
-        content = await file.read()
-        
         # Analyze with Gemini
         prompt = """
         Analyze this prescription image and extract the following details in strict JSON format:
@@ -77,7 +94,11 @@ async def analyze_prescription(file: UploadFile = File(...)):
         Ensure the output is valid JSON. Do not include markdown formatting like ```json.
         """
         
-        analysis_text = gemini_service.analyze_image(content, prompt)
+        # The spooled upload is handed over as a view, not read into a second copy
+        with upload_buffer(file) as image:
+            analysis_text = await asyncio.get_running_loop().run_in_executor(
+                image_analysis_pool, gemini_service.analyze_image, image, prompt, file.content_type
+            )
         
         # Clean up response if it contains markdown code blocks
         clean_text = analysis_text.strip()
@@ -97,8 +118,19 @@ async def analyze_prescription(file: UploadFile = File(...)):
                 "medications": [],
                 "special_instructions": analysis_text
             }
+        
+        # Checked locally against the bundled database; asking Gemini would add another round trip
+        interactions = interaction_index.check(analysis_json.get("medications", []))
+        
+        # Turn parsed frequency/duration into scheduled reminders
+        reminders = []
+        if user_id:
+            try:
+                reminders = get_reminder_scheduler().schedule_prescription(user_id, analysis_json.get("medications", []), phone)
+            except Exception as e:
+                logging.error(f"Reminder scheduling error: {str(e)}")
             
-        return {"analysis": analysis_json}
+        return {"analysis": analysis_json, "reminders": reminders, "interactions": interactions}
         
     except Exception as e:
         logging.error(f"Prescription analysis error: {str(e)}")
@@ -154,6 +186,33 @@ async def search_medicines(query: str):
         logging.error(f"Medicine search error: {str(e)}")
         raise HTTPException(status_code=500, detail="Medicine search failed")
 
+@router.get("/medicines/price")
+async def get_medicine_price(name: str):
+    """
+    Price and availability from cached shopping-agent snapshots.
+    A miss is filled by an HTTP lookup - never a browser session.
+    """
+    try:
+        snapshot = await run_in_threadpool(get_product_cache().lookup, name)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail=f"No price information for {name}")
+        
+        return {
+            "medicine_name": name,
+            "available": snapshot["available"],
+            "product_name": snapshot["product_name"],
+            "price": snapshot["price"],
+            "url": snapshot["url"],
+            "stale": snapshot["stale"],
+            "fetched_at": snapshot["fetched_at"]
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Medicine price error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Medicine price lookup failed")
+
 @router.post("/order-medicine")
 async def order_medicine(medicine_id: int, user_id: str, quantity: int = 1):
     try:
@@ -174,6 +233,37 @@ async def order_medicine(medicine_id: int, user_id: str, quantity: int = 1):
 class BuyMedicineRequest(BaseModel):
     medicine_name: str
     user_id: str
+    session_id: Optional[str] = None
+
+def _submit_buy_medicine(request: BuyMedicineRequest) -> ShoppingJob:
+    # The chat pipeline may already have started this run speculatively
+    wanted = normalize_medicine_name(request.medicine_name)
+    job = get_prefetch_store().claim(request.session_id, "buy_medicine", lambda key: key == wanted)
+    if job and job.status not in ("failed", "cancelled", "timed_out"):
+        logging.info(f"🤖 Using prefetched shopping job {job.id[:8]} for {request.medicine_name}")
+        get_job_manager().adopt(job)
+        return job
+    
+    logging.info(f"🤖 AI Shopping Agent activated for user {request.user_id}: {request.medicine_name}")
+    try:
+        return get_job_manager().submit(
+            user_id=request.user_id,
+            description=f"Add {request.medicine_name} to cart",
+            task=buy_medicine_task(request.medicine_name)
+        )
+    except JobRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "10"})
+
+async def _wait_for_job(job: ShoppingJob) -> dict:
+    """Wait for a job to finish without tying up the event loop"""
+    updates = job.subscribe(asyncio.get_running_loop())
+    try:
+        while True:
+            snapshot = await updates.get()
+            if snapshot["status"] in TERMINAL_STATES:
+                return snapshot
+    finally:
+        job.unsubscribe(updates)
 
 @router.post("/buy-medicine")
 async def buy_medicine(request: BuyMedicineRequest):
@@ -181,20 +271,11 @@ async def buy_medicine(request: BuyMedicineRequest):
     AI Agent endpoint: Autonomously search and add medicine to cart on PharmEasy
     """
     try:
-        from app.agents.shopping_agent import get_shopping_agent
-        
-        logging.info(f"🤖 AI Shopping Agent activated for user {request.user_id}: {request.medicine_name}")
-        
-        # Get shopping agent singleton
-        agent = get_shopping_agent()
-        
-        # Execute autonomous shopping task in background (headless mode)
-        result = agent.search_and_add_to_cart(
-            medicine_name=request.medicine_name,
-            headless=True  # Run invisibly in background
-        )
+        job = _submit_buy_medicine(request)
+        snapshot = await _wait_for_job(job)
+        result = snapshot["result"] or {}
         
-        if result["success"]:
+        if snapshot["status"] == "succeeded":
             logging.info(f"✅ Successfully added {request.medicine_name} to cart")
             return {
                 "success": True,
@@ -202,20 +283,183 @@ async def buy_medicine(request: BuyMedicineRequest):
                 "cart_url": result["cart_url"],
                 "price": result.get("price", "N/A"),
                 "message": f"✅ I've added {request.medicine_name} to your cart! Click the link to view.",
-                "agent_used": True
+                "agent_used": True,
+                "job_id": job.id
             }
         else:
-            logging.error(f"❌ Shopping agent failed: {result['message']}")
+            message = result.get("message") or snapshot["error"]
+            logging.error(f"❌ Shopping agent failed: {message}")
             return {
                 "success": False,
-                "message": result["message"],
+                "message": message,
                 "medicine_name": request.medicine_name,
-                "cart_url": None
+                "cart_url": None,
+                "job_id": job.id
             }
-        
+    
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Buy medicine error: {str(e)}")
         raise HTTPException(
             status_code=500, 
             detail=f"Shopping agent failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/buy-medicine/jobs", status_code=202)
+async def submit_buy_medicine_job(request: BuyMedicineRequest):
+    """Queue a shopping-agent run and return its job id immediately"""
+    job = _submit_buy_medicine(request)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/medical/buy-medicine/jobs/{job.id}",
+        "websocket_url": f"/api/medical/buy-medicine/jobs/{job.id}/ws"
+    }
+
+@router.delete("/buy-medicine/prefetch")
+async def release_buy_medicine_prefetch(session_id: str):
+    """The user declined the order the chat offered; stop the run started for it"""
+    return {"released": get_prefetch_store().release(session_id, "buy_medicine")}
+
+@router.get("/buy-medicine/jobs/{job_id}")
+async def get_buy_medicine_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.delete("/buy-medicine/jobs/{job_id}")
+async def cancel_buy_medicine_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.cancel():
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return job.to_dict()
+
+@router.websocket("/buy-medicine/jobs/{job_id}/ws")
+async def watch_buy_medicine_job(websocket: WebSocket, job_id: str):
+    """Push a job snapshot on every progress update until it finishes"""
+    await websocket.accept()
+    job = get_job_manager().get(job_id)
+    if not job:
+        await websocket.close(code=4404)
+        return
+    
+    updates = job.subscribe(asyncio.get_running_loop())
+    try:
+        while True:
+            snapshot = await updates.get()
+            await websocket.send_json(snapshot)
+            if snapshot["status"] in TERMINAL_STATES:
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        job.unsubscribe(updates)
+
+class BuyMedicinesRequest(BaseModel):
+    user_id: str
+    # Either /analyze-prescription "medications" or extract_medicines() output, or plain names
+    medications: List[Union[str, Dict[str, Any]]]
+
+MAX_CART_ITEMS = int(os.getenv("SHOPPING_MAX_CART_ITEMS", "10"))
+
+def _medication_names(medications: list) -> list:
+    names, seen = [], set()
+    for medication in medications:
+        name = medication.get("name") if isinstance(medication, dict) else medication
+        name = (name or "").strip()
+        if not name or name.lower() in ("not specified", "unknown") or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        names.append(name)
+    return names[:MAX_CART_ITEMS]
+
+def _submit_buy_medicines(request: BuyMedicinesRequest) -> ShoppingJob:
+    names = _medication_names(request.medications)
+    if not names:
+        raise HTTPException(status_code=400, detail="No medicine names found in request")
+    
+    def task(job: ShoppingJob):
+        from app.agents.shopping_agent import get_shopping_agent
+        return get_shopping_agent().fill_cart(names, progress=job.report)
+    
+    logging.info(f"🤖 AI Shopping Agent filling cart for user {request.user_id}: {names}")
+    try:
+        return get_job_manager().submit(
+            user_id=request.user_id,
+            description=f"Add {len(names)} medicines to cart",
+            task=task
+        )
+    except JobRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "10"})
+
+@router.post("/buy-medicines")
+async def buy_medicines(request: BuyMedicinesRequest):
+    """
+    AI Agent endpoint: add every medicine from a prescription to one PharmEasy cart
+    """
+    try:
+        job = _submit_buy_medicines(request)
+        snapshot = await _wait_for_job(job)
+        result = snapshot["result"] or {}
+        
+        return {
+            "success": snapshot["status"] == "succeeded",
+            "items": result.get("items", []),
+            "cart_url": result.get("cart_url"),
+            "message": result.get("message") or snapshot["error"],
+            "agent_used": True,
+            "job_id": job.id
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Buy medicines error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Shopping agent failed: {str(e)}")
+
+@router.post("/buy-medicines/jobs", status_code=202)
+async def submit_buy_medicines_job(request: BuyMedicinesRequest):
+    """Queue a multi-item cart fill and return its job id immediately"""
+    job = _submit_buy_medicines(request)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/medical/buy-medicine/jobs/{job.id}",
+        "websocket_url": f"/api/medical/buy-medicine/jobs/{job.id}/ws"
+    }
+
+@router.get("/shopping-agent/selector-stats")
+async def get_selector_stats():
+    """Learned selector hit rates, latencies and quarantine state for the shopping agent"""
+    try:
+        from app.agents.shopping_agent import get_shopping_agent
+        
+        return {"stats": get_shopping_agent().selector_stats.snapshot()}
+    
+    except Exception as e:
+        logging.error(f"Selector stats error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch selector stats")
+
+@router.get("/reminders")
+async def list_reminders(user_id: str, include_inactive: bool = False):
+    try:
+        return {"reminders": get_reminder_scheduler().list_for_user(user_id, include_inactive)}
+    except Exception as e:
+        logging.error(f"List reminders error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to list reminders")
+
+@router.get("/reminders/due")
+async def get_due_reminders(user_id: str):
+    """Reminders fired since the last poll, for in-app notifications"""
+    return {"reminders": get_reminder_scheduler().drain_inbox(user_id)}
+
+@router.delete("/reminders/{reminder_id}")
+async def cancel_reminder(reminder_id: str):
+    if not get_reminder_scheduler().cancel(reminder_id):
+        raise HTTPException(status_code=404, detail="Reminder not found")
+    return {"reminder_id": reminder_id, "status": "cancelled"}
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from typing import Optional
+from app.services.model_router import get_model_router
+from app.services.llm_gateway import get_llm_gateway
+from app.services.profiler import get_profile_store
+from app.services.admission_control import get_admission_controller
+from app.services.answer_cache import get_answer_cache
+import logging
+import hmac
+import os
+
+router = APIRouter()
+
+class ModelOverrideRequest(BaseModel):
+    model: Optional[str] = None
+
+@router.get("/models")
+async def get_model_metrics():
+    """Per-model rolling latency/error metrics, routing decisions and overrides"""
+    try:
+        return {
+            **get_model_router().snapshot(),
+            "gateway": get_llm_gateway().snapshot()
+        }
+    except Exception as e:
+        logging.error(f"Model metrics error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to read model metrics")
+
+def _require_ops_token(token: Optional[str]):
+    """Changes to live routing and caches need OPS_TOKEN; without one configured they are disabled"""
+    expected = os.getenv("OPS_TOKEN", "")
+    if not expected or not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Ops token required")
+
+@router.put("/models/overrides/{endpoint}")
+async def set_model_override(endpoint: str, request: ModelOverrideRequest, x_ops_token: Optional[str] = Header(None)):
+    """Pin an endpoint (chat, image, symptoms, shopping) to one model; null clears it"""
+    _require_ops_token(x_ops_token)
+    model_router = get_model_router()
+    if endpoint not in model_router.endpoints:
+        raise HTTPException(status_code=404, detail=f"Unknown endpoint: {endpoint}")
+    try:
+        model_router.set_override(endpoint, request.model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"endpoint": endpoint, "override": request.model}
+
+@router.delete("/models/overrides/{endpoint}")
+async def clear_model_override(endpoint: str, x_ops_token: Optional[str] = Header(None)):
+    _require_ops_token(x_ops_token)
+    model_router = get_model_router()
+    if endpoint not in model_router.endpoints:
+        raise HTTPException(status_code=404, detail=f"Unknown endpoint: {endpoint}")
+    model_router.set_override(endpoint, None)
+    return {"endpoint": endpoint, "override": None}
+
+@router.get("/admission")
+async def get_admission_stats():
+    """Slots, queue depths and shed/throttled counts per priority class"""
+    return get_admission_controller().snapshot()
+
+@router.get("/answer-cache")
+async def get_answer_cache_stats():
+    """Entries, hit rate and most-served questions of the first-turn answer cache"""
+    return get_answer_cache().snapshot()
+
+@router.delete("/answer-cache")
+async def clear_answer_cache(x_ops_token: Optional[str] = Header(None)):
+    """Drop every cached answer, e.g. after changing the medical prompt"""
+    _require_ops_token(x_ops_token)
+    get_answer_cache().clear()
+    return {"cleared": True}
+
+def _require_profiling_token(token: Optional[str]):
+    expected = os.getenv("PROFILING_TOKEN", "")
+    if not expected or not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+
+@router.get("/profiles")
+async def list_profiles(limit: int = 50, x_profile_token: Optional[str] = Header(None)):
+    """Most recent per-request profiles (metadata only)"""
+    _require_profiling_token(x_profile_token)
+    return {"profiles": get_profile_store().list(limit)}
+
+@router.get("/profiles/{request_id}", response_class=PlainTextResponse)
+async def get_profile(request_id: str, x_profile_token: Optional[str] = Header(None)):
+    """Folded stacks for one request; pipe into flamegraph.pl or open in speedscope"""
+    _require_profiling_token(x_profile_token)
+    folded = get_profile_store().get(request_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(folded)
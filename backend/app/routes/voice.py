@@ -1,6 +1,10 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 from app.services.voice_service import VoiceService
+from app.services.uploads import upload_path
+from app.services.http_cache import etag_matches
+from starlette.concurrency import run_in_threadpool
 import logging
 
 router = APIRouter()
@@ -9,53 +13,38 @@ voice_service = VoiceService()
 class VoiceResponse(BaseModel):
     text: str
     success: bool
+    trimmed_seconds: float = 0.0
 
 @router.post("/speech-to-text")
 async def convert_speech_to_text(audio_file: UploadFile = File(...)):
     try:
-        # Read audio file
-        audio_data = await audio_file.read()
+        # Hand the worker pool a path; the audio is never pickled across processes
+        with upload_path(audio_file) as audio_path:
+            # Normalize, trim silence and convert to text
+            result = await run_in_threadpool(voice_service.speech_to_text, audio_path)
         
-        # Convert to text
-        text = voice_service.speech_to_text(audio_data)
-        
-        return VoiceResponse(text=text, success=True)
+        return VoiceResponse(
+            text=result["text"],
+            success=True,
+            trimmed_seconds=result["trimmed_seconds"]
+        )
         
     except Exception as e:
         logging.error(f"Speech to text error: {str(e)}")
         raise HTTPException(status_code=500, detail="Speech recognition failed")
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from pydantic import BaseModel
-from app.services.voice_service import VoiceService
-import logging
-
-router = APIRouter()
-voice_service = VoiceService()
-
-class VoiceResponse(BaseModel):
-    text: str
-    success: bool
 
-@router.post("/speech-to-text")
-async def convert_speech_to_text(audio_file: UploadFile = File(...)):
+@router.get("/voices")
+async def get_available_voices(request: Request):
     try:
-        # Read audio file
-        audio_data = await audio_file.read()
+        # A cold catalog waits up to ELEVENLABS_TIMEOUT for its first fetch
+        voices, etag = await run_in_threadpool(voice_service.get_voices_snapshot)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
         
-        # Convert to text
-        text = voice_service.speech_to_text(audio_data)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
         
-        return VoiceResponse(text=text, success=True)
-        
-    except Exception as e:
-        logging.error(f"Speech to text error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Speech recognition failed")
-
-@router.get("/voices")
-async def get_available_voices():
-    try:
-        voices = voice_service.get_available_voices()
-        return {"voices": voices}
+        return JSONResponse({"voices": voices}, headers=headers)
     except Exception as e:
         logging.error(f"Get voices error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch voices")
@@ -63,7 +52,8 @@ async def get_available_voices():
 @router.post("/text-to-speech")
 async def text_to_speech(text: str, voice_id: str = "Rachel"):
     try:
-        audio_data = voice_service.text_to_speech(text, voice_id)
+        # ElevenLabs or system TTS blocks for the whole synthesis; keep it off the event loop
+        audio_data = await run_in_threadpool(voice_service.text_to_speech, text, voice_id)
         if not audio_data:
             raise HTTPException(status_code=500, detail="TTS generation failed")
             
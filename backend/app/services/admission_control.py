@@ -0,0 +1,245 @@
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge, Histogram
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    "nexus_admission_queue_wait_seconds",
+    "Time admitted requests spent queued for a slot",
+    ["priority_class"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+)
+ADMISSION_QUEUED = Gauge(
+    "nexus_admission_queued",
+    "Requests waiting for an admission slot",
+    ["priority_class"]
+)
+ADMISSION_REJECTED = Counter(
+    "nexus_admission_rejected_total",
+    "Requests shed (503) or throttled per client (429) before reaching a route",
+    ["priority_class", "reason"]
+)
+
+# (name, priority, share of slots, max queued, queue-wait target ms, per-client limit applies)
+# A class may only take a slot while total in-flight is below share * limit, so the
+# slots above each class's share are always left for the classes above it.
+# Emergency is never shed: unbounded queue, no wait target, no per-client cap.
+PRIORITY_CLASSES = [
+    ("emergency", 0, 1.0, 0, 0, False),
+    ("appointments", 1, 0.9, 50, 2000, True),
+    ("interactive", 2, 0.75, 50, 1000, True),
+    ("shopping", 3, 0.5, 20, 500, True)
+]
+
+# Longest prefix first; unlisted paths (/health, /metrics, /api/ops, docs) are never queued
+ROUTE_CLASSES: List[Tuple[str, str]] = [
+    ("/api/emergency", "emergency"),
+    ("/api/appointments", "appointments"),
+    ("/api/medical/medicines", "shopping"),
+    ("/api/medical/order-medicine", "shopping"),
+    ("/api/medical/buy-medicine", "shopping"),
+    ("/api/medical/shopping-agent", "shopping"),
+    ("/api/medical", "interactive"),
+    ("/api/chat", "interactive"),
+    ("/api/voice", "interactive")
+]
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, message: str, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class PriorityClass:
+    def __init__(self, name: str, priority: int, share: float, max_queue: int, target_wait_ms: float, per_client: bool):
+        self.name = name
+        self.priority = priority
+        self.share = share
+        self.max_queue = max_queue
+        self.target_wait = target_wait_ms / 1000
+        self.per_client = per_client
+        self.queue = deque()
+        self.running = 0
+        self.admitted = 0
+        self.shed = 0
+        self.throttled = 0
+
+
+class _Waiter:
+    __slots__ = ("future", "client", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, client: str, enqueued_at: float):
+        self.future = future
+        self.client = client
+        self.enqueued_at = enqueued_at
+
+
+class AdmissionController:
+    """
+    Priority admission for the shared event loop and worker pool. Requests
+    take one of ADMISSION_MAX_CONCURRENT slots; when none is free they wait in
+    a bounded per-class queue and are granted strictly by priority. Lower
+    classes are shed with 503 + Retry-After once their queue is full or its
+    oldest waiter has been there longer than the class's wait target, and a
+    single client may hold at most ADMISSION_PER_CLIENT_LIMIT slots/queue
+    places (429). Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self):
+        # The default worker pool has 40 threads; lower classes stay under it
+        self.limit = int(os.getenv("ADMISSION_MAX_CONCURRENT", "40"))
+        self.per_client_limit = int(os.getenv("ADMISSION_PER_CLIENT_LIMIT", "8"))
+        self.retry_after = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+        self.classes: Dict[str, PriorityClass] = {}
+        for name, priority, share, max_queue, target_wait_ms, per_client in PRIORITY_CLASSES:
+            prefix = f"ADMISSION_{name.upper()}_"
+            self.classes[name] = PriorityClass(
+                name, priority,
+                float(os.getenv(prefix + "SHARE", share)),
+                int(os.getenv(prefix + "QUEUE", max_queue)),
+                float(os.getenv(prefix + "TARGET_MS", target_wait_ms)),
+                per_client
+            )
+        self._by_priority = sorted(self.classes.values(), key=lambda c: c.priority)
+        self.in_flight = 0
+        self._clients: Dict[str, int] = {}
+
+    def classify(self, path: str) -> Optional[str]:
+        for prefix, name in ROUTE_CLASSES:
+            if path.startswith(prefix):
+                return name
+        return None
+
+    def _ceiling(self, cls: PriorityClass) -> int:
+        return max(1, math.floor(cls.share * self.limit))
+
+    def _reject(self, cls: PriorityClass, status_code: int, reason: str, message: str):
+        if status_code == 429:
+            cls.throttled += 1
+        else:
+            cls.shed += 1
+        ADMISSION_REJECTED.labels(priority_class=cls.name, reason=reason).inc()
+        raise AdmissionRejected(status_code, reason, message, self.retry_after)
+
+    def _release_client(self, client: str):
+        remaining = self._clients.get(client, 0) - 1
+        if remaining > 0:
+            self._clients[client] = remaining
+        else:
+            self._clients.pop(client, None)
+
+    async def acquire(self, name: str, client: str) -> float:
+        """Wait for a slot; returns seconds spent queued or raises AdmissionRejected"""
+        cls = self.classes[name]
+        if cls.per_client and self._clients.get(client, 0) >= self.per_client_limit:
+            self._reject(cls, 429, "per_client", "Too many concurrent requests from this client")
+
+        if not cls.queue and self.in_flight < self._ceiling(cls):
+            self._grant(cls, client)
+            ADMISSION_QUEUE_WAIT.labels(priority_class=name).observe(0)
+            return 0.0
+
+        now = time.monotonic()
+        if cls.max_queue and len(cls.queue) >= cls.max_queue:
+            self._reject(cls, 503, "queue_full", "Server is busy, please retry shortly")
+        # Standing queue: the head has already waited past target, so a new arrival would too
+        if cls.target_wait and cls.queue and now - cls.queue[0].enqueued_at >= cls.target_wait:
+            self._reject(cls, 503, "queue_wait", "Server is busy, please retry shortly")
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), client, now)
+        cls.queue.append(waiter)
+        self._clients[client] = self._clients.get(client, 0) + 1
+        ADMISSION_QUEUED.labels(priority_class=name).set(len(cls.queue))
+        try:
+            if cls.target_wait:
+                await asyncio.wait_for(asyncio.shield(waiter.future), cls.target_wait)
+            else:
+                await waiter.future
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Granted in the same loop iteration the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release(name, client)
+                    raise
+            else:
+                cls.queue.remove(waiter)
+                self._release_client(client)
+                ADMISSION_QUEUED.labels(priority_class=name).set(len(cls.queue))
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self._reject(cls, 503, "timeout", "Server is busy, please retry shortly")
+
+        waited = time.monotonic() - waiter.enqueued_at
+        ADMISSION_QUEUE_WAIT.labels(priority_class=name).observe(waited)
+        return waited
+
+    def _grant(self, cls: PriorityClass, client: str):
+        self.in_flight += 1
+        cls.running += 1
+        cls.admitted += 1
+        self._clients[client] = self._clients.get(client, 0) + 1
+
+    def release(self, name: str, client: str):
+        cls = self.classes[name]
+        self.in_flight -= 1
+        cls.running -= 1
+        self._release_client(client)
+        self._dispatch()
+
+    def _dispatch(self):
+        # Ceilings only grow with priority, so once a class is blocked every class below it is too
+        for cls in self._by_priority:
+            if not cls.queue:
+                continue
+            if self.in_flight >= self._ceiling(cls):
+                return
+            while cls.queue and self.in_flight < self._ceiling(cls):
+                waiter = cls.queue.popleft()
+                # Queued waiters already counted against their client
+                self.in_flight += 1
+                cls.running += 1
+                cls.admitted += 1
+                waiter.future.set_result(None)
+            ADMISSION_QUEUED.labels(priority_class=cls.name).set(len(cls.queue))
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "per_client_limit": self.per_client_limit,
+            "clients": len(self._clients),
+            "classes": {
+                cls.name: {
+                    "priority": cls.priority,
+                    "ceiling": self._ceiling(cls),
+                    "running": cls.running,
+                    "queued": len(cls.queue),
+                    "max_queue": cls.max_queue or None,
+                    "target_wait_ms": cls.target_wait * 1000 or None,
+                    "admitted": cls.admitted,
+                    "shed": cls.shed,
+                    "throttled": cls.throttled
+                }
+                for cls in self._by_priority
+            }
+        }
+
+
+_admission_controller = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _admission_controller
+    if _admission_controller is None:
+        with _admission_controller_lock:
+            if _admission_controller is None:
+                _admission_controller = AdmissionController()
+    return _admission_controller
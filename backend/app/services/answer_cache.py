@@ -0,0 +1,288 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
+from prometheus_client import Counter, Gauge
+from dotenv import load_dotenv
+from app.services.triage_service import get_triage_engine
+
+load_dotenv()
+
+ANSWER_CACHE_REQUESTS = Counter(
+    "nexus_answer_cache_requests_total",
+    "First-turn chat lookups in the semantic answer cache",
+    ["result"]
+)
+ANSWER_CACHE_ENTRIES = Gauge(
+    "nexus_answer_cache_entries",
+    "Answers currently held in the semantic answer cache"
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for matching a question to an answer
+STOPWORDS = {
+    "a", "an", "the", "i", "im", "me", "my", "we", "you", "your", "it", "its", "is", "are", "am", "be",
+    "was", "been", "do", "does", "did", "what", "whats", "for", "of", "to", "in", "on", "at", "by",
+    "with", "from", "about", "and", "or", "so", "if", "this",
+    "that", "these", "those", "there", "any", "some", "get", "got", "have", "has", "had", "having",
+    "please", "pls", "hi", "hello", "hey", "thanks", "thank", "good", "best", "recommend", "suggest",
+    "tell", "know", "want", "need", "like", "really", "very", "just", "s", "t", "ve", "ll", "d"
+}
+# Different ways of asking for the same thing collapse onto one token
+SYNONYMS = {
+    "medicine": "remedy", "medicines": "remedy", "medication": "remedy", "medications": "remedy",
+    "meds": "remedy", "med": "remedy", "tablet": "remedy", "tablets": "remedy", "pill": "remedy",
+    "pills": "remedy", "drug": "remedy", "drugs": "remedy", "cure": "remedy", "cures": "remedy",
+    "remedies": "remedy", "treat": "remedy", "treatment": "remedy", "relief": "remedy",
+    "relieve": "remedy", "rid": "remedy",
+    "pain": "ache", "aching": "ache", "aches": "ache", "sore": "ache", "hurts": "ache", "hurt": "ache",
+    "kid": "child", "kids": "child", "children": "child", "baby": "infant", "toddler": "child",
+    "daily": "day", "everyday": "day"
+}
+# A negated question must never get the affirmative answer, or vice versa
+NEGATIONS = {"not", "no", "never", "without", "avoid", "cannot", "dont", "doesnt", "didnt", "cant",
+             "wont", "shouldnt", "isnt", "arent", "wasnt"}
+# What is being asked: "when should I take X" (schedule), "can I take X" (eligibility) and
+# "how should I take X" (method) need different answers even with the same content words
+QUESTION_WORDS = {"when", "how", "hows", "why", "which", "who", "where", "can", "could", "should", "would",
+                  "will", "shall", "may", "might", "must"}
+
+UNIGRAM_WEIGHT = 1.0
+# Word pairs, unordered: "headache remedy" and "remedy for a headache" ask the same thing
+PAIR_WEIGHT = 0.5
+# Shared by all of a token's character trigrams, so typos still overlap
+TRIGRAM_WEIGHT = 0.6
+# A word only in one question is tolerated when it's this close to a word in the other (typos)
+TYPO_MIN_JACCARD = 0.6
+
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _trigrams(token: str) -> FrozenSet[str]:
+    padded = f"#{token}#"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def tokens_compatible(first: FrozenSet[str], second: FrozenSet[str]) -> bool:
+    """
+    Every word of each question is in the other, up to a typo. Extra qualifiers
+    ("for kids", "while pregnant", "with paracetamol") change the right answer
+    even when the vectors are close.
+    """
+    for token in first ^ second:
+        other = second if token in first else first
+        grams = _trigrams(token)
+        if not any(len(grams & _trigrams(candidate)) / len(grams | _trigrams(candidate)) >= TYPO_MIN_JACCARD for candidate in other):
+            return False
+    return True
+
+
+def tokenize(text: str) -> Tuple[List[str], FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    """
+    Returns: (content tokens, numbers, negations, question words)
+    Numbers, negations and question words are kept aside: they must match exactly for a hit
+    """
+    raw = TOKEN_PATTERN.findall(text.casefold().replace("’", "'").replace("'", ""))
+    numbers = frozenset(t for t in raw if t.isdigit())
+    negations = frozenset(t for t in raw if t in NEGATIONS)
+    questions = frozenset("how" if t == "hows" else t for t in raw if t in QUESTION_WORDS)
+    tokens = []
+    for token in raw:
+        if token in STOPWORDS or token in NEGATIONS or token in QUESTION_WORDS or token.isdigit():
+            continue
+        token = SYNONYMS.get(token, token)
+        tokens.append(SYNONYMS.get(_stem(token), _stem(token)))
+    return tokens, numbers, negations, questions
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str, dim: int) -> Tuple[int, float]:
+    # Stable across processes, unlike hash(); the sign bit keeps collisions unbiased
+    value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+class HashedNgramEmbedder:
+    """
+    Bag of words, adjacent word pairs and character trigrams, hashed into a
+    fixed-size signed vector and L2-normalized, so cosine similarity is a dot
+    product. No model to load; tens of microseconds per message.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed(self, tokens: List[str]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        features: Dict[str, float] = {}
+        for token in tokens:
+            features[f"w:{token}"] = features.get(f"w:{token}", 0.0) + UNIGRAM_WEIGHT
+            trigrams = _trigrams(token)
+            for trigram in trigrams:
+                features[f"c:{trigram}"] = features.get(f"c:{trigram}", 0.0) + TRIGRAM_WEIGHT / len(trigrams)
+        for first, second in zip(tokens, tokens[1:]):
+            pair = " ".join(sorted((first, second)))
+            features[f"p:{pair}"] = features.get(f"p:{pair}", 0.0) + PAIR_WEIGHT
+        for feature, weight in features.items():
+            index, sign = _feature_hash(feature, self.dim)
+            vector[index] += sign * weight
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector
+
+
+class AnswerCache:
+    """
+    Semantic cache of first-turn chat answers. Questions are embedded with
+    HashedNgramEmbedder into a preallocated NumPy matrix; a lookup is one
+    matrix-vector product over the live rows. A hit needs cosine similarity
+    of at least ANSWER_CACHE_THRESHOLD, the same content words up to typos,
+    the same numbers (ages, doses, durations), the same negation and the
+    same question words (when/how/can...). Entries expire after
+    ANSWER_CACHE_TTL_SECONDS; when full, the least recently used row is
+    reused. Questions with any triage red flag are never cached or served.
+    """
+
+    def __init__(self):
+        self.capacity = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+        self.threshold = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+        self.ttl = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "43200"))
+        self.min_tokens = int(os.getenv("ANSWER_CACHE_MIN_TOKENS", "1"))
+        self.max_tokens = int(os.getenv("ANSWER_CACHE_MAX_TOKENS", "20"))
+        self.embedder = HashedNgramEmbedder(int(os.getenv("ANSWER_CACHE_DIM", "256")))
+        self.triage = get_triage_engine()
+
+        self._vectors = np.zeros((self.capacity, self.embedder.dim), dtype=np.float32)
+        # Rows that are empty or expired have expires_at 0 and never match
+        self._expires_at = np.zeros(self.capacity, dtype=np.float64)
+        self._last_used = np.zeros(self.capacity, dtype=np.float64)
+        self._entries: List[Optional[Dict]] = [None] * self.capacity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _prepare(self, message: str) -> Optional[Dict]:
+        """None when the message shouldn't go through the cache at all"""
+        tokens, numbers, negations, questions = tokenize(message)
+        if not self.min_tokens <= len(tokens) <= self.max_tokens:
+            return None
+        if self.triage.assess(message)["red_flags"]:
+            return None
+        return {"vector": self.embedder.embed(tokens), "tokens": frozenset(tokens), "numbers": numbers, "negations": negations,
+                "questions": questions}
+
+    def _best_match(self, query: Dict, now: float) -> Tuple[int, float]:
+        scores = self._vectors @ query["vector"]
+        scores[self._expires_at <= now] = -1.0
+        # Best few rather than argmax alone: the top row may fail the exact-match guards
+        candidates = np.argpartition(-scores, 4)[:5] if self.capacity > 5 else np.arange(self.capacity)
+        for row in sorted(candidates, key=lambda r: -scores[r]):
+            if scores[row] < self.threshold:
+                break
+            entry = self._entries[row]
+            if (entry["numbers"] == query["numbers"] and entry["negations"] == query["negations"]
+                    and entry["questions"] == query["questions"]
+                    and tokens_compatible(entry["tokens"], query["tokens"])):
+                return int(row), float(scores[row])
+        return -1, 0.0
+
+    def lookup(self, message: str) -> Optional[Dict]:
+        """Returns: {answer, similarity, question} for a hit, else None"""
+        query = self._prepare(message)
+        if query is None:
+            self.bypassed += 1
+            ANSWER_CACHE_REQUESTS.labels(result="bypass").inc()
+            return None
+        now = time.time()
+        with self._lock:
+            row, similarity = self._best_match(query, now)
+            if row < 0:
+                self.misses += 1
+                ANSWER_CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+            self._last_used[row] = now
+            entry = self._entries[row]
+            entry["hits"] += 1
+            self.hits += 1
+        ANSWER_CACHE_REQUESTS.labels(result="hit").inc()
+        return {"answer": entry["answer"], "similarity": round(similarity, 3), "question": entry["question"]}
+
+    def store(self, message: str, answer: str):
+        # Emergencies must always reach the model fresh
+        if "[ACTION:EMERGENCY]" in answer:
+            return
+        query = self._prepare(message)
+        if query is None:
+            return
+        now = time.time()
+        with self._lock:
+            # A paraphrase of a cached question refreshes that row instead of adding another
+            row, _ = self._best_match(query, now)
+            if row < 0:
+                free = np.flatnonzero(self._expires_at <= now)
+                if free.size:
+                    row = int(free[0])
+                else:
+                    row = int(np.argmin(self._last_used))
+                    self.evictions += 1
+            self._vectors[row] = query["vector"]
+            self._expires_at[row] = now + self.ttl
+            self._last_used[row] = now
+            self._entries[row] = {"question": message, "answer": answer, "tokens": query["tokens"], "numbers": query["numbers"],
+                                  "negations": query["negations"], "questions": query["questions"], "created_at": now,
+                                  "hits": 0}
+            ANSWER_CACHE_ENTRIES.set(int(np.count_nonzero(self._expires_at > now)))
+
+    def clear(self):
+        with self._lock:
+            self._expires_at[:] = 0
+            self._entries = [None] * self.capacity
+        ANSWER_CACHE_ENTRIES.set(0)
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            live = [(row, self._entries[row]) for row in np.flatnonzero(self._expires_at > now)]
+        lookups = self.hits + self.misses
+        top = sorted(live, key=lambda item: -item[1]["hits"])[:10]
+        return {
+            "entries": len(live),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "top_questions": [{"question": entry["question"], "hits": entry["hits"]} for _, entry in top]
+        }
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache()
+                logging.info(f"Answer cache ready: {_answer_cache.capacity} entries, threshold {_answer_cache.threshold}")
+    return _answer_cache
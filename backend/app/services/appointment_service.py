@@ -0,0 +1,482 @@
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SlotUnavailable(Exception):
+    """The requested slot is full, closed or outside the booking window"""
+
+    def __init__(self, message: str, alternatives: List[str] = None):
+        super().__init__(message)
+        self.alternatives = alternatives or []
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tues": 1, "tue": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thurs": 3, "thu": 3, "friday": 4, "fri": 4, "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6
+}
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8, "september": 9,
+    "sept": 9, "sep": 9, "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12
+}
+_WEEKDAY = "(?P<weekday>" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + ")"
+_MONTH = "(?P<month>" + "|".join(sorted(MONTHS, key=len, reverse=True)) + ")"
+_DAY = r"(?P<day>\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s*(?P<year>\d{4}))?"
+# Tried in order; the first that matches names the day
+DATE_PATTERNS = [
+    re.compile(r"\b(?P<iso>\d{4}-\d{2}-\d{2})\b"),
+    re.compile(rf"\b{_DAY}(?:\s+of)?\s+{_MONTH}\b{_YEAR}"),
+    re.compile(rf"\b{_MONTH}\s+{_DAY}\b{_YEAR}"),
+    re.compile(r"\b(?P<first>\d{1,2})/(?P<second>\d{1,2})(?:/(?P<year>\d{4}|\d{2}))?\b"),
+    re.compile(r"\b(?P<first>\d{1,2})[.-](?P<second>\d{1,2})[.-](?P<year>\d{4}|\d{2})\b"),
+    re.compile(r"\b(?P<relative>day after tomorrow|tomorrow|today|tonight)\b"),
+    re.compile(rf"\b(?:(?P<next>next)\s+|this\s+)?{_WEEKDAY}\b"),
+]
+# Any of these left once the date is read means the text says more than we understood
+UNREAD_DATE_WORDS = re.compile(
+    r"\b(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|tues|thu|thurs|fri"
+    r"|january|february|march|april|june|july|august|september|october|november|december"
+    r"|jan|feb|apr|aug|sept|oct|nov|dec|tomorrow|today|tonight|week|weekend|month|next|after)\b"
+    r"|\b\d{1,2}(?:st|nd|rd|th)\b|\d/\d"
+)
+RELATIVE_DAYS = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}
+
+
+def _read_date(match: re.Match, today: date) -> Optional[date]:
+    """The day a DATE_PATTERNS match names; None when it is invalid or ambiguous"""
+    groups = match.groupdict()
+    if groups.get("iso"):
+        return date.fromisoformat(groups["iso"])
+    if groups.get("relative"):
+        return today + timedelta(days=RELATIVE_DAYS[groups["relative"]])
+    if groups.get("weekday"):
+        ahead = (WEEKDAYS[groups["weekday"]] - today.weekday()) % 7
+        return today + timedelta(days=ahead or (7 if groups.get("next") else 0))
+
+    if groups.get("month"):
+        month, day = MONTHS[groups["month"]], int(groups["day"])
+    else:
+        first, second = int(groups["first"]), int(groups["second"])
+        # Day first as written in India; 10/11 could be either way round, so don't guess
+        if first > 12 >= second or first == second:
+            month, day = second, first
+        elif second > 12 >= first:
+            month, day = first, second
+        else:
+            return None
+    year = groups.get("year")
+    if year:
+        return date(int(year) + (2000 if len(year) == 2 else 0), month, day)
+    candidate = date(today.year, month, day)
+    return candidate if candidate >= today else date(today.year + 1, month, day)
+
+
+def parse_preferred_time(text: str, now: datetime = None) -> Optional[datetime]:
+    """
+    "2026-10-19T10:00", "2026-10-19 10:30", "tomorrow 10 AM", "today 3:30pm",
+    "day after tomorrow 9am", "next monday 10am", "on friday at 11:00",
+    "20th october 10am", "20/10 3pm", "10:00" or "10.30" (next occurrence).
+    Returns None when no time can be read, or when the text names a day
+    that can't be read unambiguously.
+    """
+    now = now or datetime.now()
+    text = text.strip().lower()
+    try:
+        return datetime.fromisoformat(text.replace(" ", "T", 1) if re.match(r"\d{4}-\d{2}-\d{2} ", text) else text)
+    except ValueError:
+        pass
+
+    # Read the day first and cut it out, so "20th" or "10/20" isn't taken for a time
+    day, weekday_only, rest = None, False, text
+    for pattern in DATE_PATTERNS:
+        date_match = pattern.search(rest)
+        if not date_match:
+            continue
+        try:
+            day = _read_date(date_match, now.date())
+        except ValueError:
+            return None
+        if day is None:
+            return None
+        weekday_only = bool(date_match.groupdict().get("weekday")) and not date_match.group("next")
+        rest = rest[:date_match.start()] + " " + rest[date_match.end():]
+        break
+    if UNREAD_DATE_WORDS.search(rest):
+        return None
+
+    for match in re.finditer(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?(?![\d-])", rest):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        meridiem = (match.group(3) or "").replace(".", "")
+        # A bare number ("tomorrow 3", a day of the month) is too ambiguous to book
+        if not (meridiem or match.group(2)) or hour > 23 or minute > 59:
+            continue
+        if meridiem == "pm" and hour < 12:
+            hour += 12
+        elif meridiem == "am" and hour == 12:
+            hour = 0
+        break
+    else:
+        return None
+
+    candidate = datetime.combine(day or now.date(), datetime.min.time()).replace(hour=hour, minute=minute)
+    # A bare time, or "monday" said on a Monday after that time, means the next occurrence
+    if candidate <= now and day is None:
+        candidate += timedelta(days=1)
+    elif candidate <= now and weekday_only:
+        candidate += timedelta(days=7)
+    return candidate
+
+
+class DaySlots:
+    """
+    Bookings for one hospital on one day: one bitmap per lane (doctor/room),
+    bit i set when slot i is taken in that lane.
+    """
+    __slots__ = ("lanes",)
+
+    def __init__(self, capacity: int):
+        self.lanes = [0] * capacity
+
+    def free_lane(self, slot: int) -> Optional[int]:
+        bit = 1 << slot
+        for lane, mask in enumerate(self.lanes):
+            if not mask & bit:
+                return lane
+        return None
+
+    def take(self, slot: int, lane: int):
+        self.lanes[lane] |= 1 << slot
+
+    def release(self, slot: int, lane: int):
+        self.lanes[lane] &= ~(1 << slot)
+
+    def available(self, slot: int) -> int:
+        bit = 1 << slot
+        return sum(1 for mask in self.lanes if not mask & bit)
+
+
+class AppointmentBook:
+    """
+    Hospital registry (indexed by id) plus per-hospital/day slot bitmaps.
+    Reservations are atomic: a striped lock guards each hospital/day.
+    State is a JSON snapshot plus an append-only journal in NEXUS_DATA_DIR;
+    the journal is folded into the snapshot on load and every N writes.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv(
+            "APPOINTMENTS_PATH",
+            os.path.join(os.getenv("NEXUS_DATA_DIR", "data"), "appointments.json")
+        )
+        self.journal_path = f"{self.path}.journal"
+        self.default_schedule = {
+            "open": os.getenv("APPOINTMENT_OPEN", "09:00"),
+            "close": os.getenv("APPOINTMENT_CLOSE", "17:00"),
+            "slot_minutes": int(os.getenv("APPOINTMENT_SLOT_MINUTES", "15")),
+            "capacity": int(os.getenv("APPOINTMENT_SLOT_CAPACITY", "2")),
+            "closed_weekdays": []
+        }
+        self.booking_days = int(os.getenv("APPOINTMENT_BOOKING_DAYS", "30"))
+        self.retention_days = int(os.getenv("APPOINTMENT_RETENTION_DAYS", "90"))
+        self.compact_every = int(os.getenv("APPOINTMENT_COMPACT_EVERY", "1000"))
+        self.seen_ttl = float(os.getenv("APPOINTMENT_SEEN_HOSPITAL_TTL", "86400"))
+        self.seen_max = int(os.getenv("APPOINTMENT_SEEN_HOSPITALS_MAX", "2000"))
+
+        self.hospitals: Dict[str, Dict] = {}
+        # Search results that can be booked but aren't persisted: id -> (expires_at, record)
+        self._seen: Dict[str, Tuple[float, Dict]] = OrderedDict()
+        self.appointments: Dict[str, Dict] = {}
+        self._days: Dict[Tuple[str, str], DaySlots] = {}
+        self._stripes = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._registry_lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        self._journal = None
+        self._journal_writes = 0
+        self._load()
+
+    # Persistence
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.hospitals = snapshot.get("hospitals", {})
+            self.appointments = snapshot.get("appointments", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Failed to load appointments: {str(e)}")
+
+        replayed = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                        replayed += 1
+                    except (ValueError, KeyError):
+                        # A torn last line from a crash mid-write
+                        continue
+        except FileNotFoundError:
+            pass
+
+        for appointment in self.appointments.values():
+            if appointment["status"] == "booked":
+                self._day(appointment["hospital_id"], appointment["date"]).take(appointment["slot"], appointment["lane"])
+        if replayed:
+            self._compact()
+
+    def _apply(self, entry: Dict):
+        if entry["op"] == "hospital":
+            self.hospitals[entry["hospital"]["id"]] = entry["hospital"]
+        elif entry["op"] == "book":
+            self.appointments[entry["appointment"]["id"]] = entry["appointment"]
+        elif entry["op"] == "cancel" and entry["id"] in self.appointments:
+            self.appointments[entry["id"]]["status"] = "cancelled"
+
+    def _append(self, entry: Dict):
+        with self._journal_lock:
+            try:
+                if self._journal is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._journal = open(self.journal_path, "a", encoding="utf-8")
+                self._journal.write(json.dumps(entry) + "\n")
+                self._journal.flush()
+                self._journal_writes += 1
+            except Exception as e:
+                logging.error(f"Failed to write appointment journal: {str(e)}")
+                return
+        if self._journal_writes >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        """Write a fresh snapshot and start an empty journal"""
+        with self._journal_lock, self._registry_lock:
+            # Prune in place: reservations may be inserting concurrently
+            cutoff = (date.today() - timedelta(days=self.retention_days)).isoformat()
+            for appointment_id, appointment in list(self.appointments.items()):
+                if appointment["date"] < cutoff:
+                    self.appointments.pop(appointment_id, None)
+            today = date.today().isoformat()
+            for key in [key for key in list(self._days) if key[1] < today]:
+                self._days.pop(key, None)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"hospitals": self.hospitals, "appointments": dict(self.appointments)}, f)
+                os.replace(tmp_path, self.path)
+                if self._journal:
+                    self._journal.close()
+                    self._journal = None
+                open(self.journal_path, "w").close()
+                self._journal_writes = 0
+            except Exception as e:
+                logging.error(f"Failed to save appointments: {str(e)}")
+
+    # Registry
+
+    def _hospital_record(self, hospital: Dict, existing: Dict) -> Dict:
+        return {
+            "id": str(hospital["id"]),
+            "name": hospital.get("name") or existing.get("name", "Unknown Hospital"),
+            "address": hospital.get("address") or existing.get("address"),
+            "phone": hospital.get("phone") or existing.get("phone", "N/A"),
+            "latitude": hospital.get("latitude", existing.get("latitude")),
+            "longitude": hospital.get("longitude", existing.get("longitude")),
+            "emergency_services": hospital.get("emergency_services", existing.get("emergency_services", False)),
+            "schedule": existing.get("schedule") or hospital.get("schedule") or dict(self.default_schedule)
+        }
+
+    def upsert_hospital(self, hospital: Dict) -> Dict:
+        """Register (or refresh) a hospital for good; its schedule is kept across refreshes"""
+        hospital_id = str(hospital["id"])
+        with self._registry_lock:
+            existing = self.hospitals.get(hospital_id, {})
+            record = self._hospital_record(hospital, existing)
+            if record == existing:
+                return record
+            self.hospitals[hospital_id] = record
+            self._seen.pop(hospital_id, None)
+        self._append({"op": "hospital", "hospital": record})
+        return record
+
+    def remember_hospital(self, hospital: Dict) -> Dict:
+        """
+        Make a search result bookable without persisting it. Seen hospitals
+        live in memory for APPOINTMENT_SEEN_HOSPITAL_TTL and are capped at
+        APPOINTMENT_SEEN_HOSPITALS_MAX; the first booking registers one for good.
+        """
+        hospital_id = str(hospital["id"])
+        with self._registry_lock:
+            if hospital_id in self.hospitals:
+                return self.hospitals[hospital_id]
+            existing = self._seen.pop(hospital_id, (0, {}))[1]
+            record = self._hospital_record(hospital, existing)
+            self._seen[hospital_id] = (time.time() + self.seen_ttl, record)
+            while len(self._seen) > self.seen_max:
+                self._seen.popitem(last=False)
+        return record
+
+    def get_hospital(self, hospital_id) -> Optional[Dict]:
+        hospital_id = str(hospital_id)
+        hospital = self.hospitals.get(hospital_id)
+        if hospital:
+            return hospital
+        seen = self._seen.get(hospital_id)
+        if seen and seen[0] > time.time():
+            return seen[1]
+        return None
+
+    # Slots
+
+    def _lock_for(self, hospital_id: str, day: str) -> threading.Lock:
+        return self._stripes[hash((hospital_id, day)) % self.LOCK_STRIPES]
+
+    def _day(self, hospital_id: str, day: str) -> DaySlots:
+        key = (hospital_id, day)
+        slots = self._days.get(key)
+        if slots is None:
+            schedule = self.hospitals.get(hospital_id, {}).get("schedule", self.default_schedule)
+            slots = self._days.setdefault(key, DaySlots(schedule["capacity"]))
+        return slots
+
+    @staticmethod
+    def _slot_times(schedule: Dict) -> List[str]:
+        start, end, step = _minutes(schedule["open"]), _minutes(schedule["close"]), schedule["slot_minutes"]
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in range(start, end - step + 1, step)]
+
+    def _bookable_day(self, hospital: Dict, day: date) -> bool:
+        today = date.today()
+        return (today <= day <= today + timedelta(days=self.booking_days)
+                and day.weekday() not in hospital["schedule"].get("closed_weekdays", []))
+
+    def availability(self, hospital_id, day: date) -> Dict:
+        """Free places per slot for one hospital and day; past slots are omitted"""
+        hospital = self.get_hospital(hospital_id)
+        if not hospital:
+            raise KeyError(hospital_id)
+        schedule = hospital["schedule"]
+        result = {"hospital_id": hospital["id"], "hospital_name": hospital["name"], "date": day.isoformat(),
+                  "slot_minutes": schedule["slot_minutes"], "slots": []}
+        if not self._bookable_day(hospital, day):
+            return result
+
+        now = datetime.now()
+        earliest = now.strftime("%H:%M") if day == now.date() else ""
+        slots = self._days.get((hospital["id"], day.isoformat()))
+        for index, start in enumerate(self._slot_times(schedule)):
+            if start <= earliest:
+                continue
+            available = slots.available(index) if slots else schedule["capacity"]
+            result["slots"].append({"time": start, "available": available})
+        return result
+
+    def _alternatives(self, hospital: Dict, start: datetime, limit: int = 3) -> List[str]:
+        """Nearest free slots on or after the requested time, over the next week"""
+        found = []
+        for offset in range(8):
+            day = start.date() + timedelta(days=offset)
+            for slot in self.availability(hospital["id"], day)["slots"]:
+                if slot["available"] and (offset or slot["time"] >= start.strftime("%H:%M")):
+                    found.append(f"{day.isoformat()}T{slot['time']}")
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def reserve(self, hospital_id, start: datetime, user_info: Dict, symptoms: str) -> Dict:
+        """Atomically take a place in the slot containing `start`; raises SlotUnavailable"""
+        hospital = self.get_hospital(hospital_id)
+        if not hospital:
+            raise KeyError(hospital_id)
+        if hospital["id"] not in self.hospitals:
+            # Only hospitals someone actually books go into the persistent registry
+            hospital = self.upsert_hospital(hospital)
+        schedule = hospital["schedule"]
+        offset = start.hour * 60 + start.minute - _minutes(schedule["open"])
+        slot_count = len(self._slot_times(schedule))
+        if not self._bookable_day(hospital, start.date()) or start <= datetime.now():
+            raise SlotUnavailable("That day can't be booked", self._alternatives(hospital, max(start, datetime.now())))
+        if offset < 0 or offset // schedule["slot_minutes"] >= slot_count:
+            raise SlotUnavailable(
+                f"{hospital['name']} takes appointments {schedule['open']}-{schedule['close']}",
+                self._alternatives(hospital, start)
+            )
+
+        slot = offset // schedule["slot_minutes"]
+        day = start.date().isoformat()
+        with self._lock_for(hospital["id"], day):
+            slots = self._day(hospital["id"], day)
+            lane = slots.free_lane(slot)
+            if lane is None:
+                raise SlotUnavailable("That time is fully booked", self._alternatives(hospital, start))
+            slots.take(slot, lane)
+            appointment_id = f"APT-{uuid.uuid4().hex[:12].upper()}"
+            appointment = {
+                "id": appointment_id,
+                "hospital_id": hospital["id"],
+                "hospital_name": hospital["name"],
+                "date": day,
+                "time": self._slot_times(schedule)[slot],
+                "slot": slot,
+                "lane": lane,
+                "user_id": user_info.get("user_id"),
+                "user_name": user_info.get("name"),
+                "user_phone": user_info.get("phone"),
+                "symptoms": symptoms,
+                "status": "booked",
+                "confirmation_code": f"NXS{appointment_id[-6:]}",
+                "created_at": time.time()
+            }
+            self.appointments[appointment_id] = appointment
+        self._append({"op": "book", "appointment": appointment})
+        return dict(appointment)
+
+    def cancel(self, appointment_id: str) -> Optional[Dict]:
+        appointment = self.appointments.get(appointment_id)
+        if not appointment:
+            return None
+        with self._lock_for(appointment["hospital_id"], appointment["date"]):
+            if appointment["status"] != "booked":
+                return dict(appointment)
+            self._day(appointment["hospital_id"], appointment["date"]).release(appointment["slot"], appointment["lane"])
+            appointment["status"] = "cancelled"
+        self._append({"op": "cancel", "id": appointment_id})
+        return dict(appointment)
+
+    def get(self, appointment_id: str) -> Optional[Dict]:
+        appointment = self.appointments.get(appointment_id)
+        return dict(appointment) if appointment else None
+
+
+_appointment_book = None
+_appointment_book_lock = threading.Lock()
+
+
+def get_appointment_book() -> AppointmentBook:
+    global _appointment_book
+    if _appointment_book is None:
+        with _appointment_book_lock:
+            if _appointment_book is None:
+                _appointment_book = AppointmentBook()
+    return _appointment_book
@@ -6,10 +6,15 @@ from geopy.distance import geodesic
 import requests
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse
+from urllib.parse import urlparse
 from dotenv import load_dotenv
+from app.services.metrics import track_upstream
+from app.services.appointment_service import SlotUnavailable, get_appointment_book, parse_preferred_time
 
 load_dotenv()
 
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org").rstrip("/")
+
 class EmergencyService:
     def __init__(self):
         self.twilio_account_sid = os.getenv("TWILIO_ACCOUNT_SID")
@@ -20,26 +25,37 @@ class EmergencyService:
         self.twilio_client = None
         if self.twilio_account_sid and self.twilio_auth_token:
             self.twilio_client = Client(self.twilio_account_sid, self.twilio_auth_token)
+            if os.getenv("TWILIO_API_BASE_URL"):
+                self.twilio_client.api.base_url = os.getenv("TWILIO_API_BASE_URL")
         
-        self.geolocator = Nominatim(user_agent="nexus_health")
+        nominatim = urlparse(NOMINATIM_URL)
+        self.geolocator = Nominatim(user_agent="nexus_health", domain=nominatim.netloc, scheme=nominatim.scheme)
         
         self.mock_hospitals = [
             {"id": 1, "name": "City General Hospital", "address": "123 Main Street, Cityville", "phone": "+1-555-0101", "latitude": 40.7128, "longitude": -74.0060, "emergency_services": True, "distance": None},
             {"id": 2, "name": "Community Medical Center", "address": "456 Oak Avenue, Townsville", "phone": "+1-555-0102", "latitude": 40.7589, "longitude": -73.9851, "emergency_services": True, "distance": None},
             {"id": 3, "name": "QuickCare Clinic", "address": "789 Pine Road, Villagetown", "phone": "+1-555-0103", "latitude": 40.7505, "longitude": -73.9934, "emergency_services": False, "distance": None}
         ]
+        
+        self.appointment_book = get_appointment_book()
+        for hospital in self.mock_hospitals:
+            if not self.appointment_book.get_hospital(hospital["id"]):
+                self.appointment_book.upsert_hospital(hospital)
     
     def find_nearby_hospitals(self, latitude: float, longitude: float, radius: int = 5000) -> List[Dict]:
         """Find nearby hospitals using OpenStreetMap"""
         try:
             delta = 0.1  # Increased to ~11km
             viewbox = [longitude - delta, latitude - delta, longitude + delta, latitude + delta]
-            url = "https://nominatim.openstreetmap.org/search"
+            url = f"{NOMINATIM_URL}/search"
             params = {"q": "hospital", "format": "json", "limit": 10, "viewbox": f"{viewbox[0]},{viewbox[1]},{viewbox[2]},{viewbox[3]}", "bounded": 1, "addressdetails": 1}
             headers = {"User-Agent": "NexusHealth/1.0"}
             logging.info(f"Searching hospitals with params: {params}")
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            results = response.json()
+            with track_upstream("nominatim", "search") as call:
+                response = requests.get(url, params=params, headers=headers, timeout=10)
+                if not response.ok:
+                    call.outcome = f"http_{response.status_code}"
+                results = response.json()
             
             hospitals = []
             for result in results:
@@ -48,6 +64,10 @@ class EmergencyService:
                 hospitals.append({"id": result.get("place_id"), "name": result.get("name", "Unknown Hospital"), "address": result.get("display_name"), "latitude": hospital_lat, "longitude": hospital_lon, "distance_km": round(distance, 2), "phone": "N/A"})
             
             hospitals.sort(key=lambda x: x["distance_km"])
+            # Make these place ids bookable; only booked ones are persisted
+            for hospital in hospitals:
+                if hospital["id"] is not None:
+                    self.appointment_book.remember_hospital(hospital)
             return hospitals
         except Exception as e:
             logging.error(f"Error finding hospitals: {str(e)}")
@@ -82,22 +102,31 @@ class EmergencyService:
             logging.error(f"Request ambulance error: {str(e)}")
             return {"success": False, "message": f"Emergency service error: {str(e)}"}
     
-    def book_appointment(self, user_info: Dict, hospital_id: int, preferred_time: str, symptoms: str = "General consultation") -> Dict:
-        """Book appointment and notify hospital via voice call"""
+    def book_appointment(self, user_info: Dict, hospital_id, preferred_time: str, symptoms: str = "General consultation") -> Dict:
+        """Reserve a slot and notify hospital via voice call"""
         try:
-            hospital = next((h for h in self.mock_hospitals if h["id"] == hospital_id), None)
+            hospital = self.appointment_book.get_hospital(hospital_id)
             if not hospital:
-                return {"success": False, "message": "Hospital not found"}
+                return {"success": False, "error": "not_found", "message": "Hospital not found"}
+            
+            start = parse_preferred_time(preferred_time)
+            if not start:
+                return {"success": False, "error": "invalid_time", "message": "Couldn't understand the preferred time. Try something like 'tomorrow 10:30 AM'."}
+            
+            try:
+                appointment = self.appointment_book.reserve(hospital["id"], start, user_info, symptoms)
+            except SlotUnavailable as e:
+                return {"success": False, "error": "unavailable", "message": str(e), "alternatives": e.alternatives}
             
-            appointment_id = f"APT_{user_info.get('user_id', 'unknown')}_{hospital_id}"
+            scheduled_time = f"{appointment['date']} {appointment['time']}"
             user_phone = os.getenv("USER_PHONE_NUMBER", "N/A")
             patient_name = user_info.get("name", "Unknown Patient")
             
             # Call hospital to notify (demo: calls user's phone)
             if self.twilio_client and user_phone:
-                self._send_appointment_notification(user_phone, hospital["name"], patient_name, symptoms, preferred_time, appointment_id)
+                self._send_appointment_notification(user_phone, hospital["name"], patient_name, symptoms, scheduled_time, appointment["id"])
             
-            return {"success": True, "message": f"Appointment booked at {hospital['name']}", "appointment_id": appointment_id, "hospital_name": hospital["name"], "hospital_address": hospital["address"], "hospital_phone": hospital["phone"], "scheduled_time": preferred_time, "confirmation_code": f"NXS{appointment_id[-6:]}", "user_phone": user_phone}
+            return {"success": True, "message": f"Appointment booked at {hospital['name']} for {scheduled_time}", "appointment_id": appointment["id"], "hospital_name": hospital["name"], "hospital_address": hospital["address"], "hospital_phone": hospital["phone"], "scheduled_time": scheduled_time, "confirmation_code": appointment["confirmation_code"], "user_phone": user_phone}
         except Exception as e:
             logging.error(f"Appointment booking error: {str(e)}")
             return {"success": False, "message": "Appointment booking failed"}
@@ -109,12 +138,18 @@ class EmergencyService:
                     parts = address.split(',')
                     if len(parts) == 2:
                         lat, lon = float(parts[0].strip()), float(parts[1].strip())
-                        location = self.geolocator.reverse(f"{lat}, {lon}", timeout=5)
+                        with track_upstream("nominatim", "reverse") as call:
+                            location = self.geolocator.reverse(f"{lat}, {lon}", timeout=5)
+                            if not location:
+                                call.outcome = "not_found"
                         if location:
                             return {"latitude": lat, "longitude": lon, "address": location.address}
                 except (ValueError, AttributeError):
                     pass
-            location = self.geolocator.geocode(address, timeout=5)
+            with track_upstream("nominatim", "geocode") as call:
+                location = self.geolocator.geocode(address, timeout=5)
+                if not location:
+                    call.outcome = "not_found"
             if location:
                 return {"latitude": location.latitude, "longitude": location.longitude, "address": location.address}
             return None
@@ -137,7 +172,8 @@ class EmergencyService:
         """Emergency voice call with natural Polly voice"""
         try:
             sms_body = f"🚨 NEXUS HEALTH EMERGENCY\nLocation: {location}\nSymptoms: {symptoms}\nAmbulance ID: {ambulance_id}"
-            self.twilio_client.messages.create(body=sms_body, from_=self.twilio_phone_number, to=contact_number)
+            with track_upstream("twilio", "sms"):
+                self.twilio_client.messages.create(body=sms_body, from_=self.twilio_phone_number, to=contact_number)
             
             if patient_name and incident_details:
                 call_message = f"Hello, this is Nexus Health AI Emergency Response System. We have an urgent medical emergency requiring ambulance dispatch. Location: {location}. Patient name: {patient_name}. Incident: {incident_details}. Ambulance tracking ID: {ambulance_id}. Estimated arrival: 8 to 12 minutes. Please prepare to receive the patient. Thank you."
@@ -146,7 +182,8 @@ class EmergencyService:
             
             response = VoiceResponse()
             response.say(call_message, voice="Polly.Joanna-Neural", language="en-US")
-            call = self.twilio_client.calls.create(to=contact_number, from_=self.twilio_phone_number, twiml=str(response))
+            with track_upstream("twilio", "call"):
+                call = self.twilio_client.calls.create(to=contact_number, from_=self.twilio_phone_number, twiml=str(response))
             logging.info(f"✅ Emergency call sent. SID: {call.sid}")
         except Exception as e:
             logging.error(f"Emergency notification error: {str(e)}")
@@ -158,7 +195,8 @@ class EmergencyService:
             
             response = VoiceResponse()
             response.say(call_message, voice="Polly.Joanna-Neural", language="en-US")
-            call = self.twilio_client.calls.create(to=contact_number, from_=self.twilio_phone_number, twiml=str(response))
+            with track_upstream("twilio", "call"):
+                call = self.twilio_client.calls.create(to=contact_number, from_=self.twilio_phone_number, twiml=str(response))
             logging.info(f"✅ Appointment notification sent. SID: {call.sid}")
         except Exception as e:
             logging.error(f"Appointment notification error: {str(e)}")
@@ -1,57 +1,90 @@
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 import re
+from app.services.product_cache import get_product_cache
+from app.services.llm_gateway import get_llm_gateway
+from app.services.model_router import RoutedModel
+from app.services.answer_cache import get_answer_cache
 
 load_dotenv()
 
+# Medical context prompt, sent once as the system instruction (served from a
+# shared context cache where the API supports it) instead of in every history
+MEDICAL_PROMPT = """
+You are Nexus Health AI, a medical assistant. Your role is to:
+1. Listen to symptoms and provide general health advice
+2. Suggest possible remedies and over-the-counter medications
+3. Recommend when to see a doctor
+4. NEVER prescribe prescription medications
+5. Always recommend consulting healthcare professionals for serious symptoms
+
+IMPORTANT: When recommending medicines, format them like this:
+"I recommend [MED:Medicine Name Dosage] for [symptom]."
+
+Use [MED:medicine_name dosage] format for any medicine recommendation.
+If the user asks for a specific medicine, use that medicine name in the tag.
+Example: User: "I need ibuprofen" -> Response: "Here is [MED:Ibuprofen 400mg]..."
+
+IMPORTANT: If the user asks to perform a specific action, include the corresponding action tag in your response:
+- Call ambulance/emergency: [ACTION:EMERGENCY]
+- Find hospitals: [ACTION:HOSPITAL_SEARCH]
+- Book appointment: [ACTION:BOOK_APPOINTMENT]
+- Buy/Order medicine: [ACTION:ORDER_MEDICINE:medicine_name] (e.g., [ACTION:ORDER_MEDICINE:Ibuprofen])
+
+Important disclaimers:
+- This is not a substitute for professional medical advice
+- For emergencies, call emergency services immediately
+- Always consult with healthcare providers for accurate diagnosis
+"""
+
 class GeminiService:
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        # Rate limiting, retries, circuit breaking and dedup live in the gateway;
+        # the router picks the model per call from the endpoint and request size
+        gateway = get_llm_gateway(self.api_key)
+        self.model = RoutedModel("chat", gateway, system_instruction=MEDICAL_PROMPT)
+        self.vision_model = RoutedModel("image", gateway)
         self.sessions = {}  # In production, use Redis or database
+        # Only first turns are cached: later ones depend on the conversation so far
+        self.answer_cache = get_answer_cache() if os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true" else None
         
-        # Medical context prompt
-        self.medical_prompt = """
-        You are Nexus Health AI, a medical assistant. Your role is to:
-        1. Listen to symptoms and provide general health advice
-        2. Suggest possible remedies and over-the-counter medications
-        3. Recommend when to see a doctor
-        4. NEVER prescribe prescription medications
-        5. Always recommend consulting healthcare professionals for serious symptoms
-        
-        IMPORTANT: When recommending medicines, format them like this:
-        "I recommend [MED:Medicine Name Dosage] for [symptom]."
-        
-        Use [MED:medicine_name dosage] format for any medicine recommendation.
-        If the user asks for a specific medicine, use that medicine name in the tag.
-        Example: User: "I need ibuprofen" -> Response: "Here is [MED:Ibuprofen 400mg]..."
-        
-        IMPORTANT: If the user asks to perform a specific action, include the corresponding action tag in your response:
-        - Call ambulance/emergency: [ACTION:EMERGENCY]
-        - Find hospitals: [ACTION:HOSPITAL_SEARCH]
-        - Book appointment: [ACTION:BOOK_APPOINTMENT]
-        - Buy/Order medicine: [ACTION:ORDER_MEDICINE:medicine_name] (e.g., [ACTION:ORDER_MEDICINE:Ibuprofen])
-        
-        Important disclaimers:
-        - This is not a substitute for professional medical advice
-        - For emergencies, call emergency services immediately
-        - Always consult with healthcare providers for accurate diagnosis
-        """
+    def _get_history(self, session_id: str = None) -> List[Dict]:
+        if session_id not in self.sessions:
+            self.sessions[session_id] = []
+        return self.sessions[session_id]
+    
+    def record_exchange(self, message: str, reply: str, session_id: str = None):
+        """Add a turn answered without Gemini so later turns keep the context"""
+        history = self._get_history(session_id)
+        history.append({"role": "user", "parts": [message]})
+        history.append({"role": "model", "parts": [reply]})
         
     def generate_response(self, message: str, user_id: str, session_id: str = None) -> Dict:
+        first_turn = self.answer_cache is not None and not self._get_history(session_id)
+        if first_turn:
+            try:
+                cached = self.answer_cache.lookup(message)
+            except Exception as e:
+                logging.error(f"Answer cache lookup error: {str(e)}")
+                cached = None
+            if cached:
+                # MED/ACTION tags are part of the stored text and are extracted as usual
+                self.record_exchange(message, cached["answer"], session_id)
+                return {
+                    "text": cached["answer"],
+                    "session_id": session_id,
+                    "cached": True
+                }
+        
         try:
-            if session_id not in self.sessions:
-                self.sessions[session_id] = [{"role": "user", "parts": [self.medical_prompt]}]
-            
             # Add user message to history
-            self.sessions[session_id].append({"role": "user", "parts": [message]})
+            self._get_history(session_id).append({"role": "user", "parts": [message]})
             
             # Generate response
             response = self.model.generate_content(self.sessions[session_id])
@@ -59,6 +92,12 @@ class GeminiService:
             # Add assistant response to history
             self.sessions[session_id].append({"role": "model", "parts": [response.text]})
             
+            if first_turn:
+                try:
+                    self.answer_cache.store(message, response.text)
+                except Exception as e:
+                    logging.error(f"Answer cache store error: {str(e)}")
+            
             return {
                 "text": response.text,
                 "session_id": session_id
@@ -71,16 +110,17 @@ class GeminiService:
                 "session_id": session_id
             }
 
-    def analyze_image(self, image_data: bytes, prompt: str) -> str:
+    def analyze_image(self, image_data: Union[bytes, memoryview], prompt: str, mime_type: Optional[str] = None) -> str:
         try:
             image_parts = [
                 {
-                    "mime_type": "image/jpeg",
-                    "data": image_data
+                    "mime_type": mime_type if mime_type and mime_type.startswith("image/") else "image/jpeg",
+                    # The request proto only takes bytes: this is the one copy of the upload
+                    "data": image_data if isinstance(image_data, bytes) else bytes(image_data)
                 }
             ]
             
-            response = self.model.generate_content([prompt, image_parts[0]])
+            response = self.vision_model.generate_content([prompt, image_parts[0]])
             return response.text
             
         except Exception as e:
@@ -91,20 +131,31 @@ class GeminiService:
         """
         Extract medicine recommendations from AI response
         Format: [MED:Medicine Name Dosage]
-        Returns: List of {name, display_name} dicts
+        Returns: List of {name, display_name, estimated_price} dicts, enriched
+        with cached product snapshots when available (no network calls)
         """
         # Find all [MED:...] patterns
         pattern = r'\[MED:(.*?)\]'
         matches = re.findall(pattern, text)
         
+        product_cache = get_product_cache()
         medicines = []
         for match in matches:
             medicine_name = match.strip()
-            medicines.append({
+            medicine = {
                 "name": medicine_name,
                 "display_name": medicine_name,
                 "estimated_price": "₹50-200"  # Placeholder
-            })
+            }
+            
+            snapshot = product_cache.get(medicine_name, allow_stale=True)
+            if snapshot:
+                medicine["in_stock"] = snapshot["available"]
+                if snapshot["available"]:
+                    medicine["estimated_price"] = snapshot["price"]
+                    medicine["product_url"] = snapshot["url"]
+            
+            medicines.append(medicine)
         
         return medicines
 
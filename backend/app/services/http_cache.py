@@ -0,0 +1,14 @@
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match evaluation per RFC 9110: "*" matches any current
+    representation, otherwise any listed tag matches by weak comparison
+    (W/ prefixes are ignored on both sides)
+    """
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == current:
+            return True
+    return False
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+DEFAULT_INTENTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "intents.json")
+
+
+class IntentRouter:
+    """
+    Rule-based classifier for chat messages that map to a single app action
+    (call ambulance, find hospitals, book appointment, order medicine).
+    Confident matches skip the Gemini round-trip entirely; anything
+    ambiguous, conversational or long is left to the LLM.
+    """
+
+    def __init__(self, intents_path: str = None, known_medicine: Callable[[str], bool] = None):
+        """known_medicine(name) says whether a name is a medicine we recognise; defaults to the interaction database"""
+        self.known_medicine = known_medicine or _in_interaction_database
+        self.intents_path = intents_path or os.getenv("INTENT_ROUTER_PATH", DEFAULT_INTENTS_PATH)
+        self.min_confidence = float(os.getenv("INTENT_ROUTER_MIN_CONFIDENCE", "0.85"))
+        with open(self.intents_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.max_words = config["max_words"]
+        self.defer_penalty = config["defer_penalty"]
+        self.defer_patterns = [re.compile(p) for p in config["defer_patterns"]]
+        self.intents = []
+        for intent in config["intents"]:
+            self.intents.append({
+                **intent,
+                "patterns": [(re.compile(p["pattern"]), p["weight"]) for p in intent["patterns"]],
+                "quantity_patterns": [re.compile(p) for p in intent.get("quantity_patterns", [])],
+                "dosage_pattern": re.compile(intent["dosage_pattern"]) if "dosage_pattern" in intent else None,
+                "dosage_form_words": set(intent.get("dosage_form_words", [])),
+                "generic_medicine_words": set(intent.get("generic_medicine_words", [])),
+                "non_medicine_words": set(intent.get("non_medicine_words", []))
+            })
+        logging.info(f"Intent router loaded: {len(self.intents)} intents")
+
+    @staticmethod
+    def _normalize(message: str) -> str:
+        text = message.casefold().replace("’", "'")
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _clean_medicine(self, intent: Dict, medicine: str) -> Optional[str]:
+        medicine = medicine.strip(" .")
+        # "2 strips of dolo 650" -> "dolo 650"
+        for pattern in intent["quantity_patterns"]:
+            medicine = pattern.sub("", medicine).strip()
+        words = medicine.split()
+        if not words or len(words) > intent.get("max_medicine_words", len(words)):
+            return None
+        if all(w in intent["generic_medicine_words"] for w in words):
+            return None
+        if any(w in intent["non_medicine_words"] for w in words):
+            return None
+        # "buy a new phone" matches the shape of an order; only a recognised
+        # medicine, a strength or a dosage form makes it one
+        has_dosage = any(w in intent["dosage_form_words"] for w in words) or bool(
+            intent["dosage_pattern"] and intent["dosage_pattern"].search(medicine))
+        if not has_dosage and not self.known_medicine(medicine):
+            return None
+        return " ".join(w.capitalize() if w.isalpha() else w for w in words)
+
+    def classify(self, message: str) -> Dict:
+        """
+        Returns: {intent, confidence, action, reply, routed}
+        routed is True when the action can be returned without the LLM
+        """
+        text = self._normalize(message)
+        best = {"intent": None, "confidence": 0.0, "action": None, "reply": None}
+
+        if not text or len(text.split()) > self.max_words:
+            return {**best, "routed": False}
+
+        for intent in self.intents:
+            for pattern, weight in intent["patterns"]:
+                match = pattern.search(text)
+                if not match or weight <= best["confidence"]:
+                    continue
+                data = None
+                if "medicine" in pattern.groupindex:
+                    data = self._clean_medicine(intent, match.group("medicine"))
+                    if not data:
+                        continue
+                best = {
+                    "intent": intent["intent"],
+                    "confidence": weight,
+                    "action": {"type": intent["intent"], "data": data},
+                    "reply": intent["reply"].format(medicine=data)
+                }
+
+        # Questions, negations and dosage talk need the LLM even if a pattern fired
+        if best["intent"] and any(p.search(text) for p in self.defer_patterns):
+            best["confidence"] = round(best["confidence"] * self.defer_penalty, 3)
+
+        return {**best, "routed": best["confidence"] >= self.min_confidence}
+
+
+def _in_interaction_database(name: str) -> bool:
+    from app.services.interaction_service import get_interaction_index
+    return bool(get_interaction_index().resolve(name))
+
+
+def _known_medicine(name: str) -> bool:
+    """In the interaction database, or a product the shopping agent or lookups have found"""
+    if _in_interaction_database(name):
+        return True
+    from app.services.product_cache import get_product_cache
+    return get_product_cache().knows(name)
+
+
+_intent_router = None
+_intent_router_lock = threading.Lock()
+
+
+def get_intent_router() -> IntentRouter:
+    """Compiled once per process and shared"""
+    global _intent_router
+    if _intent_router is None:
+        with _intent_router_lock:
+            if _intent_router is None:
+                _intent_router = IntentRouter(known_medicine=_known_medicine)
+    return _intent_router
@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+from prometheus_client import Counter
+from app.services.triage_service import AhoCorasick, normalize_text
+
+DEFAULT_INTERACTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "drug_interactions.json")
+
+INTERACTION_WARNINGS = Counter(
+    "nexus_drug_interaction_warnings_total",
+    "Drug interaction and duplicate-ingredient warnings returned",
+    ["severity"]
+)
+
+# Resolved names kept per process; prescriptions repeat the same few hundred medicines
+RESOLVE_CACHE_MAX_ENTRIES = 4096
+# Strength, dosage form, punctuation and digits don't change which ingredients a name holds:
+# "Dolo-650", "Tab. Dolo 500mg" and "dolo" share one cache entry
+NAME_NOISE = re.compile(r"[\d\W_]+")
+NAME_NOISE_WORDS = {"tab", "tabs", "tablet", "tablets", "cap", "caps", "capsule", "capsules", "syp", "syrup",
+                    "inj", "injection", "mg", "mcg", "ml", "iu"}
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before_ok = start == 0 or not text[start - 1].isalnum()
+    after_ok = end == len(text) or not text[end].isalnum()
+    return before_ok and after_ok
+
+
+class InteractionIndex:
+    """
+    Local drug-interaction check over a file-loaded database. Medication names
+    (generic, brand or combination product, as extracted from prescriptions
+    and [MED:] tags) are resolved to integer ingredient IDs; rules written
+    against ingredients or classes are expanded at load into a sparse map of
+    ID pairs. Checking k medications is k cached lookups, one AND of
+    precomputed bitmasks per medication pair, and a dict probe per ingredient
+    pair only where those overlap, so it runs inline with the response.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("DRUG_INTERACTIONS_PATH", DEFAULT_INTERACTIONS_PATH)
+        with open(self.path, "r", encoding="utf-8") as f:
+            database = json.load(f)
+
+        self.ranks: Dict[str, int] = database["severity_ranks"]
+        self.duplicate = database["duplicate"]
+
+        # Compact ID space: position in this list
+        self.ingredients: List[str] = [item["id"] for item in database["ingredients"]]
+        ids = {ingredient: index for index, ingredient in enumerate(self.ingredients)}
+        classes: Dict[str, List[int]] = {}
+        for item in database["ingredients"]:
+            for name in item["classes"]:
+                classes.setdefault(name, []).append(ids[item["id"]])
+
+        phrases, self._phrase_ids = [], []
+        for item in database["ingredients"]:
+            for name in item["names"]:
+                phrases.append(normalize_text(name))
+                self._phrase_ids.append((ids[item["id"]],))
+        for product, ingredients in database["products"].items():
+            phrases.append(normalize_text(product))
+            self._phrase_ids.append(tuple(ids[ingredient] for ingredient in ingredients))
+        self.matcher = AhoCorasick(phrases)
+
+        def members(name: str) -> List[int]:
+            if name in classes:
+                return classes[name]
+            if name in ids:
+                return [ids[name]]
+            raise ValueError(f"Unknown ingredient or class in {self.path}: {name}")
+
+        self.rules: List[Dict] = []
+        # (low ID * ingredient count + high ID) -> index into self.rules
+        self._pairs: Dict[int, int] = {}
+        for rule in database["interactions"]:
+            rule_index = len(self.rules)
+            self.rules.append({key: rule[key] for key in ("severity", "effect", "advice")})
+            for first in members(rule["a"]):
+                for second in members(rule["b"]):
+                    if first == second:
+                        continue
+                    key = self._pair_key(first, second)
+                    current = self._pairs.get(key)
+                    # Where class rules overlap (aspirin is an NSAID and an antiplatelet) the most severe wins
+                    if current is None or self.ranks[rule["severity"]] > self.ranks[self.rules[current]["severity"]]:
+                        self._pairs[key] = rule_index
+
+        # Bit i of _partners[x] is set when ingredient x interacts with ingredient i, so a
+        # pair of medications with nothing to report is ruled out with one AND
+        self._partners = [0] * len(self.ingredients)
+        for key in self._pairs:
+            low, high = divmod(key, len(self.ingredients))
+            self._partners[low] |= 1 << high
+            self._partners[high] |= 1 << low
+        self._warning_counters = {severity: INTERACTION_WARNINGS.labels(severity=severity) for severity in self.ranks}
+        # name -> (ingredient IDs, their bits, bits of everything they interact with)
+        self._resolved: Dict[str, Tuple[Tuple[int, ...], int, int]] = {}
+        logging.info(f"Interaction database loaded: {len(self.ingredients)} ingredients, "
+                     f"{len(phrases)} names, {len(self._pairs)} interacting pairs")
+
+    def _pair_key(self, first: int, second: int) -> int:
+        low, high = (first, second) if first < second else (second, first)
+        return low * len(self.ingredients) + high
+
+    def resolve(self, name: str) -> Tuple[int, ...]:
+        """Ingredient IDs in a medication name; empty when none is recognised"""
+        return self._resolve_entry(name)[0]
+
+    def _resolve_entry(self, name: str) -> Tuple[Tuple[int, ...], int, int]:
+        text = " ".join(word for word in NAME_NOISE.sub(" ", name.casefold()).split() if word not in NAME_NOISE_WORDS)
+        cached = self._resolved.get(text)
+        if cached is not None:
+            return cached
+        found = []
+        for start, end, pattern_id in self.matcher.iter_matches(text):
+            if not _is_word_boundary(text, start, end):
+                continue
+            for ingredient in self._phrase_ids[pattern_id]:
+                if ingredient not in found:
+                    found.append(ingredient)
+        bits = partners = 0
+        for ingredient in found:
+            bits |= 1 << ingredient
+            partners |= self._partners[ingredient]
+        entry = (tuple(found), bits, partners)
+        if len(self._resolved) >= RESOLVE_CACHE_MAX_ENTRIES:
+            self._resolved.clear()
+        self._resolved[text] = entry
+        return entry
+
+    def check(self, medications: List[Any]) -> List[Dict]:
+        """
+        medications: /analyze-prescription "medications", extract_medicines()
+        output, or plain names
+        Returns: [{severity, type, medications, ingredients, effect, advice}],
+        most severe first. type is "interaction", or "duplicate" when two
+        medications share an ingredient.
+        """
+        resolved, seen = [], set()
+        for medication in medications:
+            name = medication.get("name") if isinstance(medication, dict) else medication
+            if not isinstance(name, str) or name.strip().lower() in seen:
+                continue
+            entry = self._resolve_entry(name)
+            if entry[0]:
+                seen.add(name.strip().lower())
+                resolved.append((name.strip(), *entry))
+
+        warnings = []
+        for i in range(len(resolved)):
+            first_name, first_ids, first_bits, first_partners = resolved[i]
+            for j in range(i + 1, len(resolved)):
+                second_name, second_ids, second_bits, _ = resolved[j]
+                if not (first_partners | first_bits) & second_bits:
+                    continue
+                for first in first_ids:
+                    for second in second_ids:
+                        if first == second:
+                            ingredient = self.ingredients[first].replace("_", " ")
+                            warnings.append({
+                                "severity": self.duplicate["severity"],
+                                "type": "duplicate",
+                                "medications": [first_name, second_name],
+                                "ingredients": [self.ingredients[first]],
+                                "effect": self.duplicate["effect"].format(ingredient=ingredient),
+                                "advice": self.duplicate["advice"]
+                            })
+                            continue
+                        rule_index = self._pairs.get(self._pair_key(first, second))
+                        if rule_index is None:
+                            continue
+                        rule = self.rules[rule_index]
+                        warnings.append({
+                            "severity": rule["severity"],
+                            "type": "interaction",
+                            "medications": [first_name, second_name],
+                            "ingredients": [self.ingredients[first], self.ingredients[second]],
+                            "effect": rule["effect"],
+                            "advice": rule["advice"]
+                        })
+
+        warnings.sort(key=lambda warning: -self.ranks.get(warning["severity"], 0))
+        for warning in warnings:
+            self._warning_counters[warning["severity"]].inc()
+        return warnings
+
+
+_interaction_index = None
+_interaction_index_lock = threading.Lock()
+
+
+def get_interaction_index() -> InteractionIndex:
+    """Loaded once per process and shared"""
+    global _interaction_index
+    if _interaction_index is None:
+        with _interaction_index_lock:
+            if _interaction_index is None:
+                _interaction_index = InteractionIndex()
+    return _interaction_index
@@ -0,0 +1,405 @@
+import os
+import time
+import random
+import hashlib
+import datetime
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core import exceptions as google_exceptions
+from dotenv import load_dotenv
+from app.services.metrics import get_dependency_health
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: throttling, overload and transient network trouble
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError
+)
+# Signals that we are pushing too hard and should back off concurrency
+OVERLOAD_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.DeadlineExceeded,
+    TimeoutError
+)
+# Rough size of a Gemini token in English text, enough to tell a prompt is below the caching minimum
+CHARS_PER_TOKEN = 4
+
+
+def _feed_digest(digest, value: Any):
+    """Hash a prompt structure part by part; every value is tagged and length-prefixed"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        digest.update(b"b%d:" % len(value))
+        digest.update(value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8", "surrogatepass")
+        digest.update(b"s%d:" % len(data))
+        digest.update(data)
+    elif value is None or isinstance(value, (bool, int, float)):
+        digest.update(f"v{value!r};".encode("ascii"))
+    elif isinstance(value, dict):
+        digest.update(b"d%d:" % len(value))
+        for key in sorted(value, key=str):
+            _feed_digest(digest, str(key))
+            _feed_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"l%d:" % len(value))
+        for item in value:
+            _feed_digest(digest, item)
+    elif hasattr(value, "SerializeToString"):
+        # protobuf messages
+        _feed_digest(digest, value.SerializeToString(deterministic=True))
+    elif hasattr(type(value), "serialize") and hasattr(type(value), "pb"):
+        # proto-plus messages (genai Content, Part, ...)
+        _feed_digest(digest, type(value).serialize(value))
+    elif hasattr(value, "tobytes") and hasattr(value, "mode"):
+        # PIL images: the pixels, not the repr, which only carries the size
+        _feed_digest(digest, [type(value).__name__, value.mode, list(value.size)])
+        _feed_digest(digest, value.tobytes())
+    elif hasattr(value, "__dict__"):
+        _feed_digest(digest, [type(value).__name__, vars(value)])
+    else:
+        _feed_digest(digest, repr(value))
+
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling Gemini when the gateway sheds the request"""
+
+
+class TokenBucket:
+    """Requests-per-second limiter with a burst allowance"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: grows by ~1 per window of successes,
+    halves on throttling or timeouts.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, backoff: float = 0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, overloaded: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one probe through after the cool-off"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, success: bool):
+        with self._lock:
+            self._probing = False
+            if success:
+                self.failures = 0
+                self.state = "closed"
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"LLM circuit opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class SystemPromptCache:
+    """
+    Server-side context caches for long-lived system instructions, one per
+    (model, prompt) and shared by every session. Prompts shorter than the
+    API's caching minimum are never sent; models the API won't cache fall
+    back to a plain system_instruction until the negative entry expires.
+    Only one thread creates a given cache, outside the lock; the others keep
+    using the old cache or the plain system_instruction meanwhile.
+    """
+
+    def __init__(self, ttl: float, retry_after: float, min_tokens: int):
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.min_tokens = min_tokens
+        self._entries: Dict[str, Dict] = {}
+        self._creating = set()
+        self._lock = threading.Lock()
+
+    def model(self, model_name: str, system_instruction: str, **model_kwargs) -> Optional[genai.GenerativeModel]:
+        if len(system_instruction) / CHARS_PER_TOKEN < self.min_tokens:
+            return None
+        key = hashlib.sha256(f"{model_name}\0{system_instruction}".encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            # Recreate a minute early so no request races the expiry
+            if entry and entry["expires_at"] - (60 if entry["model"] else 0) > now:
+                return entry["model"]
+            if key in self._creating:
+                return entry["model"] if entry and entry["expires_at"] > now else None
+            self._creating.add(key)
+
+        model = None
+        try:
+            cached = caching.CachedContent.create(
+                model=f"models/{model_name}",
+                display_name=f"nexus-{key[:12]}",
+                system_instruction=system_instruction,
+                ttl=datetime.timedelta(seconds=self.ttl)
+            )
+            model = genai.GenerativeModel.from_cached_content(cached, **model_kwargs)
+            logger.info(f"Context cache created for {model_name} system prompt")
+        except Exception as e:
+            logger.info(f"Context caching unavailable for {model_name}, using system_instruction: {str(e)}")
+        finally:
+            with self._lock:
+                self._entries[key] = {"model": model, "expires_at": time.time() + (self.ttl if model else self.retry_after)}
+                self._creating.discard(key)
+        return model
+
+
+class LLMGateway:
+    """
+    Shared path for every Gemini call made with one API key:
+    circuit breaker -> single-flight -> token bucket -> AIMD limit -> jittered retries.
+    """
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.queue_timeout = float(os.getenv("LLM_QUEUE_TIMEOUT", "20"))
+        self.request_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.retry_base = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+        self.retry_cap = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+
+        self.bucket = TokenBucket(
+            rate=float(os.getenv("LLM_RATE_PER_SECOND", "4")),
+            burst=int(os.getenv("LLM_BURST", "8"))
+        )
+        self.limiter = AdaptiveLimiter(
+            initial=int(os.getenv("LLM_INITIAL_CONCURRENCY", "4")),
+            minimum=int(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+            maximum=int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        )
+
+        self.prompt_cache = SystemPromptCache(
+            ttl=float(os.getenv("LLM_CONTEXT_CACHE_TTL", "3600")),
+            retry_after=float(os.getenv("LLM_CONTEXT_CACHE_RETRY_SECONDS", "900")),
+            min_tokens=int(os.getenv("LLM_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+        )
+        self.context_caching = os.getenv("LLM_CONTEXT_CACHE", "true").lower() == "true"
+
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "shed": 0}
+
+        # GEMINI_API_ENDPOINT points the client at a proxy or local stand-in (REST transport only)
+        endpoint = os.getenv("GEMINI_API_ENDPOINT")
+        if endpoint:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        get_dependency_health().add_probe(
+            "gemini", lambda: "circuit breaker open" if self.breaker.state == "open" else None
+        )
+
+    def model(self, model_name: str, **model_kwargs) -> "GatewayModel":
+        return GatewayModel(self, model_name, **model_kwargs)
+
+    @staticmethod
+    def _flight_key(model_name: str, contents: Any, kwargs: Dict, model_config: Optional[Dict] = None) -> str:
+        """
+        Digest of everything that shapes the response. Parts are fed to the
+        hash as they are walked, so image bytes are hashed in place rather
+        than copied into one big repr string first.
+        """
+        digest = hashlib.sha256()
+        _feed_digest(digest, model_name)
+        _feed_digest(digest, model_config or {})
+        _feed_digest(digest, contents)
+        _feed_digest(digest, kwargs)
+        return digest.hexdigest()
+
+    def call(self, model_name: str, invoke: Callable[..., Any], contents: Any, kwargs: Dict,
+             model_config: Optional[Dict] = None) -> Any:
+        """
+        Run invoke(contents, **kwargs) under the gateway's policies.
+        model_config (system_instruction, generation_config, ...) only keys single-flight.
+        """
+        if not self.breaker.allow():
+            self.stats["shed"] += 1
+            raise LLMUnavailable("Gemini circuit breaker is open")
+
+        # Identical prompts already in flight share one upstream call
+        key = self._flight_key(model_name, contents, kwargs, model_config)
+        with self._in_flight_lock:
+            leader = self._in_flight.get(key)
+            if leader is None:
+                flight = Future()
+                self._in_flight[key] = flight
+        if leader is not None:
+            self.stats["coalesced"] += 1
+            return leader.result()
+
+        try:
+            result = self._call_with_retries(model_name, invoke, contents, kwargs)
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+
+    def _call_with_retries(self, model_name: str, invoke: Callable[..., Any], contents: Any, kwargs: Dict) -> Any:
+        kwargs = {**kwargs}
+        kwargs.setdefault("request_options", {"timeout": self.request_timeout})
+
+        for attempt in range(self.max_retries + 1):
+            if not self.bucket.acquire(self.queue_timeout):
+                self.stats["shed"] += 1
+                raise LLMUnavailable("Gemini rate limit queue timed out")
+            if not self.limiter.acquire(self.queue_timeout):
+                self.stats["shed"] += 1
+                raise LLMUnavailable("Gemini concurrency queue timed out")
+
+            overloaded = False
+            try:
+                self.stats["calls"] += 1
+                result = invoke(contents, **kwargs)
+                self.breaker.record(True)
+                return result
+            except RETRYABLE_ERRORS as e:
+                overloaded = isinstance(e, OVERLOAD_ERRORS)
+                self.breaker.record(False)
+                self.stats["failures"] += 1
+                if attempt == self.max_retries or not self.breaker.allow():
+                    raise
+                # Full jitter: spread retries out so callers don't stampede together
+                delay = random.uniform(0, min(self.retry_cap, self.retry_base * 2 ** attempt))
+                logger.warning(f"Gemini {model_name} call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+                self.stats["retries"] += 1
+            except Exception:
+                # Bad request, safety block, auth: retrying won't help
+                self.breaker.record(True)
+                raise
+            finally:
+                self.limiter.release(overloaded)
+            time.sleep(delay)
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats,
+            "breaker": self.breaker.state,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight
+        }
+
+
+class GatewayModel:
+    """
+    Drop-in for genai.GenerativeModel whose generate_content goes through the gateway.
+    A system_instruction is served from a shared context cache when the API allows it.
+    """
+
+    def __init__(self, gateway: LLMGateway, model_name: str, **model_kwargs):
+        self.gateway = gateway
+        self.model_name = model_name
+        self.model_kwargs = model_kwargs
+        self.model = genai.GenerativeModel(model_name, **model_kwargs)
+
+    def _resolve(self) -> genai.GenerativeModel:
+        system_instruction = self.model_kwargs.get("system_instruction")
+        if not (system_instruction and self.gateway.context_caching):
+            return self.model
+        extra = {k: v for k, v in self.model_kwargs.items() if k in ("generation_config", "safety_settings")}
+        return self.gateway.prompt_cache.model(self.model_name, system_instruction, **extra) or self.model
+
+    def generate_content(self, contents: Any, **kwargs) -> Any:
+        return self.gateway.call(self.model_name, self._resolve().generate_content, contents, kwargs,
+                                 model_config=self.model_kwargs)
+
+
+_gateways: Dict[str, LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_llm_gateway(api_key: Optional[str] = None) -> LLMGateway:
+    """One gateway (limits, breaker, in-flight table) per API key"""
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
+    if api_key not in _gateways:
+        with _gateways_lock:
+            if api_key not in _gateways:
+                _gateways[api_key] = LLMGateway(api_key)
+    return _gateways[api_key]
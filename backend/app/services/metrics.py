@@ -0,0 +1,130 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+from prometheus_client import Gauge, Histogram
+
+HTTP_REQUEST_DURATION = Histogram(
+    "nexus_http_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "nexus_http_requests_in_flight",
+    "API requests currently being served",
+    ["method", "route"]
+)
+UPSTREAM_DURATION = Histogram(
+    "nexus_upstream_request_duration_seconds",
+    "Latency of calls to external dependencies",
+    ["dependency", "operation", "outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+DEPENDENCY_HEALTHY = Gauge(
+    "nexus_dependency_healthy",
+    "1 when the dependency's recent calls are mostly succeeding",
+    ["dependency"]
+)
+
+# Outcomes that mean the dependency itself is working
+OK_OUTCOMES = {"success", "not_found", "no_speech"}
+
+
+class DependencyHealth:
+    """Rolling success/failure window per dependency, plus optional state probes"""
+
+    def __init__(self):
+        self.window_seconds = float(os.getenv("HEALTH_WINDOW_SECONDS", "300"))
+        self.max_error_rate = float(os.getenv("HEALTH_MAX_ERROR_RATE", "0.5"))
+        self.min_samples = int(os.getenv("HEALTH_MIN_SAMPLES", "3"))
+        self._calls: Dict[str, deque] = {}
+        self._last_error: Dict[str, Dict] = {}
+        self._probes: Dict[str, Callable[[], Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, dependency: str, outcome: str, error: str = None):
+        now = time.time()
+        with self._lock:
+            calls = self._calls.setdefault(dependency, deque(maxlen=200))
+            calls.append((now, outcome in OK_OUTCOMES))
+            if outcome not in OK_OUTCOMES:
+                self._last_error[dependency] = {"outcome": outcome, "error": error, "at": now}
+
+    def add_probe(self, dependency: str, probe: Callable[[], Optional[str]]):
+        """probe() returns a reason string when the dependency is known to be degraded"""
+        with self._lock:
+            self._probes[dependency] = probe
+
+    def status(self) -> Dict[str, Dict]:
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            windows = {name: [ok for at, ok in calls if at >= cutoff] for name, calls in self._calls.items()}
+            probes = dict(self._probes)
+            last_errors = dict(self._last_error)
+
+        report = {}
+        for name in sorted(set(windows) | set(probes)):
+            recent = windows.get(name, [])
+            error_rate = (recent.count(False) / len(recent)) if recent else 0.0
+            reason = None
+            if len(recent) >= self.min_samples and error_rate > self.max_error_rate:
+                reason = f"{error_rate:.0%} of recent calls failed"
+            if name in probes:
+                try:
+                    reason = probes[name]() or reason
+                except Exception as e:
+                    logging.error(f"Health probe {name} error: {str(e)}")
+            report[name] = {
+                "status": "degraded" if reason else ("ok" if recent or name in probes else "unknown"),
+                "reason": reason,
+                "recent_calls": len(recent),
+                "error_rate": round(error_rate, 3),
+                "last_error": last_errors.get(name)
+            }
+            DEPENDENCY_HEALTHY.labels(dependency=name).set(0 if reason else 1)
+        return report
+
+
+_dependency_health = DependencyHealth()
+
+
+def get_dependency_health() -> DependencyHealth:
+    return _dependency_health
+
+
+class UpstreamCall:
+    """Handle yielded by track_upstream; set .outcome to label a non-exception result"""
+
+    def __init__(self):
+        self.outcome = "success"
+
+
+@contextmanager
+def track_upstream(dependency: str, operation: str):
+    """
+    Times one call to an external dependency:
+        with track_upstream("nominatim", "search") as call:
+            response = requests.get(...)
+            if not response.ok:
+                call.outcome = f"http_{response.status_code}"
+    Exceptions are labelled "timeout" or "error" and re-raised.
+    """
+    call = UpstreamCall()
+    error = None
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        if call.outcome == "success":
+            call.outcome = "timeout" if "timeout" in type(e).__name__.lower() else "error"
+        error = str(e)[:200]
+        raise
+    finally:
+        UPSTREAM_DURATION.labels(dependency=dependency, operation=operation, outcome=call.outcome).observe(
+            time.perf_counter() - started
+        )
+        _dependency_health.record(dependency, call.outcome, error)
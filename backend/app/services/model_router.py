@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+from app.services.llm_gateway import LLMGateway, LLMUnavailable, get_llm_gateway
+from app.services.metrics import track_upstream
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "llm_models.json")
+
+
+class ModelMetrics:
+    """Rolling latency/error window for one model"""
+
+    def __init__(self, window_seconds: float, max_samples: int = 500):
+        self.window_seconds = window_seconds
+        self.samples = deque(maxlen=max_samples)  # (at, latency_ms, ok)
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float, ok: bool):
+        with self._lock:
+            self.samples.append((time.time(), latency_ms, ok))
+
+    def summary(self) -> Dict:
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            recent = [s for s in self.samples if s[0] >= cutoff]
+        if not recent:
+            return {"requests": 0, "p50_ms": None, "p95_ms": None, "error_rate": 0.0}
+        latencies = sorted(s[1] for s in recent if s[2])
+        errors = sum(1 for s in recent if not s[2])
+        return {
+            "requests": len(recent),
+            "p50_ms": round(latencies[len(latencies) // 2], 1) if latencies else None,
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1) if latencies else None,
+            "error_rate": round(errors / len(recent), 3)
+        }
+
+
+class ModelRouter:
+    """
+    Picks a Gemini model per call: the endpoint and request size decide the
+    tier, and within a tier the first model whose rolling p95 and error rate
+    are within budget wins. Per-endpoint overrides bypass routing.
+    """
+
+    def __init__(self, registry_path: str = None):
+        self.registry_path = registry_path or os.getenv("LLM_MODEL_REGISTRY_PATH", DEFAULT_REGISTRY_PATH)
+        with open(self.registry_path, "r", encoding="utf-8") as f:
+            registry = json.load(f)
+
+        self.models: Dict[str, Dict] = registry["models"]
+        self.tiers: Dict[str, List[str]] = registry["tiers"]
+        self.endpoints: Dict[str, Dict] = registry["endpoints"]
+        self.auto = registry["auto"]
+        self.max_error_rate = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.2"))
+        self.min_samples = int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "5"))
+        window = float(os.getenv("LLM_ROUTER_WINDOW_SECONDS", "300"))
+
+        self.metrics: Dict[str, ModelMetrics] = {name: ModelMetrics(window) for name in self.models}
+        self.decisions: Dict[str, Dict[str, int]] = {}
+        self.overrides: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        # LLM_MODEL_OVERRIDES="chat=gemini-2.0-flash,symptoms=gemini-2.5-pro"
+        for pair in filter(None, os.getenv("LLM_MODEL_OVERRIDES", "").split(",")):
+            endpoint, _, model_name = pair.partition("=")
+            self.set_override(endpoint.strip(), model_name.strip())
+
+    @staticmethod
+    def _last_user_text(contents: Any) -> str:
+        if isinstance(contents, str):
+            return contents
+        if isinstance(contents, list):
+            for item in reversed(contents):
+                if isinstance(item, str):
+                    return item
+                if isinstance(item, dict) and item.get("role", "user") == "user":
+                    return " ".join(p for p in item.get("parts", []) if isinstance(p, str))
+        return ""
+
+    def tier_for(self, endpoint: str, contents: Any) -> str:
+        tier = self.endpoints.get(endpoint, {}).get("tier", "standard")
+        if tier != "auto":
+            return tier
+        words = len(self._last_user_text(contents).split())
+        turns = len(contents) if isinstance(contents, list) else 1
+        if words >= self.auto["complex_min_words"] or turns >= self.auto["complex_min_turns"]:
+            return "strong"
+        if words <= self.auto["simple_max_words"]:
+            return "fast"
+        return "standard"
+
+    def _healthy(self, model_name: str) -> bool:
+        summary = self.metrics[model_name].summary()
+        if summary["requests"] < self.min_samples:
+            return True
+        if summary["error_rate"] > self.max_error_rate:
+            return False
+        budget = self.models[model_name].get("latency_budget_ms")
+        return not (budget and summary["p95_ms"] and summary["p95_ms"] > budget)
+
+    def choose(self, endpoint: str, contents: Any = None) -> str:
+        override = self.overrides.get(endpoint)
+        if override:
+            model_name = override
+        else:
+            candidates = self.tiers[self.tier_for(endpoint, contents)]
+            model_name = next((m for m in candidates if self._healthy(m)), None)
+            if model_name is None:
+                # Everything is degraded: take the least bad
+                def badness(name):
+                    summary = self.metrics[name].summary()
+                    latency = summary["p95_ms"] or self.models[name].get("latency_budget_ms", 1)
+                    return latency * (1 + 4 * summary["error_rate"])
+                model_name = min(candidates, key=badness)
+        with self._lock:
+            counts = self.decisions.setdefault(endpoint, {})
+            counts[model_name] = counts.get(model_name, 0) + 1
+        return model_name
+
+    def record(self, model_name: str, latency_ms: float, ok: bool):
+        self.metrics[model_name].record(latency_ms, ok)
+
+    def set_override(self, endpoint: str, model_name: Optional[str]):
+        if model_name and model_name not in self.models:
+            raise ValueError(f"Unknown model: {model_name}")
+        with self._lock:
+            if model_name:
+                self.overrides[endpoint] = model_name
+            else:
+                self.overrides.pop(endpoint, None)
+        logger.info(f"Model override for {endpoint}: {model_name or 'cleared'}")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            decisions = {endpoint: dict(counts) for endpoint, counts in self.decisions.items()}
+            overrides = dict(self.overrides)
+        return {
+            "models": {
+                name: {**self.models[name], **metrics.summary(), "healthy": self._healthy(name)}
+                for name, metrics in self.metrics.items()
+            },
+            "endpoints": {name: {**config, "override": overrides.get(name)} for name, config in self.endpoints.items()},
+            "decisions": decisions
+        }
+
+
+class RoutedModel:
+    """generate_content that asks the router which model to use on every call"""
+
+    def __init__(self, endpoint: str, gateway: LLMGateway = None, router: "ModelRouter" = None, **model_kwargs):
+        self.endpoint = endpoint
+        self.gateway = gateway or get_llm_gateway()
+        self.router = router or get_model_router()
+        self.model_kwargs = model_kwargs
+        self._models = {}
+
+    def _model(self, model_name: str):
+        if model_name not in self._models:
+            self._models[model_name] = self.gateway.model(model_name, **self.model_kwargs)
+        return self._models[model_name]
+
+    def generate_content(self, contents: Any, **kwargs) -> Any:
+        model_name = self.router.choose(self.endpoint, contents)
+        operation = "analyze_image" if self.endpoint == "image" else "generate"
+        started = time.perf_counter()
+        with track_upstream("gemini", operation) as call:
+            try:
+                response = self._model(model_name).generate_content(contents, **kwargs)
+                self.router.record(model_name, (time.perf_counter() - started) * 1000, True)
+                return response
+            except LLMUnavailable:
+                # Shed by the gateway before reaching this model; says nothing about it
+                call.outcome = "shed"
+                raise
+            except Exception:
+                self.router.record(model_name, (time.perf_counter() - started) * 1000, False)
+                raise
+
+
+_model_router = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Registry, metrics and overrides shared by every Gemini caller"""
+    global _model_router
+    if _model_router is None:
+        with _model_router_lock:
+            if _model_router is None:
+                _model_router = ModelRouter()
+    return _model_router
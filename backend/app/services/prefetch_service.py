@@ -0,0 +1,147 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Prefetch:
+    """Speculative work started for a session, waiting to be claimed"""
+
+    def __init__(self, session_id: str, kind: str, key: Any, handle: Any,
+                 cancel: Callable[[Any], Any], ttl: float):
+        self.session_id = session_id
+        self.kind = kind
+        self.key = key
+        self.handle = handle
+        self.cancel = cancel
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl
+        self.timer: Optional[threading.Timer] = None
+
+
+class PrefetchStore:
+    """
+    Short-lived per-session slots for action results started speculatively
+    while the chat reply is being rendered (hospital search, shopping runs).
+    A slot is claimed by the follow-up request; unclaimed work is cancelled
+    when it expires or when a newer prefetch of the same kind replaces it.
+    """
+
+    def __init__(self):
+        self.ttl = float(os.getenv("PREFETCH_TTL", "90"))
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("PREFETCH_WORKERS", "4")),
+            thread_name_prefix="prefetch"
+        )
+        self._lock = threading.Lock()
+        self._slots: Dict[Tuple[str, str], Prefetch] = {}
+        self._locations: Dict[str, Dict] = {}
+        self.stats = {"started": 0, "claimed": 0, "cancelled": 0}
+
+    def remember_location(self, session_id: str, latitude: float, longitude: float):
+        with self._lock:
+            self._locations[session_id] = {"latitude": latitude, "longitude": longitude, "at": time.time()}
+
+    def last_location(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            location = self._locations.get(session_id)
+        if location and time.time() - location["at"] <= float(os.getenv("PREFETCH_LOCATION_MAX_AGE", "1800")):
+            return location
+        return None
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Run a plain callable on the prefetch pool (cancel with Future.cancel)"""
+        return self.executor.submit(fn, *args)
+
+    def start(self, session_id: str, kind: str, key: Any, launch: Callable[[], Any],
+              cancel: Callable[[Any], Any], ttl: float = None) -> Optional[Prefetch]:
+        """
+        Launch speculative work unless an identical prefetch is already parked.
+        launch() returns a handle (Future, ShoppingJob, ...); cancel(handle) stops it.
+        ttl overrides PREFETCH_TTL for work that is expensive to leave running.
+        """
+        ttl = ttl or self.ttl
+        with self._lock:
+            current = self._slots.get((session_id, kind))
+            if current and current.key == key:
+                return current
+        if current:
+            self._discard(current, reason="superseded")
+
+        try:
+            handle = launch()
+        except Exception as e:
+            logging.warning(f"Prefetch {kind} not started for {session_id}: {str(e)}")
+            return None
+
+        prefetch = Prefetch(session_id, kind, key, handle, cancel, ttl)
+        prefetch.timer = threading.Timer(ttl, self._discard, args=(prefetch, "expired"))
+        prefetch.timer.daemon = True
+        with self._lock:
+            self._slots[(session_id, kind)] = prefetch
+            self.stats["started"] += 1
+        prefetch.timer.start()
+        logging.info(f"Prefetch started: {kind} {key} for session {session_id}")
+        return prefetch
+
+    def claim(self, session_id: str, kind: str, matches: Callable[[Any], bool]) -> Optional[Any]:
+        """Hand the parked work to the follow-up request (whether finished or still running)"""
+        if not session_id:
+            return None
+        with self._lock:
+            prefetch = self._slots.get((session_id, kind))
+            if not prefetch or not matches(prefetch.key):
+                return None
+            del self._slots[(session_id, kind)]
+            self.stats["claimed"] += 1
+        prefetch.timer.cancel()
+        logging.info(f"Prefetch claimed: {kind} {prefetch.key} for session {session_id}")
+        return prefetch.handle
+
+    def release(self, session_id: str, kind: str) -> bool:
+        """Cancel parked work the user turned down"""
+        if not session_id:
+            return False
+        with self._lock:
+            prefetch = self._slots.get((session_id, kind))
+        if not prefetch:
+            return False
+        self._discard(prefetch, reason="declined")
+        return True
+
+    def _discard(self, prefetch: Prefetch, reason: str):
+        with self._lock:
+            if self._slots.get((prefetch.session_id, prefetch.kind)) is not prefetch:
+                return
+            del self._slots[(prefetch.session_id, prefetch.kind)]
+            self.stats["cancelled"] += 1
+        if prefetch.timer:
+            prefetch.timer.cancel()
+        try:
+            prefetch.cancel(prefetch.handle)
+        except Exception as e:
+            logging.error(f"Prefetch cancel error: {str(e)}")
+        logging.info(f"Prefetch {reason}: {prefetch.kind} {prefetch.key} for session {prefetch.session_id}")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "parked": len(self._slots)}
+
+
+_prefetch_store = None
+_prefetch_store_lock = threading.Lock()
+
+
+def get_prefetch_store() -> PrefetchStore:
+    """Store shared by the chat pipeline and the follow-up endpoints"""
+    global _prefetch_store
+    if _prefetch_store is None:
+        with _prefetch_store_lock:
+            if _prefetch_store is None:
+                _prefetch_store = PrefetchStore()
+    return _prefetch_store
@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pack/form words that don't change which product a user means
+FILLER_WORDS = {"tablet", "tablets", "tab", "tabs", "capsule", "capsules", "cap", "caps",
+                "strip", "strips", "of", "pack", "the"}
+
+
+def normalize_medicine_name(name: str) -> str:
+    """
+    Canonical cache key: "Dolo-650 MG Tablets" -> "dolo 650mg"
+    Dosage is kept because different strengths are different products
+    """
+    text = name.lower()
+    text = re.sub(r"(\d+(?:\.\d+)?)\s*(mg|mcg|g|ml|iu)\b", r"\1\2", text)
+    words = re.findall(r"[a-z0-9.]+", text)
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+class ProductCache:
+    """
+    Local TTL cache of product snapshots (name, url, price, availability)
+    discovered by shopping-agent runs and HTTP lookups.
+    Popular entries are refreshed in the background before they expire.
+    """
+
+    def __init__(self, path: str = None, fetcher: Callable[[str], Optional[Dict]] = None):
+        """fetcher returns a product dict, None when not listed, and raises on errors"""
+        self.path = path or os.getenv(
+            "PRODUCT_CACHE_PATH",
+            os.path.join(os.getenv("NEXUS_DATA_DIR", "data"), "product_cache.json")
+        )
+        self.ttl = float(os.getenv("PRODUCT_CACHE_TTL", "21600"))
+        self.negative_ttl = float(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", "1800"))
+        self.max_entries = int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "5000"))
+        self.refresh_interval = float(os.getenv("PRODUCT_CACHE_REFRESH_INTERVAL", "300"))
+        self.popular_hits = int(os.getenv("PRODUCT_CACHE_POPULAR_HITS", "3"))
+        self.fetcher = fetcher
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+        self._refresher = None
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.error(f"Failed to load product cache: {str(e)}")
+            return {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Failed to save product cache: {str(e)}")
+
+    def get(self, medicine_name: str, allow_stale: bool = False) -> Optional[Dict]:
+        """Cached snapshot, or None if missing/expired (stale ones only with allow_stale)"""
+        key = normalize_medicine_name(medicine_name)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["last_hit"] = now
+            stale = entry["expires_at"] <= now
+            if stale and not allow_stale:
+                return None
+            return {**entry, "stale": stale}
+
+    def knows(self, medicine_name: str) -> bool:
+        """An available product has been seen for this name, fresh or stale; doesn't count as a hit"""
+        with self._lock:
+            entry = self._entries.get(normalize_medicine_name(medicine_name))
+            return bool(entry and entry["available"])
+
+    def put(self, medicine_name: str, product: Optional[Dict], source: str = "lookup") -> Dict:
+        """Store a product snapshot; product=None records the medicine as unavailable"""
+        key = normalize_medicine_name(medicine_name)
+        now = time.time()
+        with self._lock:
+            previous = self._entries.get(key, {})
+            entry = {
+                "query": medicine_name,
+                "available": bool(product),
+                "product_name": (product or {}).get("name") or (product or {}).get("product_name"),
+                "url": (product or {}).get("url"),
+                "price": (product or {}).get("price", "N/A"),
+                "source": source,
+                "fetched_at": now,
+                "expires_at": now + (self.ttl if product else self.negative_ttl),
+                "hits": previous.get("hits", 0),
+                "last_hit": previous.get("last_hit")
+            }
+            self._entries[key] = entry
+            self._evict()
+            self._save()
+            return dict(entry)
+
+    def _evict(self):
+        if len(self._entries) <= self.max_entries:
+            return
+        # Drop the least recently used entries
+        ordered = sorted(self._entries.items(), key=lambda kv: kv[1].get("last_hit") or kv[1]["fetched_at"])
+        for key, _ in ordered[:len(self._entries) - self.max_entries]:
+            del self._entries[key]
+
+    def lookup(self, medicine_name: str) -> Optional[Dict]:
+        """
+        Cached snapshot, fetching over HTTP on a miss (never launches a browser).
+        If the fetch fails, a stale snapshot is better than nothing.
+        """
+        cached = self.get(medicine_name)
+        if cached or not self.fetcher:
+            return cached
+        try:
+            return {**self.put(medicine_name, self.fetcher(medicine_name)), "stale": False}
+        except Exception as e:
+            logging.warning(f"Product lookup failed for {medicine_name}: {str(e)}")
+            return self.get(medicine_name, allow_stale=True)
+
+    def _due_for_refresh(self) -> List[str]:
+        horizon = time.time() + self.refresh_interval
+        with self._lock:
+            return [
+                entry["query"] for entry in self._entries.values()
+                if entry.get("hits", 0) >= self.popular_hits and entry["expires_at"] <= horizon
+            ]
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            for medicine_name in self._due_for_refresh():
+                try:
+                    self.put(medicine_name, self.fetcher(medicine_name), source="refresh")
+                except Exception as e:
+                    logging.error(f"Product cache refresh error for {medicine_name}: {str(e)}")
+
+    def start_refresher(self):
+        if self.fetcher and self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name="product-cache-refresh", daemon=True)
+            self._refresher.start()
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "fresh": sum(1 for e in self._entries.values() if e["expires_at"] > now),
+                "popular": sum(1 for e in self._entries.values() if e.get("hits", 0) >= self.popular_hits)
+            }
+
+
+_product_cache = None
+_product_cache_lock = threading.Lock()
+
+
+def get_product_cache() -> ProductCache:
+    """Cache shared by the shopping agent, price queries and chat enrichment"""
+    global _product_cache
+    if _product_cache is None:
+        with _product_cache_lock:
+            if _product_cache is None:
+                from app.agents.product_lookup import get_product_lookup
+                _product_cache = ProductCache(fetcher=get_product_lookup().first_product)
+                _product_cache.start_refresher()
+    return _product_cache
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set
+from dotenv import load_dotenv
+
+load_dotenv()
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Leaf frames that mean a thread is parked, not working
+IDLE_LEAVES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"), ("selectors.py", "select"), ("thread.py", "_worker"),
+    ("base_events.py", "_run_once"), ("_base.py", "result"), ("_base.py", "wait")
+}
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(APP_ROOT):
+        filename = os.path.relpath(filename, APP_ROOT)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of busy threads at a fixed interval from a
+    daemon thread. Output is folded ("collapsed") stacks, the input format
+    of flamegraph.pl, speedscope and most flame-graph viewers.
+    Threads in target_threads are always sampled; other threads only when
+    they are doing work, so thread-pool offloads show up too.
+    """
+
+    def __init__(self, target_threads: Set[int], interval: float):
+        self.target_threads = target_threads
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            self.samples += 1
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in IDLE_LEAVES:
+                    continue
+                if thread_id not in self.target_threads and leaf[1] in ("run", "_bootstrap_inner"):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(f"thread:{names.get(thread_id, thread_id)}")
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Profiles on local disk, one folded-stack file plus metadata per request id"""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or os.getenv(
+            "PROFILING_DIR",
+            os.path.join(os.getenv("NEXUS_DATA_DIR", "data"), "profiles")
+        )
+        self.max_profiles = int(os.getenv("PROFILING_MAX_PROFILES", "200"))
+        self._lock = threading.Lock()
+
+    def _path(self, request_id: str, suffix: str) -> str:
+        safe_id = "".join(c for c in request_id if c.isalnum() or c in "-_")[:64]
+        return os.path.join(self.directory, f"{safe_id}{suffix}")
+
+    def save(self, request_id: str, folded: str, metadata: Dict):
+        try:
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self._path(request_id, ".folded"), "w", encoding="utf-8") as f:
+                    f.write(folded)
+                with open(self._path(request_id, ".json"), "w", encoding="utf-8") as f:
+                    json.dump(metadata, f)
+                self._prune()
+        except Exception as e:
+            logging.error(f"Failed to save profile {request_id}: {str(e)}")
+
+    def _prune(self):
+        metadata_files = sorted(
+            (os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")),
+            key=os.path.getmtime
+        )
+        for path in metadata_files[:max(0, len(metadata_files) - self.max_profiles)]:
+            for suffix in (".json", ".folded"):
+                try:
+                    os.remove(path[:-len(".json")] + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def get(self, request_id: str) -> Optional[str]:
+        try:
+            with open(self._path(request_id, ".folded"), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                        profiles.append(json.load(f))
+                except Exception:
+                    continue
+        return sorted(profiles, key=lambda p: p.get("started_at", 0), reverse=True)[:limit]
+
+
+_profile_store = None
+_profile_store_lock = threading.Lock()
+
+
+def get_profile_store() -> ProfileStore:
+    global _profile_store
+    if _profile_store is None:
+        with _profile_store_lock:
+            if _profile_store is None:
+                _profile_store = ProfileStore()
+    return _profile_store
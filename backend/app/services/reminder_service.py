@@ -0,0 +1,422 @@
+import os
+import re
+import time
+import uuid
+import heapq
+import sqlite3
+import logging
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from twilio.rest import Client
+from dotenv import load_dotenv
+from app.services.metrics import track_upstream
+
+load_dotenv()
+
+DAY = 86400
+
+# Times of day for "N times daily"
+TIMES_PER_DAY = {
+    1: ["09:00"],
+    2: ["09:00", "21:00"],
+    3: ["08:00", "14:00", "20:00"],
+    4: ["08:00", "12:00", "16:00", "20:00"],
+}
+# Morning/noon/night (and evening) slots of 1-0-1 / 1-1-1-1 notation
+SLOT_TIMES = {3: ["08:00", "14:00", "21:00"], 4: ["08:00", "13:00", "18:00", "22:00"]}
+FREQUENCY_WORDS = [
+    (r"\b(four times|4 times|qid|qds)\b", 4),
+    (r"\b(thrice|three times|3 times|tid|tds)\b", 3),
+    (r"\b(twice|two times|2 times|bid|bd)\b", 2),
+    (r"\b(once|one time|1 time|daily|every day|everyday|od|qd)\b", 1),
+]
+AS_NEEDED = re.compile(r"\b(as needed|when needed|if needed|sos|prn|as required)\b")
+ONGOING = re.compile(r"\b(ongoing|continue|long[- ]term|lifelong|until further)\b")
+
+
+def parse_frequency(text: str) -> Optional[Dict]:
+    """
+    "twice daily" -> {"times": ["09:00", "21:00"], "interval": 86400}
+    "every 6 hours" -> {"times": None, "interval": 21600}
+    "1-0-1" -> {"times": ["08:00", "21:00"], "interval": 86400}
+    Returns None for as-needed or unreadable frequencies.
+    """
+    text = (text or "").lower()
+    if not text or "not specified" in text or AS_NEEDED.search(text):
+        return None
+
+    match = re.search(r"\b([01](?:\s*-\s*[01]){2,3})\b", text)
+    if match:
+        flags = [part.strip() == "1" for part in match.group(1).split("-")]
+        times = [t for t, on in zip(SLOT_TIMES[len(flags)], flags) if on]
+        return {"times": times, "interval": DAY} if times else None
+
+    match = re.search(r"\b(?:every|q)\s*(\d+)\s*(?:hours?|hrs?|h)\b", text)
+    if match and 1 <= int(match.group(1)) <= 24:
+        return {"times": None, "interval": int(match.group(1)) * 3600}
+
+    if re.search(r"\b(weekly|once a week|every week)\b", text):
+        return {"times": ["09:00"], "interval": 7 * DAY}
+    for pattern, count in FREQUENCY_WORDS:
+        if re.search(pattern, text):
+            if count == 1 and re.search(r"\b(night|bedtime|hs|before sleep)\b", text):
+                return {"times": ["21:00"], "interval": DAY}
+            return {"times": TIMES_PER_DAY[count], "interval": DAY}
+    if re.search(r"\b(bedtime|at night|hs)\b", text):
+        return {"times": ["21:00"], "interval": DAY}
+    return None
+
+
+def parse_duration_days(text: str, default_days: int, max_days: int) -> int:
+    """ "5 days" -> 5, "2 weeks" -> 14, "1 month" -> 30; default when unreadable"""
+    text = (text or "").lower()
+    if ONGOING.search(text):
+        return max_days
+    match = re.search(r"(\d+)\s*(day|d\b|week|wk|month|mo)", text)
+    if not match:
+        return default_days
+    amount, unit = int(match.group(1)), match.group(2)
+    days = amount * (7 if unit.startswith("w") else 30 if unit.startswith("mo") else 1)
+    return max(1, min(days, max_days))
+
+
+class ReminderNotifier:
+    """Delivery channel for due reminders; deliver() gets every reminder due in one tick"""
+
+    def deliver(self, reminders: List[Dict]):
+        raise NotImplementedError
+
+
+class LogNotifier(ReminderNotifier):
+    def deliver(self, reminders: List[Dict]):
+        for reminder in reminders:
+            logging.info(f"⏰ Reminder for {reminder['user_id']}: {reminder['medication']} {reminder['dosage'] or ''}".strip())
+
+
+class InboxNotifier(ReminderNotifier):
+    """Keeps recent deliveries per user for the app to poll"""
+
+    def __init__(self, max_per_user: int = 50):
+        self._inbox: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_per_user))
+        self._lock = threading.Lock()
+
+    def deliver(self, reminders: List[Dict]):
+        with self._lock:
+            for reminder in reminders:
+                self._inbox[reminder["user_id"]].append(reminder)
+
+    def drain(self, user_id: str) -> List[Dict]:
+        with self._lock:
+            inbox = self._inbox.pop(user_id, None)
+        return list(inbox or [])
+
+
+class SmsNotifier(ReminderNotifier):
+    """One Twilio SMS per phone number per tick, listing every medication due"""
+
+    def __init__(self):
+        self.client = Client(os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
+        if os.getenv("TWILIO_API_BASE_URL"):
+            self.client.api.base_url = os.getenv("TWILIO_API_BASE_URL")
+        self.from_number = os.getenv("TWILIO_PHONE_NUMBER")
+
+    def deliver(self, reminders: List[Dict]):
+        by_phone = defaultdict(list)
+        for reminder in reminders:
+            if reminder.get("phone"):
+                by_phone[reminder["phone"]].append(reminder)
+        for phone, due in by_phone.items():
+            lines = [f"- {r['medication']} {r['dosage'] or ''}".rstrip() for r in due]
+            try:
+                with track_upstream("twilio", "sms"):
+                    self.client.messages.create(body="⏰ Nexus Health: time to take\n" + "\n".join(lines),
+                                                from_=self.from_number, to=phone)
+            except Exception as e:
+                logging.error(f"Reminder SMS to {phone} failed: {str(e)}")
+
+
+class CompositeNotifier(ReminderNotifier):
+    def __init__(self, notifiers: List[ReminderNotifier]):
+        self.notifiers = notifiers
+
+    def deliver(self, reminders: List[Dict]):
+        for notifier in self.notifiers:
+            try:
+                notifier.deliver(reminders)
+            except Exception as e:
+                logging.error(f"{type(notifier).__name__} failed: {str(e)}")
+
+
+def build_notifier(names: str) -> CompositeNotifier:
+    """REMINDER_NOTIFIERS="log,inbox,sms" -> one notifier fanning out to each"""
+    factories = {"log": LogNotifier, "inbox": InboxNotifier, "sms": SmsNotifier}
+    notifiers = []
+    for name in filter(None, (n.strip() for n in names.split(","))):
+        if name not in factories:
+            logging.warning(f"Unknown reminder notifier: {name}")
+            continue
+        try:
+            notifiers.append(factories[name]())
+        except Exception as e:
+            logging.warning(f"Reminder notifier {name} unavailable: {str(e)}")
+    return CompositeNotifier(notifiers)
+
+
+COLUMNS = ["id", "user_id", "phone", "medication", "dosage", "frequency", "instructions",
+           "next_fire_at", "interval_seconds", "remaining", "status", "created_at", "last_fired_at"]
+
+
+class ReminderScheduler:
+    """
+    Durable reminder schedule in SQLite, fired from an in-memory min-heap.
+    Only reminders due within the lookahead window are held in the heap; the
+    (status, next_fire_at) index refills it, so restarts and millions of
+    pending reminders cost a range scan of the next window, not a full load.
+    Reminders due in the same tick are delivered to the notifier as one batch.
+    """
+
+    def __init__(self, path: str = None, notifier: ReminderNotifier = None):
+        self.path = path or os.getenv(
+            "REMINDERS_DB_PATH",
+            os.path.join(os.getenv("NEXUS_DATA_DIR", "data"), "reminders.db")
+        )
+        self.tick = float(os.getenv("REMINDER_TICK_SECONDS", "1"))
+        self.lookahead = float(os.getenv("REMINDER_LOOKAHEAD_SECONDS", "300"))
+        self.missed_grace = float(os.getenv("REMINDER_MISSED_GRACE_SECONDS", "3600"))
+        self.default_days = int(os.getenv("REMINDER_DEFAULT_DAYS", "7"))
+        self.max_days = int(os.getenv("REMINDER_MAX_DAYS", "90"))
+        self.notifier = notifier or build_notifier(os.getenv("REMINDER_NOTIFIERS", "log,inbox"))
+
+        self._heap: List = []
+        self._loaded_until = None
+        self._cond = threading.Condition()
+        self._db_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self.stats = {"delivered": 0, "batches": 0, "skipped_missed": 0}
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(f"""
+            CREATE TABLE IF NOT EXISTS reminders (
+                id TEXT PRIMARY KEY, user_id TEXT NOT NULL, phone TEXT, medication TEXT NOT NULL,
+                dosage TEXT, frequency TEXT, instructions TEXT, next_fire_at REAL NOT NULL,
+                interval_seconds REAL NOT NULL, remaining INTEGER NOT NULL, status TEXT NOT NULL,
+                created_at REAL NOT NULL, last_fired_at REAL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS reminders_due ON reminders (status, next_fire_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS reminders_user ON reminders (user_id, status)")
+
+    # Scheduling
+
+    def plan(self, user_id: str, medication: Dict, phone: str = None, now: datetime = None) -> List[Dict]:
+        """Reminder rows for one parsed medication; empty when it has no usable schedule"""
+        frequency = parse_frequency(medication.get("frequency"))
+        name = (medication.get("name") or "").strip()
+        if not frequency or not name or name.lower() == "not specified":
+            return []
+        now = now or datetime.now()
+        days = parse_duration_days(medication.get("duration"), self.default_days, self.max_days)
+        interval = frequency["interval"]
+        end = now + timedelta(days=days)
+
+        if frequency["times"]:
+            starts = []
+            for hhmm in frequency["times"]:
+                hour, minute = (int(part) for part in hhmm.split(":"))
+                start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if start <= now:
+                    start += timedelta(days=1)
+                starts.append(start)
+        else:
+            starts = [now + timedelta(seconds=interval)]
+
+        rows = []
+        for start in starts:
+            count = int((end - start).total_seconds() // interval) + 1
+            if count <= 0:
+                continue
+            rows.append({
+                "id": f"REM-{uuid.uuid4().hex[:12].upper()}",
+                "user_id": user_id,
+                "phone": phone,
+                "medication": name,
+                "dosage": medication.get("dosage") if medication.get("dosage") != "Not specified" else None,
+                "frequency": medication.get("frequency"),
+                "instructions": medication.get("instructions"),
+                "next_fire_at": start.timestamp(),
+                "interval_seconds": interval,
+                "remaining": count,
+                "status": "active",
+                "created_at": time.time(),
+                "last_fired_at": None
+            })
+        return rows
+
+    def schedule_prescription(self, user_id: str, medications: List[Dict], phone: str = None) -> List[Dict]:
+        rows = []
+        for medication in medications or []:
+            if isinstance(medication, dict):
+                rows.extend(self.plan(user_id, medication, phone))
+        self.add(rows)
+        return rows
+
+    def add(self, rows: List[Dict]):
+        if not rows:
+            return
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                f"INSERT INTO reminders ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [tuple(row[c] for c in COLUMNS) for row in rows]
+            )
+            self._db.execute("COMMIT")
+        with self._cond:
+            if self._loaded_until is not None:
+                for row in rows:
+                    if row["next_fire_at"] < self._loaded_until:
+                        heapq.heappush(self._heap, (row["next_fire_at"], row["id"]))
+            self._cond.notify()
+
+    def cancel(self, reminder_id: str) -> bool:
+        # The heap entry is left in place and skipped when it comes due
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE reminders SET status = 'cancelled' WHERE id = ? AND status = 'active'", (reminder_id,))
+        return cursor.rowcount > 0
+
+    def list_for_user(self, user_id: str, include_inactive: bool = False) -> List[Dict]:
+        query = "SELECT * FROM reminders WHERE user_id = ?" + ("" if include_inactive else " AND status = 'active'")
+        with self._db_lock:
+            rows = self._db.execute(query + " ORDER BY next_fire_at", (user_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def drain_inbox(self, user_id: str) -> List[Dict]:
+        """Reminders delivered to the in-app inbox since the user last checked"""
+        notifiers = self.notifier.notifiers if isinstance(self.notifier, CompositeNotifier) else [self.notifier]
+        inbox = next((n for n in notifiers if isinstance(n, InboxNotifier)), None)
+        return inbox.drain(user_id) if inbox else []
+
+    def pending_count(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM reminders WHERE status = 'active'").fetchone()[0]
+
+    # Firing
+
+    def _refill(self, now: float):
+        """Pull the next window of due reminders from the index into the heap"""
+        horizon = now + self.lookahead
+        with self._db_lock:
+            if self._loaded_until is None:
+                rows = self._db.execute(
+                    "SELECT id, next_fire_at FROM reminders WHERE status = 'active' AND next_fire_at < ?",
+                    (horizon,)).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT id, next_fire_at FROM reminders WHERE status = 'active' AND next_fire_at >= ? AND next_fire_at < ?",
+                    (self._loaded_until, horizon)).fetchall()
+        for row in rows:
+            heapq.heappush(self._heap, (row["next_fire_at"], row["id"]))
+        self._loaded_until = horizon
+
+    def _take_due(self, now: float) -> Dict[str, float]:
+        due = {}
+        while self._heap and self._heap[0][0] <= now + self.tick:
+            fire_at, reminder_id = heapq.heappop(self._heap)
+            due[reminder_id] = fire_at
+        return due
+
+    def _fire(self, due: Dict[str, float], now: float):
+        with self._db_lock:
+            placeholders = ",".join("?" * len(due))
+            # Primary-key lookups only; filtering on status here would let the planner scan the due index
+            rows = self._db.execute(f"SELECT * FROM reminders WHERE id IN ({placeholders})", tuple(due)).fetchall()
+        # Heap entries that no longer match the row were cancelled or rescheduled
+        rows = [dict(row) for row in rows if row["status"] == "active" and row["next_fire_at"] == due[row["id"]]]
+
+        deliver, updates, reschedule = [], [], []
+        for row in rows:
+            occurrences = 1
+            if row["next_fire_at"] < now - self.missed_grace:
+                # Long overdue (server was down): skip to the next future dose without nagging
+                occurrences = int((now - row["next_fire_at"]) // row["interval_seconds"]) + 1
+                self.stats["skipped_missed"] += 1
+            else:
+                deliver.append(row)
+            remaining = row["remaining"] - occurrences
+            next_fire_at = row["next_fire_at"] + occurrences * row["interval_seconds"]
+            status = "active" if remaining > 0 else "completed"
+            updates.append((next_fire_at, remaining, status, now, row["id"]))
+            if status == "active":
+                reschedule.append((next_fire_at, row["id"]))
+
+        if deliver:
+            self.notifier.deliver(deliver)
+            self.stats["delivered"] += len(deliver)
+            self.stats["batches"] += 1
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "UPDATE reminders SET next_fire_at = ?, remaining = ?, status = ?, last_fired_at = ? WHERE id = ?", updates)
+            self._db.execute("COMMIT")
+        with self._cond:
+            for entry in reschedule:
+                if entry[0] < self._loaded_until:
+                    heapq.heappush(self._heap, entry)
+
+    def run_once(self, now: float = None) -> int:
+        """Fire everything due by now (plus one tick); returns the number of reminders handled"""
+        now = now or time.time()
+        with self._cond:
+            if self._loaded_until is None or now + self.tick >= self._loaded_until:
+                self._refill(now)
+            due = self._take_due(now)
+        if due:
+            self._fire(due, now)
+        return len(due)
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Reminder scheduler error: {str(e)}")
+            with self._cond:
+                now = time.time()
+                wake_at = self._loaded_until
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                if not self._stopping:
+                    self._cond.wait(timeout=max(self.tick, min(wake_at - now, self.lookahead)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+_reminder_scheduler = None
+_reminder_scheduler_lock = threading.Lock()
+
+
+def get_reminder_scheduler() -> ReminderScheduler:
+    global _reminder_scheduler
+    if _reminder_scheduler is None:
+        with _reminder_scheduler_lock:
+            if _reminder_scheduler is None:
+                _reminder_scheduler = ReminderScheduler()
+    return _reminder_scheduler
@@ -0,0 +1,334 @@
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import mimetypes
+import argparse
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+from dotenv import load_dotenv
+from app.services.http_cache import etag_matches
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process build lock
+    fcntl = None
+
+load_dotenv()
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FRONTEND_DIR = os.getenv("FRONTEND_DIR", os.path.join(os.path.dirname(APP_ROOT), "frontend"))
+FRONTEND_DIST_DIR = os.getenv("FRONTEND_DIST_DIR", os.path.join(FRONTEND_DIR, "dist"))
+# Per-process budget for asset bodies (all variants) held in memory; the rest are read from disk
+FRONTEND_CACHE_MAX_BYTES = int(os.getenv("FRONTEND_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+IGNORED_SUFFIXES = (".backup", ".map", ".gz", ".br")
+TEXT_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# Assets referenced from HTML/CSS that get content-hashed names
+HASHED_EXTENSIONS = {".js", ".css"}
+# Already-small bodies aren't worth a compressed variant
+MIN_COMPRESS_BYTES = 256
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Preferred first when the client accepts several
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def _content_type(path: str) -> str:
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _hashed_name(path: str, body: bytes) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:10]}{ext}"
+
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    variants = {}
+    if len(body) < MIN_COMPRESS_BYTES:
+        return variants
+    # mtime=0 keeps the output (and so the ETag) identical across builds
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(gzipped) < len(body):
+        variants["gzip"] = gzipped
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11, mode=brotli.MODE_TEXT)
+        if len(compressed) < len(body):
+            variants["br"] = compressed
+    return variants
+
+
+def build_frontend(source_dir: str = FRONTEND_DIR, output_dir: str = FRONTEND_DIST_DIR, api_base_url: str = "") -> Dict:
+    """
+    Build step: copy the frontend to output_dir with content-hashed JS/CSS
+    names, references in HTML rewritten to match, and .gz/.br siblings for
+    every text asset. Pages get an api-base-url meta tag ("" = same origin,
+    i.e. served by the API). Writes manifest.json, which the server loads
+    as is. Returns the manifest.
+    """
+    with _build_lock(output_dir):
+        return _build(source_dir, output_dir, api_base_url)
+
+
+def _build(source_dir: str, output_dir: str, api_base_url: str) -> Dict:
+    sources: Dict[str, bytes] = {}
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != os.path.abspath(output_dir) and not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(IGNORED_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                sources[os.path.relpath(path, source_dir).replace(os.sep, "/")] = f.read()
+
+    aliases = {
+        path: _hashed_name(path, body)
+        for path, body in sources.items()
+        if os.path.splitext(path)[1] in HASHED_EXTENSIONS
+    }
+
+    outputs: Dict[str, bytes] = {}
+    for path, body in sources.items():
+        if path.endswith(".html"):
+            html = body.decode("utf-8")
+            for original, hashed in aliases.items():
+                html = re.sub(r'((?:src|href)=["\'])(?:\./)?' + re.escape(original) + r'(["\'])', r"\g<1>" + hashed + r"\g<2>", html)
+            if 'name="api-base-url"' not in html:
+                html = html.replace("</head>", f'    <meta name="api-base-url" content="{api_base_url}">\n</head>', 1)
+            body = html.encode("utf-8")
+        outputs[aliases.get(path, path)] = body
+
+    # Written beside the live build and swapped in whole, so a worker
+    # starting up never sees a half-written dist
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(output_dir)}-", dir=parent)
+    try:
+        manifest = _write_build(outputs, aliases, build_dir)
+        _swap_in(build_dir, output_dir)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    return manifest
+
+
+def _write_build(outputs: Dict[str, bytes], aliases: Dict[str, str], output_dir: str) -> Dict:
+    files = {}
+    for path, body in outputs.items():
+        content_type = _content_type(path)
+        variants = _compress(body) if content_type.startswith(TEXT_TYPES) else {}
+        target = os.path.join(output_dir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(body)
+        for encoding, suffix in ENCODINGS:
+            if encoding in variants:
+                with open(target + suffix, "wb") as f:
+                    f.write(variants[encoding])
+        files[path] = {
+            "content_type": content_type,
+            "etag": hashlib.sha256(body).hexdigest()[:16],
+            "immutable": path in aliases.values(),
+            "sizes": {"identity": len(body), **{encoding: len(data) for encoding, data in variants.items()}}
+        }
+
+    manifest = {"files": files, "aliases": aliases}
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _swap_in(build_dir: str, output_dir: str):
+    """Replace output_dir with build_dir; the old build is moved aside, then removed"""
+    if not os.path.isdir(output_dir):
+        os.replace(build_dir, output_dir)
+        return
+    retired = f"{build_dir}.old"
+    os.replace(output_dir, retired)
+    os.replace(build_dir, output_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+@contextmanager
+def _build_lock(output_dir: str) -> Iterator[None]:
+    """Exclusive across worker processes; a dotfile beside output_dir, which builds skip"""
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    with open(os.path.join(parent, f".{os.path.basename(output_dir)}.lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+class FrontendAssets:
+    """
+    ASGI app serving a build_frontend() output. Hashed files are immutable for
+    a year; index.html and the unhashed aliases (js/app.js) revalidate via
+    ETag. The best precompressed variant the client accepts is sent as is,
+    so a request never compresses anything. Bodies are read once into
+    memory up to FRONTEND_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self, dist_dir: str = FRONTEND_DIST_DIR, cache_max_bytes: int = FRONTEND_CACHE_MAX_BYTES):
+        self.dist_dir = dist_dir
+        with open(os.path.join(dist_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.files: Dict[str, Dict] = manifest["files"]
+        self.aliases: Dict[str, str] = manifest["aliases"]
+        self._bodies: Dict[Tuple[str, str], bytes] = {}
+        cached_bytes = 0
+        # Smallest first, so the budget covers as many files as possible
+        for path, info in sorted(self.files.items(), key=lambda item: sum(item[1]["sizes"].values())):
+            size = sum(info["sizes"].values())
+            if cached_bytes + size > cache_max_bytes:
+                continue
+            for encoding in info["sizes"]:
+                with open(self._disk_path(path, encoding), "rb") as f:
+                    self._bodies[(path, encoding)] = f.read()
+            cached_bytes += size
+        self.cached_bytes = cached_bytes
+
+    def _disk_path(self, path: str, encoding: str) -> str:
+        suffix = dict(ENCODINGS).get(encoding, "")
+        return os.path.join(self.dist_dir, path) + suffix
+
+    def _resolve(self, path: str) -> Tuple[Optional[str], bool]:
+        """(built file, served under its own hashed name)"""
+        path = path.lstrip("/") or "index.html"
+        if path in self.files:
+            return path, self.files[path]["immutable"]
+        if path in self.aliases:
+            return self.aliases[path], False
+        return None, False
+
+    def _negotiate(self, path: str, accept_encoding: Optional[str]) -> str:
+        sizes = self.files[path]["sizes"]
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in sizes and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return "identity"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            return await Response(status_code=405, headers={"Allow": "GET, HEAD"})(scope, receive, send)
+
+        # Mounted apps see the full path; root_path is the mount prefix (/app -> /app/ is redirected by the router)
+        relative = scope["path"][len(scope.get("root_path", "")):]
+        path, immutable = self._resolve(relative)
+        if path is None:
+            return await Response("Not Found", status_code=404, media_type="text/plain")(scope, receive, send)
+
+        request_headers = Headers(scope=scope)
+        info = self.files[path]
+        encoding = self._negotiate(path, request_headers.get("accept-encoding"))
+        etag = f'"{info["etag"]}"' if encoding == "identity" else f'"{info["etag"]}-{encoding}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return await Response(status_code=304, headers=headers)(scope, receive, send)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = self._bodies.get((path, encoding))
+        if body is None:
+            # FileResponse only fills in validators we haven't set, so the ETag stays ours
+            response = FileResponse(self._disk_path(path, encoding), headers=headers, media_type=info["content_type"])
+        else:
+            response = Response(body, headers=headers, media_type=info["content_type"])
+        await response(scope, receive, send)
+
+
+def _build_is_stale(manifest_path: str) -> bool:
+    built_at = os.path.getmtime(manifest_path)
+    dist_dir = os.path.abspath(FRONTEND_DIST_DIR)
+    for root, dirs, files in os.walk(FRONTEND_DIR):
+        # Same files build_frontend reads: no dist, dot-entries (build temp dirs, the lock) or backups
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir and not d.startswith(".")]
+        if any(os.path.getmtime(os.path.join(root, name)) > built_at for name in files
+               if not name.startswith(".") and not name.endswith(IGNORED_SUFFIXES)):
+            return True
+    return False
+
+
+def get_frontend_app() -> Optional[FrontendAssets]:
+    """
+    Serve the prebuilt frontend. Without a build, or when the sources changed
+    since (dev runs), build it now, unless FRONTEND_BUILD_ON_START=false, in
+    which case the CLI build is required and only checked here. None when
+    there is nothing to serve.
+    """
+    manifest_path = os.path.join(FRONTEND_DIST_DIR, "manifest.json")
+    build_on_start = os.getenv("FRONTEND_BUILD_ON_START", "true").lower() == "true"
+    # Workers start together: the first one builds, the rest wait on the lock and find it fresh
+    with _build_lock(FRONTEND_DIST_DIR):
+        if build_on_start and os.path.isdir(FRONTEND_DIR) and (
+                not os.path.exists(manifest_path) or _build_is_stale(manifest_path)):
+            logging.info(f"Building frontend into {FRONTEND_DIST_DIR}")
+            _build(FRONTEND_DIR, FRONTEND_DIST_DIR, "")
+        if not os.path.exists(manifest_path):
+            logging.warning(f"No frontend build at {FRONTEND_DIST_DIR} (python -m app.services.static_assets), not serving it")
+            return None
+        try:
+            assets = FrontendAssets(FRONTEND_DIST_DIR)
+        except (OSError, KeyError, ValueError) as e:
+            logging.error(f"Frontend build at {FRONTEND_DIST_DIR} is unusable, not serving it: {str(e)}")
+            return None
+    if brotli is None:
+        logging.info("brotli not installed: serving gzip variants only")
+    return assets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the frontend: hashed names, gzip/brotli variants, manifest")
+    parser.add_argument("--source", default=FRONTEND_DIR)
+    parser.add_argument("--output", default=FRONTEND_DIST_DIR)
+    parser.add_argument("--api-base-url", default="", help="API origin the pages call; empty for same origin")
+    args = parser.parse_args()
+    manifest = build_frontend(args.source, args.output, args.api_base_url)
+    for path, info in sorted(manifest["files"].items()):
+        print(f"{path:40} {info['sizes']}")
@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Tuple
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "red_flags.json")
+
+# Negation never reaches across a clause boundary or a conjunction: "no fever, but chest
+# pain", "no fever and chest pain"
+CLAUSE_BREAK = re.compile(r"[.,;:!?&\n]|\b(?:but|however|now|until|till|and|or|pero|lekin|aur)\b|\b(?:पर|और)\b")
+# A negated mention the sentence then reverses: "never had chest pain before but now
+# I have it", "no chest pain until this morning"
+NEGATION_REVERSAL = re.compile(r"(?:until|till|(?:but|however|and|pero|lekin|[,;:])\s+now)\b")
+NEGATION_WINDOW = 3  # words before the match that may negate it
+# A high-severity mention is only negated by a cue right before it ("no chest pain",
+# "don't have chest pain"); these are the only words allowed in between
+HIGH_NEGATION_FILLER = {"have", "has", "had", "having", "any", "a", "an"}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace/hyphens so patterns and input line up"""
+    text = text.casefold().replace("’", "'").replace("-", " ")
+    return re.sub(r"\s+", " ", text)
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every pattern occurrence"""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(pattern_id)
+
+        # Breadth-first failure links (depth-1 nodes fail to the root);
+        # outputs inherit from their fail node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str):
+        """Yields (start, end, pattern_id) for every occurrence, overlaps included"""
+        node = 0
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern_id in out[node]:
+                yield index + 1 - len(patterns[pattern_id]), index + 1, pattern_id
+
+
+class TriageEngine:
+    """
+    Rule-based emergency triage over a file-loaded red-flag lexicon.
+    Runs before any LLM call so emergencies never wait on Gemini.
+    """
+
+    def __init__(self, lexicon_path: str = None):
+        self.lexicon_path = lexicon_path or os.getenv("TRIAGE_LEXICON_PATH", DEFAULT_LEXICON_PATH)
+        with open(self.lexicon_path, "r", encoding="utf-8") as f:
+            lexicon = json.load(f)
+
+        self.weights = lexicon["severity_weights"]
+        self.negation_before = set(lexicon["negation_cues"]["before"])
+        self.negation_after = [normalize_text(cue) for cue in lexicon["negation_cues"]["after"]]
+
+        phrases, self._phrase_terms = [], []
+        for term in lexicon["terms"]:
+            for phrase in term["phrases"]:
+                phrases.append(normalize_text(phrase))
+                self._phrase_terms.append(term)
+        self.matcher = AhoCorasick(phrases)
+        logging.info(f"Triage lexicon loaded: {len(lexicon['terms'])} concepts, {len(phrases)} phrases")
+
+    @staticmethod
+    def _is_word_boundary(text: str, start: int, end: int) -> bool:
+        before_ok = start == 0 or not text[start - 1].isalnum()
+        after_ok = end == len(text) or not text[end].isalnum()
+        return before_ok and after_ok
+
+    def _clause_bounds(self, text: str, start: int, end: int) -> Tuple[int, int]:
+        clause_start = 0
+        for boundary in CLAUSE_BREAK.finditer(text, 0, start):
+            clause_start = boundary.end()
+        following = CLAUSE_BREAK.search(text, end)
+        return clause_start, following.start() if following else len(text)
+
+    def _is_negated(self, text: str, start: int, end: int, scope_start: int, severity: str) -> bool:
+        """scope_start: end of the previous red-flag phrase; a cue before it negates that one"""
+        clause_start, clause_end = self._clause_bounds(text, start, end)
+        preceding = [word.strip("'\"()") for word in text[max(clause_start, scope_start):start].split()]
+        following = text[end:clause_end].strip()
+        if any(following.startswith(cue) for cue in self.negation_after):
+            return True
+        if severity == "high":
+            while preceding and preceding[-1] in HIGH_NEGATION_FILLER:
+                preceding.pop()
+            preceding = preceding[-1:]
+        else:
+            preceding = preceding[-NEGATION_WINDOW:]
+        if not any(word in self.negation_before for word in preceding):
+            return False
+        return not NEGATION_REVERSAL.match(text, clause_end)
+
+    def assess(self, text: str) -> Dict:
+        """
+        Returns: {level, score, short_circuit, red_flags: [{concept, phrase, severity, category, negated}]}
+        """
+        normalized = normalize_text(text)
+        found: Dict[str, Dict] = {}
+
+        matches = [(start, end, pattern_id) for start, end, pattern_id in self.matcher.iter_matches(normalized)
+                   if self._is_word_boundary(normalized, start, end)]
+        for start, end, pattern_id in matches:
+            term = self._phrase_terms[pattern_id]
+            scope_start = max((other_end for _, other_end, _ in matches if other_end <= start), default=0)
+            negated = self._is_negated(normalized, start, end, scope_start, term["severity"])
+            current = found.get(term["concept"])
+            # A concept counts if any mention of it is affirmed
+            if current is None or (current["negated"] and not negated):
+                found[term["concept"]] = {
+                    "concept": term["concept"],
+                    "phrase": normalized[start:end],
+                    "severity": term["severity"],
+                    "category": term["category"],
+                    "negated": negated
+                }
+
+        affirmed = [flag for flag in found.values() if not flag["negated"]]
+        score = sum(self.weights.get(flag["severity"], 0) for flag in affirmed)
+
+        if any(flag["severity"] == "high" for flag in affirmed) or score >= 3 * self.weights["medium"]:
+            level = "high"
+        elif affirmed:
+            level = "medium"
+        else:
+            level = "low"
+
+        return {
+            "level": level,
+            "score": score,
+            "short_circuit": level == "high",
+            "red_flags": sorted(found.values(), key=lambda f: (f["negated"], -self.weights.get(f["severity"], 0)))
+        }
+
+
+_triage_engine = None
+_triage_engine_lock = threading.Lock()
+
+
+def get_triage_engine() -> TriageEngine:
+    """Compiled once per process and shared"""
+    global _triage_engine
+    if _triage_engine is None:
+        with _triage_engine_lock:
+            if _triage_engine is None:
+                _triage_engine = TriageEngine()
+    return _triage_engine
@@ -0,0 +1,87 @@
+import io
+import os
+import mmap
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from fastapi import UploadFile
+
+# Request-body caps enforced while the body streams in (see UploadLimitMiddleware)
+UPLOAD_MAX_IMAGE_BYTES = int(os.getenv("UPLOAD_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_AUDIO_BYTES = int(os.getenv("UPLOAD_MAX_AUDIO_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+def _upload_fileno(upload: UploadFile) -> Optional[int]:
+    """
+    Descriptor of the upload's spool file. Starlette spools parts to a
+    SpooledTemporaryFile, whose fileno() rolls a small in-memory part over to
+    disk (at most its max_size, 1 MB by default). None for file objects with
+    no descriptor at all.
+    """
+    upload.file.flush()
+    try:
+        return upload.file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+@contextmanager
+def upload_buffer(upload: UploadFile) -> Iterator[memoryview]:
+    """
+    Read-only view of the whole upload without copying it into Python
+    memory: an mmap of the spool file. The view is released on exit, before
+    the upload is closed.
+    """
+    fileno = _upload_fileno(upload)
+    if fileno is None:
+        upload.file.seek(0)
+        yield memoryview(upload.file.read()).toreadonly()
+        return
+    if os.fstat(fileno).st_size == 0:
+        yield memoryview(b"")
+        return
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+
+
+@contextmanager
+def upload_path(upload: UploadFile, suffix: str = "") -> Iterator[str]:
+    """
+    Named file holding the upload, for consumers that work on paths (worker
+    processes, ffmpeg). Copied in the kernel from the spool file; never held
+    in memory as a second copy. Deleted on exit.
+    """
+    handle, path = tempfile.mkstemp(prefix="nexus-upload-", suffix=suffix, dir=UPLOAD_SPOOL_DIR)
+    try:
+        with os.fdopen(handle, "wb") as target:
+            source = _upload_fileno(upload)
+            offset = 0
+            try:
+                if source is None:
+                    raise OSError("upload has no file descriptor")
+                size = os.fstat(source).st_size
+                while offset < size:
+                    sent = os.sendfile(target.fileno(), source, offset, size - offset)
+                    if not sent:
+                        break
+                    offset += sent
+            except (AttributeError, OSError):
+                # No sendfile between these files here; fall back to a bounded copy
+                upload.file.seek(0)
+                target.seek(0)
+                target.truncate()
+                shutil.copyfileobj(upload.file, target, COPY_CHUNK_BYTES)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,20 +1,201 @@
 import os
+import json
+import time
+import hashlib
 import logging
-from typing import Optional
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
 import base64
 from fastapi import HTTPException
 import requests
 from dotenv import load_dotenv
+from app.services.metrics import track_upstream
 
 load_dotenv()
 
+# Recognition input format: 16 kHz mono 16-bit PCM
+TARGET_SAMPLE_RATE = 16000
+MIN_SILENCE_MS = int(os.getenv("VOICE_MIN_SILENCE_MS", "400"))
+KEEP_SILENCE_MS = int(os.getenv("VOICE_KEEP_SILENCE_MS", "150"))
+SILENCE_OFFSET_DB = float(os.getenv("VOICE_SILENCE_OFFSET_DB", "16"))
+PREPROCESS_TIMEOUT = float(os.getenv("VOICE_PREPROCESS_TIMEOUT", "20"))
+
+ELEVENLABS_API_URL = os.getenv("ELEVENLABS_API_URL", "https://api.elevenlabs.io")
+ELEVENLABS_TIMEOUT = float(os.getenv("ELEVENLABS_TIMEOUT", "10"))
+GOOGLE_STT_URL = os.getenv("GOOGLE_STT_URL")
+VOICE_CATALOG_TTL = float(os.getenv("VOICE_CATALOG_TTL", "3600"))
+VOICE_CATALOG_RETRY = float(os.getenv("VOICE_CATALOG_RETRY", "60"))
+
+_preprocess_pool = None
+_voice_catalog = None
+
+
+def _get_preprocess_pool() -> ProcessPoolExecutor:
+    """Worker pool shared by every VoiceService instance"""
+    global _preprocess_pool
+    if _preprocess_pool is None:
+        _preprocess_pool = ProcessPoolExecutor(
+            max_workers=int(os.getenv("VOICE_PREPROCESS_WORKERS", "2")),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _preprocess_pool
+
+
+def _normalize_audio(audio_path: str) -> Tuple[str, float]:
+    """
+    Resample to 16 kHz mono PCM, trim leading/trailing silence and
+    compress long pauses. Runs inside the worker pool, reading and writing
+    files so no audio is pickled between processes.
+    Returns: (path of the normalized wav, seconds of audio removed)
+    """
+    from pydub import AudioSegment
+    from pydub.silence import detect_nonsilent
+
+    # WAV decodes in pure Python; anything else (WebM/Ogg) goes through ffmpeg
+    with open(audio_path, "rb") as f:
+        audio_format = "wav" if f.read(4) == b"RIFF" else None
+    segment = AudioSegment.from_file(audio_path, format=audio_format)
+    segment = segment.set_channels(1).set_frame_rate(TARGET_SAMPLE_RATE).set_sample_width(2)
+    original_ms = len(segment)
+
+    # Threshold relative to the clip's own loudness so quiet microphones still work
+    silence_thresh = segment.dBFS - SILENCE_OFFSET_DB if segment.dBFS != float("-inf") else -50
+    speech_ranges = detect_nonsilent(
+        segment,
+        min_silence_len=MIN_SILENCE_MS,
+        silence_thresh=silence_thresh,
+        seek_step=10
+    )
+
+    if speech_ranges:
+        # Keep a little padding around each utterance; everything else is dropped
+        chunks = [
+            segment[max(0, start - KEEP_SILENCE_MS):min(original_ms, end + KEEP_SILENCE_MS)].raw_data
+            for start, end in speech_ranges
+        ]
+        segment = AudioSegment(
+            data=b"".join(chunks),
+            sample_width=segment.sample_width,
+            frame_rate=segment.frame_rate,
+            channels=segment.channels
+        )
+
+    output_path = audio_path + ".normalized.wav"
+    segment.export(output_path, format="wav")
+    return output_path, (original_ms - len(segment)) / 1000.0
+
+
+class VoiceCatalog:
+    """
+    In-memory ElevenLabs voice list with TTL.
+    Stale data keeps being served while a background thread refreshes it.
+    """
+    
+    def __init__(self, api_key: str, ttl: float = VOICE_CATALOG_TTL):
+        self.api_key = api_key
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._voices = []
+        self._name_to_id = {}
+        self._ids = set()
+        self._etag = self._compute_etag([])
+        self._expires_at = 0.0
+        self._refreshing = False
+        self._first_attempt = threading.Event()
+    
+    @staticmethod
+    def _compute_etag(voices: list) -> str:
+        digest = hashlib.sha1(json.dumps(voices, sort_keys=True).encode("utf-8")).hexdigest()
+        return f'"{digest}"'
+    
+    def refresh(self) -> bool:
+        """Fetch /v1/voices and swap the cached catalog. Returns True on success"""
+        try:
+            with track_upstream("elevenlabs", "voices"):
+                response = requests.get(
+                    f"{ELEVENLABS_API_URL}/v1/voices",
+                    headers={"xi-api-key": self.api_key},
+                    timeout=ELEVENLABS_TIMEOUT
+                )
+                response.raise_for_status()
+            voices = response.json().get("voices", [])
+            
+            name_to_id = {}
+            for voice in voices:
+                if voice.get("name") and voice.get("voice_id"):
+                    name_to_id[voice["name"].strip().lower()] = voice["voice_id"]
+            
+            with self._lock:
+                self._voices = voices
+                self._name_to_id = name_to_id
+                self._ids = set(name_to_id.values())
+                self._etag = self._compute_etag(voices)
+                self._expires_at = time.monotonic() + self.ttl
+            logging.info(f"Voice catalog refreshed: {len(voices)} voices")
+            return True
+            
+        except Exception as e:
+            logging.error(f"Error fetching voices: {str(e)}")
+            with self._lock:
+                # Back off instead of hammering ElevenLabs on every request
+                self._expires_at = time.monotonic() + min(self.ttl, VOICE_CATALOG_RETRY)
+            return False
+        
+        finally:
+            self._refreshing = False
+            self._first_attempt.set()
+    
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="voice-catalog-refresh", daemon=True).start()
+    
+    def _ensure_fresh(self):
+        if not self._first_attempt.is_set():
+            # Cold start: wait for the warm-up fetch instead of issuing another one
+            self.refresh_in_background()
+            self._first_attempt.wait(ELEVENLABS_TIMEOUT)
+        elif time.monotonic() >= self._expires_at:
+            self.refresh_in_background()
+    
+    def snapshot(self) -> Tuple[list, str]:
+        """Returns: (voices, etag)"""
+        self._ensure_fresh()
+        return self._voices, self._etag
+    
+    def resolve(self, voice: str) -> str:
+        """Map a friendly voice name (e.g. "Rachel") to its voice_id"""
+        self._ensure_fresh()
+        if voice in self._ids:
+            return voice
+        return self._name_to_id.get(voice.strip().lower(), voice)
+
+
+def get_voice_catalog(api_key: str) -> VoiceCatalog:
+    """Catalog shared by every VoiceService instance"""
+    global _voice_catalog
+    if _voice_catalog is None:
+        _voice_catalog = VoiceCatalog(api_key)
+    return _voice_catalog
+
+
 class VoiceService:
+    SYSTEM_VOICES = [{"id": "system", "name": "System Default"}]
+    
     def __init__(self):
         self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
         self.use_elevenlabs = bool(self.elevenlabs_api_key)
+        self.voice_catalog = None
         
-        # Fallback to system TTS if ElevenLabs not available
-        if not self.use_elevenlabs:
+        if self.use_elevenlabs:
+            self.voice_catalog = get_voice_catalog(self.elevenlabs_api_key)
+            self.voice_catalog.refresh_in_background()
+        else:
+            # Fallback to system TTS if ElevenLabs not available
             logging.warning("ElevenLabs API key not found. Using system TTS fallback.")
         
     def text_to_speech(self, text: str, voice_id: str = "Rachel") -> Optional[str]:
@@ -34,7 +215,8 @@ class VoiceService:
     def _elevenlabs_tts(self, text: str, voice_id: str) -> str:
         """Convert text to speech using ElevenLabs API"""
         try:
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+            voice_id = self.voice_catalog.resolve(voice_id)
+            url = f"{ELEVENLABS_API_URL}/v1/text-to-speech/{voice_id}"
             
             headers = {
                 "Accept": "audio/mpeg",
@@ -51,8 +233,9 @@ class VoiceService:
                 }
             }
             
-            response = requests.post(url, json=data, headers=headers)
-            response.raise_for_status()
+            with track_upstream("elevenlabs", "tts"):
+                response = requests.post(url, json=data, headers=headers, timeout=ELEVENLABS_TIMEOUT)
+                response.raise_for_status()
             
             # Convert audio to base64 for easy frontend handling
             audio_base64 = base64.b64encode(response.content).decode('utf-8')
@@ -98,50 +281,70 @@ class VoiceService:
             logging.error(f"System TTS error: {str(e)}")
             return None
     
-    def speech_to_text(self, audio_data: bytes) -> str:
+    def preprocess_audio(self, audio_path: str) -> Tuple[str, float]:
+        """
+        Normalize an uploaded audio file in the worker pool before recognition.
+        Falls back to the original file if decoding fails.
+        Returns: (audio path, seconds of audio removed)
+        """
+        try:
+            future = _get_preprocess_pool().submit(_normalize_audio, audio_path)
+            return future.result(timeout=PREPROCESS_TIMEOUT)
+        except Exception as e:
+            logging.warning(f"Audio preprocessing skipped: {str(e)}")
+            return audio_path, 0.0
+
+    def speech_to_text(self, audio_path: str) -> Dict:
         """
         Convert speech to text using Google Speech Recognition
+        audio_path: the request's own spooled upload (see uploads.upload_path)
+        Returns: {text, trimmed_seconds}
         """
+        wav_path = audio_path
         try:
             import speech_recognition as sr
             
             recognizer = sr.Recognizer()
             
-            # Save audio data to temporary file
-            with open("temp_audio.wav", "wb") as f:
-                f.write(audio_data)
+            wav_path, trimmed_seconds = self.preprocess_audio(audio_path)
+            logging.info(f"Audio preprocessing removed {trimmed_seconds:.2f}s")
             
-            # Use audio file for recognition
-            with sr.AudioFile("temp_audio.wav") as source:
+            with sr.AudioFile(wav_path) as source:
                 audio = recognizer.record(source)
                 
-            text = recognizer.recognize_google(audio)
-            
-            # Clean up
-            if os.path.exists("temp_audio.wav"):
-                os.remove("temp_audio.wav")
+            with track_upstream("google_stt", "recognize") as call:
+                try:
+                    if GOOGLE_STT_URL:
+                        text = recognizer.recognize_google(audio, endpoint=GOOGLE_STT_URL)
+                    else:
+                        text = recognizer.recognize_google(audio)
+                except sr.UnknownValueError:
+                    # Reached Google fine; the audio just had no intelligible speech
+                    call.outcome = "no_speech"
+                    raise
                 
-            return text
+            return {"text": text, "trimmed_seconds": trimmed_seconds}
             
         except Exception as e:
             logging.error(f"Speech to text error: {str(e)}")
             raise HTTPException(status_code=500, detail="Speech recognition failed")
+        finally:
+            if wav_path != audio_path:
+                try:
+                    os.remove(wav_path)
+                except OSError:
+                    pass
 
     def get_available_voices(self) -> list:
         """Get list of available voices"""
+        return self.get_voices_snapshot()[0]
+    
+    def get_voices_snapshot(self) -> Tuple[list, str]:
+        """
+        Get cached voice list plus its ETag
+        Returns: (voices, etag)
+        """
         if not self.use_elevenlabs:
-            return [{"id": "system", "name": "System Default"}]
+            return self.SYSTEM_VOICES, VoiceCatalog._compute_etag(self.SYSTEM_VOICES)
         
-        try:
-            url = "https://api.elevenlabs.io/v1/voices"
-            headers = {"xi-api-key": self.elevenlabs_api_key}
-            
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            
-            voices_data = response.json()
-            return voices_data.get("voices", [])
-            
-        except Exception as e:
-            logging.error(f"Error fetching voices: {str(e)}")
-            return []
\ No newline at end of file
+        return self.voice_catalog.snapshot()
@@ -0,0 +1,140 @@
+"""
+Benchmark: accuracy and latency of the first-turn answer cache.
+
+Seeds the cache with labelled questions, then asks follow-up probes. Probes
+labelled True are paraphrases that should be served from the cache; probes
+labelled False change the answer (another age, "for kids", a negation, a
+second drug, when/how/can asked about the same drug) and must miss. A wrong hit is worse than a miss, so precision
+is reported separately from recall.
+
+Latency is measured with the cache filled to --entries distinct questions.
+
+    cd backend
+    python -m benchmarks.bench_answer_cache --entries 2000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("ANSWER_CACHE_TTL_SECONDS", "3600")
+
+from app.services.answer_cache import AnswerCache
+
+# (cached question, probe, probe should be served the cached answer)
+LABELLED = [
+    ("what should I take for a headache", "headache medicine?", True),
+    ("what should I take for a headache", "any tablets for headache", True),
+    ("what should I take for a headache", "remedy for a headache please", True),
+    ("sore throat remedies", "what helps a sore throat", True),
+    ("medicine for acidity", "what medication for acidity", True),
+    ("how much water should I drink daily", "how much water should i drink a day", True),
+    ("cough remedies", "how do I get rid of a cough", True),
+    ("back pain relief", "what helps back pain", True),
+    ("what is good for a headache", "good remedy for headaches", True),
+    ("headache medicine", "headach medicine", True),
+    ("what should I take for a headache", "what should i take for headaches", True),
+    ("sore throat remedies", "remedy for a sore throat", True),
+    ("how do I get rid of a cough", "how to get rid of cough", True),
+    ("headache medicine", "headache medicine for kids", False),
+    ("dose of paracetamol for a 5 year old", "dose of paracetamol for a 10 year old", False),
+    ("can I take ibuprofen", "can I take ibuprofen with paracetamol", False),
+    ("can I take ibuprofen", "can I not take ibuprofen", False),
+    ("sore throat remedy", "sore throat remedy during pregnancy", False),
+    ("is aspirin safe", "is aspirin safe while pregnant", False),
+    ("back pain relief", "knee pain relief", False),
+    ("cold medicine", "cough medicine", False),
+    ("how much water should I drink daily", "how much coffee should I drink daily", False),
+    ("what is good for a headache", "what is good for a stomach ache", False),
+    ("when should I take paracetamol", "can I take paracetamol", False),
+    ("when should I take paracetamol", "how should I take paracetamol", False),
+    ("when should I take paracetamol", "why should I take paracetamol", False),
+]
+
+ANSWER = "Rest, drink fluids and take [MED:Paracetamol 500mg] if needed."
+
+SYMPTOMS = ["headache", "fever", "cough", "cold", "back pain", "acidity", "rash", "insomnia", "nausea",
+            "sore throat", "toothache", "sprain", "allergy", "constipation", "dandruff", "acne", "migraine"]
+ASPECTS = ["remedy for", "diet for", "exercise for", "causes of", "home care for", "vitamins for",
+           "tea for", "yoga for", "sleep with", "prevent"]
+GROUPS = ["", "adults", "seniors", "athletes", "students", "office workers", "travellers", "in winter",
+          "in summer", "at night", "after meals", "in the morning"]
+
+
+def filler_questions(count, rng):
+    questions = set()
+    while len(questions) < count:
+        questions.add(" ".join(filter(None, [rng.choice(ASPECTS), rng.choice(SYMPTOMS), rng.choice(GROUPS),
+                                             f"week {rng.randrange(200)}"])))
+    return sorted(questions)
+
+
+def accuracy():
+    cache = AnswerCache()
+    outcomes = []
+    for seed, probe, expected in LABELLED:
+        cache.clear()
+        cache.store(seed, ANSWER)
+        hit = cache.lookup(probe)
+        outcomes.append({"seed": seed, "probe": probe, "expected": expected, "hit": hit is not None,
+                         "similarity": hit["similarity"] if hit else None})
+    true_hits = sum(1 for o in outcomes if o["expected"] and o["hit"])
+    wrong_hits = [o for o in outcomes if not o["expected"] and o["hit"]]
+    paraphrases = sum(1 for o in outcomes if o["expected"])
+    return {
+        "paraphrase_recall": round(true_hits / paraphrases, 3),
+        "hit_precision": round(true_hits / (true_hits + len(wrong_hits)), 3) if true_hits + len(wrong_hits) else None,
+        "wrong_hits": wrong_hits,
+        "missed_paraphrases": [o["probe"] for o in outcomes if o["expected"] and not o["hit"]]
+    }
+
+
+def latency(entries, repeat, rng):
+    os.environ["ANSWER_CACHE_MAX_ENTRIES"] = str(entries)
+    cache = AnswerCache()
+    questions = filler_questions(entries, rng)
+    started = time.perf_counter()
+    for question in questions:
+        cache.store(question, ANSWER)
+    store_ms = (time.perf_counter() - started) * 1000 / len(questions)
+
+    probes = [rng.choice(questions) for _ in range(repeat // 2)] + [f"unrelated question number {i}" for i in range(repeat // 2)]
+    samples = []
+    for probe in probes:
+        t = time.perf_counter()
+        cache.lookup(probe)
+        samples.append((time.perf_counter() - t) * 1e6)
+    samples.sort()
+    snapshot = cache.snapshot()
+    return {
+        "entries": snapshot["entries"],
+        "store_mean_ms": round(store_ms, 3),
+        "lookup_mean_us": round(statistics.mean(samples), 1),
+        "lookup_p99_us": round(samples[int(len(samples) * 0.99) - 1], 1),
+        "hit_rate": snapshot["hit_rate"],
+        "matrix_mb": round(cache._vectors.nbytes / 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=2000, help="lookups in the latency run")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "answer_cache",
+        "accuracy": accuracy(),
+        "latency": latency(args.entries, args.repeat, random.Random(7))
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
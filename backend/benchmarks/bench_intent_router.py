@@ -0,0 +1,137 @@
+"""
+Benchmark: accuracy and latency of the local intent router.
+
+Runs the router over a labelled set of chat messages. Messages labelled
+None must NOT be routed (they need the LLM); a wrong routing is worse
+than a miss, so precision is reported separately from coverage.
+
+    cd backend
+    python -m benchmarks.bench_intent_router --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app.services.intent_router import IntentRouter
+
+# (message, expected intent, expected action data)
+LABELLED = [
+    ("call an ambulance", "EMERGENCY", None),
+    ("Call ambulance now!", "EMERGENCY", None),
+    ("please get me an ambulance", "EMERGENCY", None),
+    ("ambulance please", "EMERGENCY", None),
+    ("call 108", "EMERGENCY", None),
+    ("call emergency services", "EMERGENCY", None),
+    ("this is an emergency", "EMERGENCY", None),
+    ("sos", "EMERGENCY", None),
+    ("ambulance bulao jaldi", "EMERGENCY", None),
+    ("llama una ambulancia", "EMERGENCY", None),
+    ("find hospitals near me", "HOSPITAL_SEARCH", None),
+    ("show me the nearest hospital", "HOSPITAL_SEARCH", None),
+    ("hospitals around here", "HOSPITAL_SEARCH", None),
+    ("find a clinic nearby", "HOSPITAL_SEARCH", None),
+    ("nearest emergency room", "HOSPITAL_SEARCH", None),
+    ("paas ka hospital dikhao", "HOSPITAL_SEARCH", None),
+    ("busca un hospital cerca", "HOSPITAL_SEARCH", None),
+    ("book an appointment", "BOOK_APPOINTMENT", None),
+    ("schedule a consultation for tomorrow", "BOOK_APPOINTMENT", None),
+    ("I need a doctor's appointment", "BOOK_APPOINTMENT", None),
+    ("book a dermatologist", "BOOK_APPOINTMENT", None),
+    ("appointment book karo", "BOOK_APPOINTMENT", None),
+    ("quiero agendar una cita", "BOOK_APPOINTMENT", None),
+    ("order paracetamol", "ORDER_MEDICINE", "Paracetamol"),
+    ("buy dolo 650", "ORDER_MEDICINE", "Dolo 650"),
+    ("please order some crocin advance", "ORDER_MEDICINE", "Crocin Advance"),
+    ("get me a strip of cetzine 10mg", "ORDER_MEDICINE", "Cetzine 10mg"),
+    ("I want to buy ibuprofen 400mg online", "ORDER_MEDICINE", "Ibuprofen 400mg"),
+    ("can you order brufen for me?", "ORDER_MEDICINE", "Brufen"),
+    ("dolo 650 mangwa do", "ORDER_MEDICINE", "Dolo 650"),
+    ("comprar paracetamol", "ORDER_MEDICINE", "Paracetamol"),
+    ("order 2 strips of dolo 650", "ORDER_MEDICINE", "Dolo 650"),
+    ("buy a bottle of benadryl syrup", "ORDER_MEDICINE", "Benadryl Syrup"),
+    ("order azithromycin x2", "ORDER_MEDICINE", "Azithromycin"),
+    # Must go to the LLM
+    ("should I call an ambulance for a sprained ankle?", None, None),
+    ("don't call an ambulance, I'm fine now", None, None),
+    ("what is the difference between dolo and crocin", None, None),
+    ("how much paracetamol can I take in a day", None, None),
+    ("order medicine", None, None),
+    ("buy something for my headache", None, None),
+    ("I have had a headache and mild fever since yesterday, what should I do?", None, None),
+    ("my chest hurts when I climb stairs", None, None),
+    ("is it safe to take ibuprofen with coffee", None, None),
+    ("cancel my appointment", None, None),
+    ("which hospital is best for cardiology in my city and why", None, None),
+    ("hi", None, None),
+    ("thank you so much", None, None),
+    ("I ordered paracetamol yesterday but it has not arrived", None, None),
+    ("help", None, None),
+    ("help me", None, None),
+    ("get me a glass of water", None, None),
+    ("buy a new phone", None, None),
+    ("I need to order a pizza", None, None),
+    ("get me out of here", None, None),
+    ("get me a nurse", None, None),
+    ("deliver me from pain", None, None),
+    ("I want to buy time", None, None),
+    ("get me a doctor appointment", "BOOK_APPOINTMENT", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100, help="timing passes over the labelled set")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="print every misclassification")
+    args = parser.parse_args()
+
+    router = IntentRouter()
+
+    correct, routed, routed_correct, should_route, errors = 0, 0, 0, 0, []
+    for message, expected, expected_data in LABELLED:
+        result = router.classify(message)
+        got = result["intent"] if result["routed"] else None
+        got_data = result["action"]["data"] if got else None
+        ok = got == expected and (expected_data is None or got_data == expected_data)
+        correct += ok
+        should_route += expected is not None
+        if got:
+            routed += 1
+            routed_correct += ok
+        if not ok:
+            errors.append({"message": message, "expected": expected, "got": got, "data": got_data, "confidence": result["confidence"]})
+
+    samples = []
+    for _ in range(args.repeat):
+        for message, _, _ in LABELLED:
+            started = time.perf_counter()
+            router.classify(message)
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+
+    results = {
+        "benchmark": "intent_router",
+        "messages": len(LABELLED),
+        "accuracy": round(correct / len(LABELLED), 3),
+        "precision": round(routed_correct / routed, 3) if routed else None,
+        "coverage": round(routed_correct / should_route, 3) if should_route else None,
+        "latency": {
+            "mean_us": round(statistics.mean(samples), 1),
+            "p50_us": round(samples[len(samples) // 2], 1),
+            "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 1)
+        },
+        "errors": len(errors)
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.verbose:
+        for error in errors:
+            print(json.dumps(error))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({**results, "misclassified": errors}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: drug-interaction check for prescriptions of k medications.
+
+Builds --prescriptions random prescriptions per k from the database's own
+names (generic, brand and combination products, with dosage and form
+text around them) and times InteractionIndex.check on each:
+
+  cold   first check of a prescription, names not yet resolved
+  warm   the same prescription again, names served from the resolve cache
+
+    cd backend
+    python -m benchmarks.bench_interactions --sizes 2 5 10 20
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.services.interaction_service import InteractionIndex
+
+FORMS = ["Tab. {} {}mg", "{} {}", "Cap {} {} mg", "{}-{}", "Syp. {} {}ml"]
+
+
+def prescription(names, size, rng):
+    return [
+        {"name": rng.choice(FORMS).format(name.title(), rng.choice([5, 10, 20, 40, 50, 250, 500, 650])), "dosage": "1 tab"}
+        for name in rng.sample(names, size)
+    ]
+
+
+def time_checks(index, prescriptions):
+    samples = []
+    warnings = 0
+    for medications in prescriptions:
+        started = time.perf_counter()
+        warnings += len(index.check(medications))
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.mean(samples), 1),
+        "p99_us": round(samples[int(len(samples) * 0.99) - 1], 1),
+        "warnings_per_prescription": round(warnings / len(prescriptions), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", type=int, default=[2, 5, 10, 20])
+    parser.add_argument("--prescriptions", type=int, default=2000, help="prescriptions per size")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = InteractionIndex()
+    load_ms = (time.perf_counter() - started) * 1000
+    names = index.matcher.patterns
+    rng = random.Random(7)
+
+    cases = []
+    for size in args.sizes:
+        prescriptions = [prescription(names, size, rng) for _ in range(args.prescriptions)]
+        index._resolved.clear()
+        cold = time_checks(index, prescriptions)
+        warm = time_checks(index, prescriptions)
+        cases.append({"medications": size, "cold": cold, "warm": warm})
+
+    results = {
+        "benchmark": "interactions",
+        "ingredients": len(index.ingredients),
+        "names": len(names),
+        "interacting_pairs": len(index._pairs),
+        "load_ms": round(load_ms, 1),
+        "cases": cases
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""
+Load test: boots app.main under uvicorn against local stand-ins for every
+upstream (Gemini, Nominatim, Twilio, ElevenLabs, Google STT, PharmEasy)
+and drives weighted, mixed traffic across the chat, medical, emergency,
+appointments and voice routers.
+
+    cd backend
+    python -m benchmarks.bench_load --duration 30 --concurrency 16 --output load.json
+    python -m benchmarks.bench_load --error-rate 0.05 --latency gemini=1500 nominatim=400
+    python -m benchmarks.bench_load --compare load-main.json --output load.json
+
+Two phases run against one server process:
+
+  mixed      every scenario at once, weighted like real traffic, for --duration
+  isolated   each scenario alone for --isolated-requests, so the server's
+             RSS growth and peak can be attributed to one endpoint
+
+Per endpoint it reports throughput, p50/p95/p99 latency, error counts and
+server RSS. Results are JSON; --compare flags p95/throughput regressions
+against an earlier run and exits non-zero when any are found. Use
+--env KEY=VALUE to run the app with non-default settings.
+"""
+import argparse
+import base64
+import io
+import json
+import math
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import requests
+
+from benchmarks.fake_upstreams.elevenlabs import FakeElevenLabs
+from benchmarks.fake_upstreams.gemini import FakeGemini
+from benchmarks.fake_upstreams.google_stt import FakeGoogleSTT
+from benchmarks.fake_upstreams.nominatim import FakeNominatim
+from benchmarks.fake_upstreams.pharmeasy import FakePharmEasy
+from benchmarks.fake_upstreams.twilio import FakeTwilio
+
+# Typical upstream latencies (ms) seen from a server in-region
+UPSTREAMS = {
+    "gemini": (FakeGemini, 700),
+    "nominatim": (FakeNominatim, 180),
+    "twilio": (FakeTwilio, 150),
+    "elevenlabs": (FakeElevenLabs, 350),
+    "google_stt": (FakeGoogleSTT, 300),
+    "pharmeasy": (FakePharmEasy, 90),
+}
+
+CHAT_MESSAGES = [
+    "I have a headache and feel a bit dizzy, what should I do?",
+    "Is it safe to take ibuprofen on an empty stomach?",
+    "My child has a runny nose and a mild fever",
+    "find hospitals near me",
+    "What are the side effects of cetirizine?",
+    "I cut my finger while cooking, how do I clean it?",
+    "hi",
+]
+SYMPTOMS = [
+    "sore throat and mild fever since yesterday",
+    "lower back pain after lifting boxes",
+    "itchy eyes and sneezing every morning",
+    "upset stomach and loose motions since last night",
+]
+MEDICINES = ["Dolo 650", "Crocin Advance", "Paracetamol 500mg", "Brufen 400", "Cetzine 10mg", "Vitamin Z"]
+LOCATIONS = [(40.7128, -74.0060), (19.0760, 72.8777), (12.9716, 77.5946), (51.5072, -0.1276)]
+# 1x1 PNG
+PRESCRIPTION_IMAGE = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+
+def speech_sample(seconds=2.0, rate=16000):
+    """Half a second of silence either side of a tone, as mono 16-bit WAV"""
+    frames = []
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        speaking = 0.5 <= t < seconds - 0.5
+        frames.append(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * t)) if speaking else 0))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"".join(frames))
+    return buffer.getvalue()
+
+
+SPEECH_SAMPLE = speech_sample()
+
+
+# Scenario: (endpoint label, weight, builder(rng, worker) -> (method, path, requests kwargs))
+def chat_text(rng, worker):
+    lat, lon = rng.choice(LOCATIONS)
+    body = {"message": rng.choice(CHAT_MESSAGES), "user_id": f"load-{worker}", "session_id": f"load-{worker}",
+            "latitude": lat, "longitude": lon}
+    return "POST", "/api/chat/text", {"json": body}
+
+
+def analyze_symptoms(rng, worker):
+    body = {"symptoms": rng.choice(SYMPTOMS), "user_id": f"load-{worker}", "age": 34, "gender": "female"}
+    return "POST", "/api/medical/analyze-symptoms", {"json": body}
+
+
+def analyze_prescription(rng, worker):
+    return "POST", "/api/medical/analyze-prescription", {"files": {"file": ("rx.png", PRESCRIPTION_IMAGE, "image/png")}}
+
+
+def medicine_search(rng, worker):
+    return "GET", "/api/medical/medicines/search", {"params": {"query": rng.choice(["para", "pain", "allergy", "amox"])}}
+
+
+def medicine_price(rng, worker):
+    return "GET", "/api/medical/medicines/price", {"params": {"name": rng.choice(MEDICINES)}}
+
+
+def nearby_hospitals(rng, worker):
+    lat, lon = rng.choice(LOCATIONS)
+    return "GET", "/api/emergency/hospitals/nearby", {"params": {"latitude": lat, "longitude": lon, "session_id": f"load-{worker}"}}
+
+
+def ambulance(rng, worker):
+    lat, lon = rng.choice(LOCATIONS)
+    body = {"user_id": f"load-{worker}", "location": f"{lat}, {lon}", "symptoms": "chest pain and sweating",
+            "contact_number": "+15550100", "patient_name": "Load Test"}
+    return "POST", "/api/emergency/ambulance", {"json": body}
+
+
+def book_appointment(rng, worker):
+    body = {"hospital_id": rng.choice([1, 2, 3]), "user_id": f"load-{worker}", "user_name": "Load Test",
+            "user_phone": "+15550100", "symptoms": rng.choice(SYMPTOMS),
+            "preferred_time": f"tomorrow {rng.randint(9, 16)}:{rng.choice(['00', '15', '30', '45'])}"}
+    return "POST", "/api/appointments/book", {"json": body}
+
+
+def appointment_availability(rng, worker):
+    day = time.strftime("%Y-%m-%d", time.localtime(time.time() + 86400 * rng.randint(1, 7)))
+    return "GET", "/api/appointments/availability", {"params": {"hospital_id": rng.choice([1, 2, 3]), "date": day}}
+
+
+def emergency_contacts(rng, worker):
+    return "GET", "/api/appointments/emergency-contacts", {}
+
+
+def list_voices(rng, worker):
+    return "GET", "/api/voice/voices", {}
+
+
+def text_to_speech(rng, worker):
+    return "POST", "/api/voice/text-to-speech", {"params": {"text": rng.choice(CHAT_MESSAGES), "voice_id": "Rachel"}}
+
+
+def speech_to_text(rng, worker):
+    return "POST", "/api/voice/speech-to-text", {"files": {"audio_file": ("speech.wav", SPEECH_SAMPLE, "audio/wav")}}
+
+
+SCENARIOS = [
+    ("POST /api/chat/text", 30, chat_text),
+    ("POST /api/medical/analyze-symptoms", 8, analyze_symptoms),
+    ("POST /api/medical/analyze-prescription", 3, analyze_prescription),
+    ("GET /api/medical/medicines/search", 5, medicine_search),
+    ("GET /api/medical/medicines/price", 10, medicine_price),
+    ("GET /api/emergency/hospitals/nearby", 12, nearby_hospitals),
+    ("POST /api/emergency/ambulance", 2, ambulance),
+    ("POST /api/appointments/book", 4, book_appointment),
+    ("GET /api/appointments/availability", 6, appointment_availability),
+    ("GET /api/appointments/emergency-contacts", 4, emergency_contacts),
+    ("GET /api/voice/voices", 8, list_voices),
+    ("POST /api/voice/text-to-speech", 6, text_to_speech),
+    ("POST /api/voice/speech-to-text", 4, speech_to_text),
+]
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(s["ms"] for s in samples)
+    statuses = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    errors = sum(1 for s in samples if s["status"] == "error" or s["status"] >= 500)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 1) if latencies else None,
+        "max_ms": round(latencies[-1], 1) if latencies else None,
+    }
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MB (Linux /proc); None elsewhere"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+class RssMonitor:
+    """Samples the server's RSS in the background; window() reports start/peak/end"""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.current = rss_mb(pid)
+        self.peak = self.current
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, name="rss-monitor", daemon=True).start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            value = rss_mb(self.pid)
+            if value is not None:
+                self.current = value
+                self.peak = max(self.peak or 0, value)
+
+    def begin(self):
+        self.peak = self.current = rss_mb(self.pid)
+        return self.current
+
+    def window(self, start):
+        end = rss_mb(self.pid)
+        if start is None or end is None:
+            return {"start_mb": start, "peak_mb": self.peak, "end_mb": end}
+        return {"start_mb": start, "peak_mb": max(self.peak, end), "end_mb": end, "growth_mb": round(end - start, 1)}
+
+    def stop(self):
+        self._stop.set()
+
+
+def run_phase(base_url, scenarios, concurrency, duration=None, total=None, seed=0, timeout=60):
+    """
+    Drive traffic from `concurrency` workers until `duration` seconds pass or
+    `total` requests are sent. Returns per-scenario samples and elapsed time.
+    """
+    labels = [s[0] for s in scenarios]
+    weights = [s[1] for s in scenarios]
+    builders = {s[0]: s[2] for s in scenarios}
+    samples = {label: [] for label in labels}
+    lock = threading.Lock()
+    sent = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        # Each worker is its own client for per-client admission limits
+        session.headers["X-Load-Client"] = f"load-{index}"
+        while True:
+            with lock:
+                if (total is not None and sent[0] >= total) or (deadline and time.perf_counter() >= deadline):
+                    return
+                sent[0] += 1
+            label = rng.choices(labels, weights)[0]
+            method, path, kwargs = builders[label](rng, index)
+            started = time.perf_counter()
+            try:
+                status = session.request(method, base_url + path, timeout=timeout, **kwargs).status_code
+            except requests.RequestException:
+                status = "error"
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                samples[label].append({"ms": elapsed, "status": status})
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), name=f"load-{i}") for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - started
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_upstreams(latency_overrides, error_rate, jitter_pct, seed):
+    upstreams = {}
+    for name, (cls, default_latency) in UPSTREAMS.items():
+        latency = latency_overrides.get(name, default_latency)
+        upstreams[name] = cls(latency_ms=latency, jitter_ms=latency * jitter_pct / 100,
+                              error_rate=error_rate, seed=seed).start()
+    return upstreams
+
+
+def app_environment(upstreams, data_dir, overrides):
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_API_KEY": "load-test",
+        "GEMINI_API_ENDPOINT": upstreams["gemini"].base_url,
+        "NOMINATIM_URL": upstreams["nominatim"].base_url,
+        "TWILIO_ACCOUNT_SID": "AC" + "0" * 32,
+        "TWILIO_AUTH_TOKEN": "load-test",
+        "TWILIO_PHONE_NUMBER": "+15550199",
+        "TWILIO_API_BASE_URL": upstreams["twilio"].base_url,
+        "USER_PHONE_NUMBER": "+15550100",
+        "ELEVENLABS_API_KEY": "load-test",
+        "ELEVENLABS_API_URL": upstreams["elevenlabs"].base_url,
+        "GOOGLE_STT_URL": upstreams["google_stt"].base_url + "/speech-api/v2/recognize",
+        "PHARMEASY_BASE_URL": upstreams["pharmeasy"].base_url,
+        "NEXUS_DATA_DIR": data_dir,
+        # No browsers: buy-medicine flows are out of scope, price lookups stay on HTTP
+        "SHOPPING_BROWSER_PREWARM": "false",
+        "ADMISSION_CLIENT_HEADER": "x-load-client",
+    })
+    env.update(overrides)
+    return env
+
+
+def start_server(env, port, startup_timeout=60):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited during startup with code {process.returncode}")
+        try:
+            if requests.get(base_url + "/", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not start in time")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, threshold_pct):
+    """p95 latency up or throughput down by more than threshold_pct, per endpoint"""
+    regressions = []
+    old_endpoints = baseline.get("mixed", {}).get("endpoints", {})
+    for label, new in results["mixed"]["endpoints"].items():
+        old = old_endpoints.get(label)
+        if not old or not old.get("requests") or not new.get("requests"):
+            continue
+        if old.get("p95_ms") and new.get("p95_ms"):
+            change = 100 * (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"]
+            if change > threshold_pct:
+                regressions.append({"endpoint": label, "metric": "p95_ms", "baseline": old["p95_ms"],
+                                    "current": new["p95_ms"], "change_pct": round(change, 1)})
+        if old.get("throughput_rps"):
+            change = 100 * (new["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"]
+            if change < -threshold_pct:
+                regressions.append({"endpoint": label, "metric": "throughput_rps", "baseline": old["throughput_rps"],
+                                    "current": new["throughput_rps"], "change_pct": round(change, 1)})
+    return {"baseline_commit": baseline.get("commit"), "threshold_pct": threshold_pct, "regressions": regressions}
+
+
+def parse_pairs(pairs, cast=str):
+    parsed = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        if not value:
+            raise SystemExit(f"expected KEY=VALUE, got {pair!r}")
+        parsed[key] = cast(value)
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of mixed traffic")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="requests sent (and discarded) before measuring")
+    parser.add_argument("--isolated-requests", type=int, default=30, help="requests per endpoint in the isolated phase; 0 skips it")
+    parser.add_argument("--latency", nargs="*", metavar="UPSTREAM=MS", help=f"upstream latency overrides ({', '.join(UPSTREAMS)})")
+    parser.add_argument("--jitter-pct", type=float, default=20, help="upstream latency jitter, percent of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument("--env", nargs="*", metavar="KEY=VALUE", help="extra environment for the app")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--regression-pct", type=float, default=15, help="change that counts as a regression")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    latency_overrides = parse_pairs(args.latency, float)
+    unknown = set(latency_overrides) - set(UPSTREAMS)
+    if unknown:
+        raise SystemExit(f"unknown upstreams: {', '.join(sorted(unknown))}")
+
+    upstreams = start_upstreams(latency_overrides, args.error_rate, args.jitter_pct, args.seed)
+    data_dir = tempfile.mkdtemp(prefix="nexus-load-")
+    process, base_url = start_server(app_environment(upstreams, data_dir, parse_pairs(args.env)), free_port())
+    monitor = RssMonitor(process.pid)
+    try:
+        if args.warmup:
+            run_phase(base_url, SCENARIOS, args.concurrency, total=args.warmup, seed=args.seed)
+
+        rss_start = monitor.begin()
+        samples, elapsed = run_phase(base_url, SCENARIOS, args.concurrency, duration=args.duration, seed=args.seed + 1)
+        all_samples = [s for label_samples in samples.values() for s in label_samples]
+        mixed = {
+            "duration_s": round(elapsed, 2),
+            "concurrency": args.concurrency,
+            "overall": summarize(all_samples, elapsed),
+            "rss": monitor.window(rss_start),
+            "endpoints": {label: summarize(label_samples, elapsed) for label, label_samples in samples.items()}
+        }
+
+        isolated = {}
+        for scenario in SCENARIOS if args.isolated_requests else []:
+            rss_start = monitor.begin()
+            samples, elapsed = run_phase(base_url, [scenario], args.concurrency, total=args.isolated_requests, seed=args.seed + 2)
+            isolated[scenario[0]] = {**summarize(samples[scenario[0]], elapsed), "rss": monitor.window(rss_start)}
+    finally:
+        monitor.stop()
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        for upstream in upstreams.values():
+            upstream.stop()
+
+    results = {
+        "benchmark": "load",
+        "commit": git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "duration_s": args.duration, "concurrency": args.concurrency, "warmup": args.warmup,
+            "isolated_requests": args.isolated_requests, "error_rate": args.error_rate,
+            "jitter_pct": args.jitter_pct, "seed": args.seed, "env": parse_pairs(args.env)
+        },
+        "upstreams": {name: {"latency_ms": upstream.latency_ms, **upstream.stats()} for name, upstream in upstreams.items()},
+        "mixed": mixed,
+        "isolated": isolated
+    }
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            results["comparison"] = compare(results, json.load(f), args.regression_pct)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if results.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
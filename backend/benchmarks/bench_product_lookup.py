@@ -0,0 +1,106 @@
+"""
+Benchmark: HTTP-first product lookup vs. the Selenium search/select path.
+
+Both paths run against the local PharmEasy fixture, so the numbers
+measure our own overhead plus the simulated upstream latency.
+
+    cd backend
+    python -m benchmarks.bench_product_lookup --runs 20 --latency-ms 80
+
+The browser path needs Chrome + ChromeDriver; it is reported as skipped
+when they are unavailable.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from benchmarks.fake_upstreams.pharmeasy import FakePharmEasy
+
+MEDICINES = ["Dolo 650", "Crocin Advance", "Paracetamol 500mg", "Brufen 400", "Cetzine 10mg", "Mox 500"]
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 1),
+        "p50_ms": round(ordered[len(ordered) // 2], 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max_ms": round(ordered[-1], 1)
+    }
+
+
+def bench_http(base_url, runs):
+    from app.agents.product_lookup import ProductLookup
+
+    lookup = ProductLookup(base_url)
+    samples, misses = [], 0
+    for i in range(runs):
+        started = time.perf_counter()
+        product = lookup.find_product(MEDICINES[i % len(MEDICINES)])
+        samples.append((time.perf_counter() - started) * 1000)
+        misses += product is None
+    return {**summarize(samples), "misses": misses}
+
+
+def bench_browser(runs):
+    try:
+        from app.agents.shopping_agent import ShoppingAgent
+        agent = ShoppingAgent()
+        agent.pool.size = 1
+        agent.pool.resolve_driver_path()
+        agent.pool.start()
+        if agent.pool._idle.empty():
+            raise RuntimeError("Chrome failed to launch")
+    except Exception as e:
+        return {"skipped": f"browser unavailable: {str(e)}"}
+
+    samples, misses = [], 0
+    try:
+        for i in range(runs):
+            with agent.pool.checkout() as driver:
+                started = time.perf_counter()
+                agent._search_medicine(driver, MEDICINES[i % len(MEDICINES)])
+                result = agent._select_product(driver)
+                samples.append((time.perf_counter() - started) * 1000)
+                misses += not result["success"]
+    finally:
+        agent.pool.close()
+    return {**summarize(samples), "misses": misses} if samples else {"skipped": "no browser runs completed"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated upstream latency per request")
+    parser.add_argument("--hydration-ms", type=int, default=300, help="client-side render delay of search results")
+    parser.add_argument("--skip-browser", action="store_true")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    fixture = FakePharmEasy(latency_ms=args.latency_ms, hydration_ms=args.hydration_ms).start()
+    os.environ["PHARMEASY_BASE_URL"] = fixture.base_url
+    try:
+        results = {
+            "benchmark": "product_lookup",
+            "latency_ms": args.latency_ms,
+            "hydration_ms": args.hydration_ms,
+            "http": bench_http(fixture.base_url, args.runs),
+            "browser": {"skipped": "--skip-browser"} if args.skip_browser else bench_browser(args.runs)
+        }
+    finally:
+        fixture.stop()
+
+    if "mean_ms" in results["browser"]:
+        results["speedup"] = round(results["browser"]["mean_ms"] / results["http"]["mean_ms"], 1)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
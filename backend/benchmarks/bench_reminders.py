@@ -0,0 +1,121 @@
+"""
+Benchmark: reminder scheduler at scale.
+
+Fills a fresh database with --pending reminders spread over the next
+--days, then measures:
+
+  insert      bulk scheduling throughput (rows/s)
+  cold_start  a new scheduler's first tick on the populated database: the
+              index range scan that loads only the lookahead window
+  tick        firing one batch of reminders that share a due time, and
+              rescheduling them
+  cancel      single-row cancellation
+
+    cd backend
+    python -m benchmarks.bench_reminders --pending 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from app.services.reminder_service import ReminderNotifier, ReminderScheduler
+
+
+class CountingNotifier(ReminderNotifier):
+    def __init__(self):
+        self.batches = []
+
+    def deliver(self, reminders):
+        self.batches.append(len(reminders))
+
+
+def make_rows(count, start, days, rng):
+    for _ in range(count):
+        yield {
+            "id": f"REM-{uuid.uuid4().hex[:12].upper()}",
+            "user_id": f"user-{rng.randrange(count // 3 + 1)}",
+            "phone": None,
+            "medication": rng.choice(["Paracetamol 500mg", "Amoxicillin 500mg", "Cetirizine 10mg", "Metformin 500mg"]),
+            "dosage": "1 tablet",
+            "frequency": "twice daily",
+            "instructions": None,
+            # Real schedules cluster on round minutes
+            "next_fire_at": start + rng.randrange(int(days * 86400 / 60)) * 60,
+            "interval_seconds": 86400,
+            "remaining": rng.randint(1, 30),
+            "status": "active",
+            "created_at": start,
+            "last_fired_at": None
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pending", type=int, default=1000000)
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--batch", type=int, default=10000, help="rows per insert transaction")
+    parser.add_argument("--due-now", type=int, default=500, help="reminders sharing the measured tick")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    path = os.path.join(tempfile.mkdtemp(prefix="nexus-reminders-"), "reminders.db")
+    now = time.time()
+    # Start the spread one lookahead out so the measured tick holds exactly --due-now reminders
+    start = now + 600
+
+    scheduler = ReminderScheduler(path, notifier=CountingNotifier())
+    started = time.perf_counter()
+    rows = make_rows(args.pending, start, args.days, rng)
+    while True:
+        chunk = [row for _, row in zip(range(args.batch), rows)]
+        if not chunk:
+            break
+        scheduler.add(chunk)
+    insert_s = time.perf_counter() - started
+
+    due = [dict(row, next_fire_at=now) for row in make_rows(args.due_now, now, 1, rng)]
+    scheduler.add(due)
+    db_mb = os.path.getsize(path) / 1e6
+
+    notifier = CountingNotifier()
+    cold = ReminderScheduler(path, notifier=notifier)
+    started = time.perf_counter()
+    cold._refill(now)
+    cold_start_ms = (time.perf_counter() - started) * 1000
+    heap_size = len(cold._heap)
+
+    started = time.perf_counter()
+    fired = cold.run_once(now)
+    tick_ms = (time.perf_counter() - started) * 1000
+
+    ids = [row["id"] for row in rng.sample(due, min(200, len(due)))]
+    samples = []
+    for reminder_id in ids:
+        t = time.perf_counter()
+        cold.cancel(reminder_id)
+        samples.append((time.perf_counter() - t) * 1e6)
+
+    results = {
+        "benchmark": "reminders",
+        "pending": args.pending + args.due_now,
+        "db_mb": round(db_mb, 1),
+        "insert": {"seconds": round(insert_s, 2), "rows_per_second": round(args.pending / insert_s)},
+        "cold_start": {"ms": round(cold_start_ms, 1), "heap_entries": heap_size,
+                       "lookahead_seconds": cold.lookahead},
+        "tick": {"ms": round(tick_ms, 1), "fired": fired, "batches": notifier.batches},
+        "cancel": {"mean_us": round(statistics.mean(samples), 1), "max_us": round(max(samples), 1)}
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: per-turn input tokens and latency of the medical prompt delivered
+three ways, over typical chat session lengths.
+
+  history             the old way: prompt (indented, as it sat in the class)
+                      is the first "user" message of every session history
+  system_instruction  prompt passed once as the model's system instruction
+  context_cache       system instruction served from a shared context cache;
+                      cached tokens are billed at a discount and not re-prefilled
+
+    cd backend
+    python -m benchmarks.bench_system_prompt
+    python -m benchmarks.bench_system_prompt --live --turns 1 5    # needs GEMINI_API_KEY
+
+Offline, tokens are estimated (~4 characters per token) and latency is
+modelled as base + prefill cost per uncached input token. --live counts
+tokens with the API and times real generate_content calls instead.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import textwrap
+import time
+
+from app.services.gemini_service import MEDICAL_PROMPT
+
+USER_TURNS = [
+    "I have had a sore throat and a mild fever since yesterday.",
+    "It's about 100F. Should I take something for it?",
+    "Is it okay to take paracetamol with ginger tea?",
+    "My throat hurts more at night, what else can I do?",
+    "How long before I should see a doctor if it doesn't improve?",
+]
+MODEL_REPLY = (
+    "I'm sorry you're feeling unwell. For a sore throat with a mild fever you can take "
+    "[MED:Paracetamol 500mg] every 6 hours as needed, drink warm fluids and rest. "
+    "Gargling with warm salt water can ease the pain. If the fever goes above 102F, "
+    "lasts more than 3 days, or you have trouble swallowing or breathing, please see a doctor."
+)
+LEGACY_PROMPT = textwrap.indent(MEDICAL_PROMPT, " " * 8)
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / 4)
+
+
+def session(turns, legacy):
+    """Contents sent on the final turn of a session of the given length"""
+    history = [{"role": "user", "parts": [LEGACY_PROMPT]}] if legacy else []
+    for i in range(turns):
+        history.append({"role": "user", "parts": [USER_TURNS[i % len(USER_TURNS)]]})
+        if i < turns - 1:
+            history.append({"role": "model", "parts": [MODEL_REPLY]})
+    return history
+
+
+def offline(turns_list, base_ms, prefill_ms_per_1k, cache_discount, cache_min_tokens):
+    prompt_tokens = estimate_tokens(MEDICAL_PROMPT)
+    cacheable = prompt_tokens >= cache_min_tokens
+    results = []
+    for turns in turns_list:
+        # Average over every turn of the session, not just the last one
+        per_turn = {"history": [], "system_instruction": [], "context_cache": []}
+        for turn in range(1, turns + 1):
+            history_tokens = sum(estimate_tokens(p) for item in session(turn, legacy=False) for p in item["parts"])
+            legacy_tokens = history_tokens + estimate_tokens(LEGACY_PROMPT)
+            per_turn["history"].append((legacy_tokens, legacy_tokens))
+            per_turn["system_instruction"].append((history_tokens + prompt_tokens, history_tokens + prompt_tokens))
+            if cacheable:
+                billed = history_tokens + prompt_tokens * cache_discount
+                per_turn["context_cache"].append((billed, history_tokens))
+            else:
+                per_turn["context_cache"].append((history_tokens + prompt_tokens, history_tokens + prompt_tokens))
+
+        row = {"turns": turns}
+        for mode, samples in per_turn.items():
+            billed = statistics.mean(s[0] for s in samples)
+            prefilled = statistics.mean(s[1] for s in samples)
+            row[mode] = {
+                "input_tokens_per_turn": round(billed, 1),
+                "prefilled_tokens_per_turn": round(prefilled, 1),
+                "modelled_latency_ms": round(base_ms + prefilled / 1000 * prefill_ms_per_1k, 1)
+            }
+        for mode in ("system_instruction", "context_cache"):
+            row[mode]["token_reduction_pct"] = round(
+                100 * (1 - row[mode]["input_tokens_per_turn"] / row["history"]["input_tokens_per_turn"]), 1)
+        results.append(row)
+    return {"prompt_tokens": prompt_tokens, "legacy_prompt_tokens": estimate_tokens(LEGACY_PROMPT),
+            "context_cache_applicable": cacheable, "sessions": results}
+
+
+def live(turns_list, model_name):
+    import google.generativeai as genai
+    from app.services.llm_gateway import SystemPromptCache
+
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    plain = genai.GenerativeModel(model_name)
+    with_system = genai.GenerativeModel(model_name, system_instruction=MEDICAL_PROMPT)
+    cached = SystemPromptCache(ttl=600, retry_after=600, min_tokens=0).model(model_name, MEDICAL_PROMPT)
+    modes = {"history": (plain, True), "system_instruction": (with_system, False)}
+    if cached:
+        modes["context_cache"] = (cached, False)
+
+    results = []
+    for turns in turns_list:
+        row = {"turns": turns}
+        for mode, (model, legacy) in modes.items():
+            contents = session(turns, legacy)
+            started = time.perf_counter()
+            response = model.generate_content(contents)
+            elapsed = (time.perf_counter() - started) * 1000
+            usage = response.usage_metadata
+            row[mode] = {
+                "input_tokens": usage.prompt_token_count,
+                "cached_tokens": getattr(usage, "cached_content_token_count", 0),
+                "latency_ms": round(elapsed, 1)
+            }
+        results.append(row)
+    return {"model": model_name, "context_cache_applicable": cached is not None, "sessions": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--base-ms", type=float, default=350, help="modelled fixed latency per call")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=120, help="modelled prefill cost per 1k input tokens")
+    parser.add_argument("--cache-discount", type=float, default=0.25, help="billing factor for cached tokens")
+    parser.add_argument("--cache-min-tokens", type=int, default=4096, help="smallest prompt the API will cache")
+    parser.add_argument("--live", action="store_true", help="call the real API (needs GEMINI_API_KEY)")
+    parser.add_argument("--model", default="gemini-2.0-flash")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    if args.live:
+        results = {"benchmark": "system_prompt", "mode": "live", **live(args.turns, args.model)}
+    else:
+        results = {"benchmark": "system_prompt", "mode": "offline",
+                   **offline(args.turns, args.base_ms, args.prefill_ms_per_1k, args.cache_discount, args.cache_min_tokens)}
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: red-flag triage with the Aho-Corasick automaton vs. a
+naive per-phrase substring scan over the same lexicon.
+
+    cd backend
+    python -m benchmarks.bench_triage --messages 2000
+
+The naive scan does one `phrase in text` pass per lexicon phrase (what
+the old keyword lists did); the automaton reads each message once.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.services.triage_service import TriageEngine, normalize_text
+
+FILLER = [
+    "I have had a mild cold for two days and my nose is running",
+    "since yesterday evening I feel tired and my throat is a little sore",
+    "my son is coughing at night, no fever though",
+    "mujhe kal se sar mein halka dard hai aur thakaan hai",
+    "tengo tos y un poco de congestion desde el lunes",
+    "after dinner there was some acidity and bloating",
+]
+SYMPTOMS = [
+    "chest pain spreading to my left arm",
+    "no chest pain, but I can't breathe properly",
+    "high fever and a stiff neck",
+    "seene mein dard hai",
+    "dolor de pecho y sudor frio",
+    "persistent vomiting since morning",
+]
+
+
+def build_messages(count, seed=7):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        parts = rng.sample(FILLER, rng.randint(1, 4))
+        if rng.random() < 0.3:
+            parts.insert(rng.randint(0, len(parts)), rng.choice(SYMPTOMS))
+        messages.append(". ".join(parts))
+    return messages
+
+
+def time_per_message(fn, messages):
+    samples = []
+    for message in messages:
+        started = time.perf_counter()
+        fn(message)
+        samples.append((time.perf_counter() - started) * 1e6)
+    ordered = sorted(samples)
+    return {
+        "mean_us": round(statistics.mean(ordered), 1),
+        "p50_us": round(ordered[len(ordered) // 2], 1),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = TriageEngine()
+    build_ms = (time.perf_counter() - started) * 1000
+    phrases = engine.matcher.patterns
+
+    def naive(message):
+        text = normalize_text(message)
+        return [phrase for phrase in phrases if phrase in text]
+
+    def automaton(message):
+        return list(engine.matcher.iter_matches(normalize_text(message)))
+
+    messages = build_messages(args.messages)
+    results = {
+        "benchmark": "triage",
+        "phrases": len(phrases),
+        "messages": len(messages),
+        "build_ms": round(build_ms, 1),
+        "naive_scan": time_per_message(naive, messages),
+        "aho_corasick": time_per_message(automaton, messages),
+        "full_assess": time_per_message(engine.assess, messages)
+    }
+    results["speedup"] = round(results["naive_scan"]["mean_us"] / results["aho_corasick"]["mean_us"], 1)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Benchmark: server memory per upload.
+
+Boots app.main under uvicorn against the load test's fake upstreams and
+sends --concurrency simultaneous uploads of each size to
+
+  image   POST /api/medical/analyze-prescription
+  audio   POST /api/voice/speech-to-text
+
+For every case it reports the server process's peak RSS above its idle
+baseline (VmHWM, reset between cases through /proc/<pid>/clear_refs),
+divided per upload, and finally checks that a body over the limit is
+refused with 413.
+
+    cd backend
+    python -m benchmarks.bench_uploads --image-mb 1 4 9 --audio-mb 1 4 16 --concurrency 4
+
+Audio normalization runs in the voice worker pool, which is a separate
+process and is not part of the measured RSS.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+
+import requests
+
+from benchmarks.bench_load import app_environment, free_port, git_commit, parse_pairs, rss_mb, start_server, start_upstreams
+
+
+def read_status_kb(pid, field):
+    with open(f"/proc/{pid}/status", "r") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return None
+
+
+def reset_peak(pid):
+    """Reset VmHWM to the current RSS; False where the kernel doesn't allow it"""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class PeakSampler:
+    """Fallback when VmHWM can't be reset: poll VmRSS and keep the maximum"""
+
+    def __init__(self, pid, interval=0.02):
+        self.pid = pid
+        self.interval = interval
+        self.peak = rss_mb(pid) or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-peak", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb(self.pid) or 0)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.peak
+
+
+def image_payload(size_bytes):
+    # Incompressible, so nothing downstream can shrink it
+    return os.urandom(size_bytes)
+
+
+def audio_payload(size_bytes, rate=16000):
+    """Tone bursts separated by silence, as mono 16-bit WAV of about size_bytes"""
+    seconds = size_bytes / (rate * 2)
+    period = [struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / rate))) for i in range(rate)]
+    silence = b"\x00\x00" * rate
+    second_blocks = [b"".join(period) if s % 3 else silence for s in range(int(math.ceil(seconds)))]
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"".join(second_blocks)[:size_bytes])
+    return buffer.getvalue()
+
+
+def upload(base_url, kind, payload, worker, timeout=300):
+    if kind == "image":
+        url = base_url + "/api/medical/analyze-prescription"
+        files = {"file": ("rx.png", payload, "image/png")}
+    else:
+        url = base_url + "/api/voice/speech-to-text"
+        files = {"audio_file": ("speech.wav", payload, "audio/wav")}
+    try:
+        return requests.post(url, files=files, headers={"X-Load-Client": f"upload-{worker}"}, timeout=timeout).status_code
+    except requests.RequestException:
+        return "error"
+
+
+def run_case(base_url, pid, kind, size_mb, concurrency):
+    payload = image_payload(int(size_mb * 1024 * 1024)) if kind == "image" else audio_payload(int(size_mb * 1024 * 1024))
+    # Let the previous case's buffers go before taking the baseline
+    time.sleep(1)
+    baseline_mb = rss_mb(pid)
+    exact = reset_peak(pid)
+    sampler = None if exact else PeakSampler(pid)
+
+    statuses = []
+    lock = threading.Lock()
+
+    def worker(index):
+        status = upload(base_url, kind, payload, index)
+        with lock:
+            statuses.append(status)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    peak_mb = read_status_kb(pid, "VmHWM") / 1024 if exact else sampler.stop()
+    counts = {}
+    for status in statuses:
+        counts[str(status)] = counts.get(str(status), 0) + 1
+    return {
+        "kind": kind,
+        "size_mb": size_mb,
+        "concurrency": concurrency,
+        "statuses": counts,
+        "seconds": round(elapsed, 2),
+        "baseline_mb": baseline_mb,
+        "peak_mb": round(peak_mb, 1),
+        "peak_over_baseline_mb": round(peak_mb - baseline_mb, 1),
+        "per_upload_mb": round((peak_mb - baseline_mb) / concurrency, 2),
+        "per_upload_x_size": round((peak_mb - baseline_mb) / concurrency / size_mb, 2),
+        "peak_method": "vmhwm" if exact else "sampled"
+    }
+
+
+def oversize_check(base_url, pid, limit_mb):
+    """A body one MB over the image limit must be cut off, without the server spooling it"""
+    payload = image_payload(int((limit_mb + 1) * 1024 * 1024))
+    baseline_mb = rss_mb(pid)
+    started = time.perf_counter()
+    status = upload(base_url, "image", payload, "oversize")
+    return {
+        "declared_mb": limit_mb + 1,
+        "status": status,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "rss_growth_mb": round((rss_mb(pid) or 0) - (baseline_mb or 0), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image-mb", nargs="*", type=float, default=[1, 4, 9])
+    parser.add_argument("--audio-mb", nargs="*", type=float, default=[1, 4, 16])
+    parser.add_argument("--concurrency", type=int, default=4, help="simultaneous uploads per case")
+    parser.add_argument("--image-limit-mb", type=float, default=10, help="UPLOAD_MAX_IMAGE_BYTES for the run, in MB")
+    parser.add_argument("--env", nargs="*", metavar="KEY=VALUE", help="extra environment for the app")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args()
+
+    upstreams = start_upstreams({"gemini": 50, "google_stt": 50}, 0.0, 0, 1)
+    data_dir = tempfile.mkdtemp(prefix="nexus-uploads-")
+    overrides = {"UPLOAD_MAX_IMAGE_BYTES": str(int(args.image_limit_mb * 1024 * 1024)), **parse_pairs(args.env)}
+    process, base_url = start_server(app_environment(upstreams, data_dir, overrides), free_port())
+    cases = []
+    try:
+        # First requests pay for imports and the worker pool; keep them out of the numbers
+        upload(base_url, "image", image_payload(1024), "warmup")
+        upload(base_url, "audio", audio_payload(64 * 1024), "warmup")
+        for size_mb in args.image_mb:
+            cases.append(run_case(base_url, process.pid, "image", size_mb, args.concurrency))
+        for size_mb in args.audio_mb:
+            cases.append(run_case(base_url, process.pid, "audio", size_mb, args.concurrency))
+        oversize = oversize_check(base_url, process.pid, args.image_limit_mb)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        for upstream in upstreams.values():
+            upstream.stop()
+
+    results = {
+        "benchmark": "uploads",
+        "commit": git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {"concurrency": args.concurrency, "image_limit_mb": args.image_limit_mb, "env": parse_pairs(args.env)},
+        "cases": cases,
+        "oversize": oversize
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
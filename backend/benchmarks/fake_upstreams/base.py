@@ -0,0 +1,85 @@
+"""
+Shared plumbing for the local upstream stand-ins: a threaded HTTP server on
+127.0.0.1 with per-request latency (plus jitter) and error injection.
+Subclasses implement handle() and return (status, body, content_type).
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import threading
+import random
+import json
+import time
+
+
+class FakeUpstream:
+    name = "upstream"
+    # Status returned for injected failures; 503 is what rate-limited or overloaded APIs send
+    error_status = 503
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0, port: int = 0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                url = urlparse(self.path)
+                status, payload, content_type = fixture._respond(method, url.path, parse_qs(url.query), body, self.headers)
+                if isinstance(payload, str):
+                    payload = payload.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+
+    def _respond(self, method, path, query, body, headers):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+        if fail:
+            return self.error_status, json.dumps({"error": {"code": self.error_status, "message": "injected failure"}}), "application/json"
+        return self.handle(method, path, query, body, headers)
+
+    def handle(self, method, path, query, body, headers):
+        raise NotImplementedError
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> "FakeUpstream":
+        threading.Thread(target=self.server.serve_forever, name=f"fake-{self.name}", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "injected_errors": self.errors}
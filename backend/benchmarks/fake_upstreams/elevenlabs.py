@@ -0,0 +1,31 @@
+"""
+Local stand-in for the ElevenLabs voices and text-to-speech endpoints.
+Point the app at it with ELEVENLABS_API_URL (any ELEVENLABS_API_KEY will do).
+TTS returns silent MPEG frames sized roughly to the text length.
+"""
+import json
+
+from benchmarks.fake_upstreams.base import FakeUpstream
+
+VOICES = [
+    {"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel", "category": "premade"},
+    {"voice_id": "AZnzlk1XvdvUeBnXmlld", "name": "Domi", "category": "premade"},
+    {"voice_id": "EXAVITQu4vr4xnSDxMaL", "name": "Bella", "category": "premade"},
+    {"voice_id": "ErXwobaYiN019PkySvjV", "name": "Antoni", "category": "premade"},
+]
+# One silent 128 kbps MPEG-1 layer III frame (~26 ms of audio)
+SILENT_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+class FakeElevenLabs(FakeUpstream):
+    name = "elevenlabs"
+
+    def handle(self, method, path, query, body, headers):
+        if method == "GET" and path == "/v1/voices":
+            return 200, json.dumps({"voices": VOICES}), "application/json"
+        if method == "POST" and path.startswith("/v1/text-to-speech/"):
+            text = json.loads(body or b"{}").get("text", "")
+            # ~15 characters per second of speech
+            frames = max(1, int(len(text) / 15 / 0.026))
+            return 200, SILENT_FRAME * frames, "audio/mpeg"
+        return 404, json.dumps({"detail": {"status": "not_found"}}), "application/json"
@@ -0,0 +1,74 @@
+"""
+Local stand-in for the Gemini REST API (generateContent, countTokens,
+cachedContents). Point the app at it with GEMINI_API_ENDPOINT.
+
+Replies are canned per kind of prompt: symptom analyses get a structured
+answer, prescription images get the JSON the route parses, and everything
+else gets a short chat answer. Token usage is estimated at
+~4 characters per token so usage metadata looks plausible.
+"""
+import json
+import math
+
+from benchmarks.fake_upstreams.base import FakeUpstream
+
+SYMPTOM_ANALYSIS = (
+    "1. Possible conditions: a mild viral upper respiratory infection.\n"
+    "2. Medications: Paracetamol 500mg every 6 hours as needed for fever and pain.\n"
+    "3. Home care: rest, drink plenty of fluids and gargle with warm salt water.\n"
+    "4. See a doctor if the fever lasts more than 3 days.\n"
+    "5. Red flags: difficulty breathing, chest pain or confusion."
+)
+PRESCRIPTION = {
+    "medications": [{"name": "Amoxicillin 500mg", "dosage": "1 capsule three times a day", "duration": "5 days"}],
+    "doctor": "Dr. A. Sharma",
+    "notes": "Take after meals"
+}
+CHAT_REPLY = (
+    "I'm sorry you're not feeling well. For a mild headache you can take [MED:Paracetamol 500mg] "
+    "and rest in a quiet, dark room. Drink water and avoid screens for a while. If the pain is "
+    "sudden and severe, or comes with confusion or a stiff neck, please see a doctor right away."
+)
+
+
+def _text_of(request: dict) -> str:
+    parts = []
+    for content in request.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                parts.append(part["text"])
+            elif "inlineData" in part or "inline_data" in part:
+                parts.append("<image>")
+    return "\n".join(parts)
+
+
+class FakeGemini(FakeUpstream):
+    name = "gemini"
+    error_status = 429
+
+    def handle(self, method, path, query, body, headers):
+        request = json.loads(body or b"{}")
+        if path.endswith(":countTokens"):
+            return 200, json.dumps({"totalTokens": math.ceil(len(_text_of(request)) / 4)}), "application/json"
+        if path.endswith("/cachedContents"):
+            # Mirrors the real API for prompts below the caching minimum
+            return 400, json.dumps({"error": {"code": 400, "message": "Cached content is too small"}}), "application/json"
+        if not path.endswith(":generateContent"):
+            return 404, json.dumps({"error": {"code": 404, "message": f"Unknown method {path}"}}), "application/json"
+
+        prompt = _text_of(request)
+        if "<image>" in prompt:
+            text = json.dumps(PRESCRIPTION)
+        elif "analyze these symptoms" in prompt:
+            text = SYMPTOM_ANALYSIS
+        else:
+            text = CHAT_REPLY
+        response = {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {
+                "promptTokenCount": math.ceil(len(prompt) / 4),
+                "candidatesTokenCount": math.ceil(len(text) / 4),
+                "totalTokenCount": math.ceil((len(prompt) + len(text)) / 4)
+            }
+        }
+        return 200, json.dumps(response), "application/json"
@@ -0,0 +1,23 @@
+"""
+Local stand-in for the Google Web Speech API used by
+speech_recognition.recognize_google. Point the app at it with GOOGLE_STT_URL.
+"""
+import json
+
+from benchmarks.fake_upstreams.base import FakeUpstream
+
+TRANSCRIPT = "I have had a headache and a mild fever since this morning"
+
+
+class FakeGoogleSTT(FakeUpstream):
+    name = "google_stt"
+
+    def handle(self, method, path, query, body, headers):
+        if method != "POST" or not path.endswith("/recognize"):
+            return 404, "Not found", "text/plain"
+        # The real API streams one JSON object per line, the first one empty
+        lines = [
+            {"result": []},
+            {"result": [{"alternative": [{"transcript": TRANSCRIPT, "confidence": 0.92}], "final": True}], "result_index": 0}
+        ]
+        return 200, "\n".join(json.dumps(line) for line in lines), "application/json; charset=utf-8"
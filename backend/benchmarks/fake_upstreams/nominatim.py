@@ -0,0 +1,47 @@
+"""
+Local stand-in for the Nominatim search, reverse and geocoding endpoints.
+Point the app at it with NOMINATIM_URL. Hospitals are placed on a small
+grid inside whatever viewbox the caller asks for.
+"""
+import json
+
+from benchmarks.fake_upstreams.base import FakeUpstream
+
+HOSPITAL_NAMES = [
+    "City General Hospital", "Community Medical Center", "St. Mary's Hospital",
+    "Apollo Clinic", "Lakeside Multispeciality Hospital", "Sunrise Children's Hospital",
+    "Metro Heart Institute", "QuickCare Clinic"
+]
+
+
+class FakeNominatim(FakeUpstream):
+    name = "nominatim"
+
+    def handle(self, method, path, query, body, headers):
+        if path == "/search":
+            west, south, east, north = (float(v) for v in query.get("viewbox", ["-74.1,40.6,-73.9,40.8"])[0].split(","))
+            limit = int(query.get("limit", ["10"])[0])
+            if query.get("q", [""])[0].lower() != "hospital":
+                # Free-text geocoding of an address
+                return 200, json.dumps([self._place(0, (south + north) / 2, (west + east) / 2, "Geocoded address")]), "application/json"
+            results = []
+            for i, name in enumerate(HOSPITAL_NAMES[:limit]):
+                lat = south + (north - south) * ((i % 4) + 1) / 5
+                lon = west + (east - west) * ((i // 4) + 1) / 3
+                results.append(self._place(1000 + i, lat, lon, name))
+            return 200, json.dumps(results), "application/json"
+        if path == "/reverse":
+            lat, lon = float(query.get("lat", ["0"])[0]), float(query.get("lon", ["0"])[0])
+            return 200, json.dumps(self._place(1, lat, lon, "Reverse geocoded location")), "application/json"
+        return 404, json.dumps({"error": "not found"}), "application/json"
+
+    @staticmethod
+    def _place(place_id, lat, lon, name):
+        return {
+            "place_id": place_id,
+            "lat": f"{lat:.6f}",
+            "lon": f"{lon:.6f}",
+            "name": name,
+            "display_name": f"{name}, 12 Example Road, Test City",
+            "address": {"city": "Test City", "country": "Testland"}
+        }
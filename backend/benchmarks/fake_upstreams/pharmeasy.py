@@ -0,0 +1,84 @@
+"""
+Local stand-in for the PharmEasy pages the shopping agent touches.
+
+Search results carry product data in __NEXT_DATA__ (like the real
+Next.js site) and render the product cards client-side after a short
+hydration delay. Product pages have an Add To Cart button that posts to
+a cart API. Latency and failures are configurable per request.
+"""
+import json
+import re
+
+from benchmarks.fake_upstreams.base import FakeUpstream
+
+CATALOG = [
+    {"productId": 44140, "name": "Dolo 650mg Strip Of 15 Tablets", "slug": "dolo-650mg-strip-of-15-tablets-44140", "salePriceDecimal": "30.91", "mrpDecimal": "33.60"},
+    {"productId": 11923, "name": "Crocin Advance 500mg Strip Of 20 Tablets", "slug": "crocin-advance-500mg-strip-of-20-tablets-11923", "salePriceDecimal": "19.80", "mrpDecimal": "22.00"},
+    {"productId": 70311, "name": "Paracetamol 500mg Strip Of 10 Tablets", "slug": "paracetamol-500mg-strip-of-10-tablets-70311", "salePriceDecimal": "11.25", "mrpDecimal": "12.50"},
+    {"productId": 12577, "name": "Brufen 400mg Strip Of 15 Tablets", "slug": "brufen-400mg-strip-of-15-tablets-12577", "salePriceDecimal": "27.40", "mrpDecimal": "30.44"},
+    {"productId": 35720, "name": "Cetzine 10mg Strip Of 10 Tablets", "slug": "cetzine-10mg-strip-of-10-tablets-35720", "salePriceDecimal": "19.35", "mrpDecimal": "21.50"},
+    {"productId": 98102, "name": "Mox 500mg Strip Of 10 Capsules", "slug": "mox-500mg-strip-of-10-capsules-98102", "salePriceDecimal": "86.40", "mrpDecimal": "96.00"},
+]
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><head><title>Search - PharmEasy</title></head>
+<body>
+<div id="__next"><main><div class="c-PJLV c-results" id="results"></div></main></div>
+<script id="__NEXT_DATA__" type="application/json">{next_data}</script>
+<script>
+setTimeout(function () {{
+    var data = JSON.parse(document.getElementById('__NEXT_DATA__').textContent);
+    var html = data.props.pageProps.products.map(function (p) {{
+        return '<div class="ProductCard_medicineUnitWrapper"><a href="/online-medicine-order/' + p.slug + '">' +
+            '<h1 class="ProductCard_medicineName">' + p.name + '</h1>' +
+            '<div class="ProductCard_ourPrice"><span class="price">₹' + p.salePriceDecimal + '</span></div></a></div>';
+    }}).join('');
+    document.getElementById('results').innerHTML = html;
+}}, {hydration_ms});
+</script>
+</body></html>"""
+
+PRODUCT_PAGE = """<!DOCTYPE html>
+<html><head><title>{name} - PharmEasy</title></head>
+<body>
+<div id="__next"><main><div class="c-PJLV">
+<h1>{name}</h1><div class="PriceInfo_ourPrice">₹{price}</div>
+<button class="c-btn" type="button" onclick="fetch('/api/cart/add', {{method: 'POST', body: '{slug}'}}).then(function () {{ document.title = 'added'; }})">Add To Cart</button>
+</div></main></div>
+</body></html>"""
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><title>PharmEasy</title></head>
+<body><div id="__next"><main><h1>Healthcare, simplified</h1></main></div></body></html>"""
+
+
+def search_catalog(query: str):
+    words = [w for w in re.findall(r"[a-z0-9]+", query.lower()) if not w.endswith("mg")]
+    return [p for p in CATALOG if any(w in p["name"].lower() for w in words)] or []
+
+
+class FakePharmEasy(FakeUpstream):
+    """Serves the fixture pages; latency and error injection come from FakeUpstream"""
+    name = "pharmeasy"
+
+    def __init__(self, latency_ms: float = 0, hydration_ms: int = 300, port: int = 0, **kwargs):
+        super().__init__(latency_ms=latency_ms, port=port, **kwargs)
+        self.hydration_ms = hydration_ms
+
+    def handle(self, method, path, query, body, headers):
+        if method == "POST":
+            return 200, json.dumps({"success": True}), "application/json"
+        if path == "/":
+            return 200, HOME_PAGE, "text/html; charset=utf-8"
+        if path == "/search/all":
+            next_data = json.dumps({"props": {"pageProps": {"products": search_catalog(query.get("name", [""])[0])}}})
+            return 200, SEARCH_PAGE.format(next_data=next_data, hydration_ms=self.hydration_ms), "text/html; charset=utf-8"
+        if path.startswith("/online-medicine-order/"):
+            slug = path.rsplit("/", 1)[-1]
+            product = next((p for p in CATALOG if p["slug"] == slug), None)
+            if product:
+                page = PRODUCT_PAGE.format(name=product["name"], price=product["salePriceDecimal"], slug=slug)
+                return 200, page, "text/html; charset=utf-8"
+        if path == "/cart":
+            return 200, "<html><body><h1>Cart</h1></body></html>", "text/html; charset=utf-8"
+        return 404, "<html><body>Not found</body></html>", "text/html; charset=utf-8"
@@ -0,0 +1,24 @@
+"""
+Local stand-in for the Twilio Messages and Calls APIs. Point the app at it
+with TWILIO_API_BASE_URL (any TWILIO_ACCOUNT_SID/TWILIO_AUTH_TOKEN will do).
+"""
+import json
+import uuid
+from urllib.parse import parse_qs
+
+from benchmarks.fake_upstreams.base import FakeUpstream
+
+
+class FakeTwilio(FakeUpstream):
+    name = "twilio"
+
+    def handle(self, method, path, query, body, headers):
+        form = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+        if method == "POST" and path.endswith("/Messages.json"):
+            resource = {"sid": "SM" + uuid.uuid4().hex, "status": "queued", "body": form.get("Body", "")}
+        elif method == "POST" and path.endswith("/Calls.json"):
+            resource = {"sid": "CA" + uuid.uuid4().hex, "status": "queued"}
+        else:
+            return 404, json.dumps({"code": 20404, "message": "The requested resource was not found"}), "application/json"
+        resource.update({"to": form.get("To"), "from": form.get("From"), "account_sid": path.split("/")[3]})
+        return 201, json.dumps(resource), "application/json"
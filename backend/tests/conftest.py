@@ -0,0 +1,18 @@
+"""
+Keeps the suite's files out of the source tree. Services write their JSON
+snapshots, journals and SQLite files under NEXUS_DATA_DIR, and importing
+app.main builds the frontend, so both point at a temp dir here, before any
+app module is imported.
+"""
+import os
+import shutil
+import tempfile
+
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="nexus-tests-")
+os.environ["NEXUS_DATA_DIR"] = TEST_DATA_DIR
+os.environ["FRONTEND_DIST_DIR"] = os.path.join(TEST_DATA_DIR, "frontend", "dist")
+os.environ["FRONTEND_ENABLED"] = "false"
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
@@ -0,0 +1,138 @@
+import pytest
+
+from app.services import answer_cache
+from app.services.answer_cache import AnswerCache, tokenize, tokens_compatible
+
+ANSWER = "Rest, drink fluids and take [MED:Paracetamol 500mg] if needed."
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(monkeypatch, clock):
+    monkeypatch.setenv("ANSWER_CACHE_TTL_SECONDS", "3600")
+    monkeypatch.setenv("ANSWER_CACHE_MAX_ENTRIES", "8")
+    return AnswerCache()
+
+
+@pytest.mark.parametrize("seed, probe", [
+    ("what should I take for a headache", "what should i take for headaches"),
+    ("sore throat remedies", "remedy for a sore throat"),
+    ("medicine for acidity", "what medication for acidity"),
+    ("how much water should I drink daily", "how much water should i drink a day"),
+    ("back pain relief", "relief for back pain"),
+    ("how do I get rid of a cough", "how to get rid of cough"),
+])
+def test_paraphrase_is_served_the_cached_answer(cache, seed, probe):
+    cache.store(seed, ANSWER)
+
+    hit = cache.lookup(probe)
+
+    assert hit is not None
+    assert hit["answer"] == ANSWER and hit["question"] == seed
+
+
+@pytest.mark.parametrize("seed, probe", [
+    ("headache medicine", "headache medicine for kids"),
+    ("dose of paracetamol for a 5 year old", "dose of paracetamol for a 10 year old"),
+    ("can I take ibuprofen", "can I take ibuprofen with paracetamol"),
+    ("can I take ibuprofen", "can I not take ibuprofen"),
+    ("is aspirin safe", "is aspirin safe while pregnant"),
+    ("back pain relief", "knee pain relief"),
+    ("cold medicine", "cough medicine"),
+    ("how much water should I drink daily", "how much coffee should I drink daily"),
+])
+def test_question_with_a_different_answer_misses(cache, seed, probe):
+    cache.store(seed, ANSWER)
+
+    assert cache.lookup(probe) is None
+
+
+@pytest.mark.parametrize("probe", [
+    "can I take paracetamol",
+    "should I take paracetamol",
+    "how should I take paracetamol",
+    "why should I take paracetamol",
+    "when to take paracetamol",
+])
+def test_questions_about_the_same_drug_asking_something_else_miss(cache, probe):
+    cache.store("when should I take paracetamol", "Take it every 6 hours.")
+
+    assert cache.lookup(probe) is None
+    assert cache.lookup("When should I take paracetamol?")["answer"] == "Take it every 6 hours."
+
+
+def test_red_flag_questions_are_never_cached_or_served(cache):
+    question = "I have chest pain and can't breathe"
+    cache.store(question, ANSWER)
+
+    assert cache.lookup(question) is None
+    assert cache.snapshot()["entries"] == 0
+    assert cache.bypassed == 1
+
+
+def test_emergency_answers_are_not_stored(cache):
+    cache.store("what should I take for a headache", "Call 112 now. [ACTION:EMERGENCY]")
+
+    assert cache.lookup("what should I take for a headache") is None
+
+
+def test_entries_expire_after_the_ttl(cache, clock):
+    cache.store("medicine for acidity", ANSWER)
+    clock[0] += 3601
+
+    assert cache.lookup("medicine for acidity") is None
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_full_cache_reuses_the_least_recently_used_row(cache, clock):
+    questions = [f"remedy for cough week {week}" for week in range(cache.capacity)]
+    for question in questions:
+        clock[0] += 1
+        cache.store(question, ANSWER)
+    clock[0] += 1
+    assert cache.lookup(questions[0]) is not None
+
+    clock[0] += 1
+    cache.store("sore throat remedies", ANSWER)
+
+    assert cache.evictions == 1
+    assert cache.lookup(questions[0]) is not None
+    assert cache.lookup(questions[1]) is None
+    assert cache.lookup("sore throat remedies") is not None
+
+
+def test_paraphrase_refreshes_the_cached_row(cache):
+    cache.store("what should I take for a headache", ANSWER)
+    cache.store("what should I take for headaches?", "Updated answer")
+
+    assert cache.snapshot()["entries"] == 1
+    assert cache.lookup("what should I take for a headache")["answer"] == "Updated answer"
+
+
+def test_clear_drops_every_entry(cache):
+    cache.store("medicine for acidity", ANSWER)
+    cache.clear()
+
+    assert cache.lookup("medicine for acidity") is None
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_tokenize_keeps_numbers_negations_and_question_words_aside():
+    tokens, numbers, negations, questions = tokenize("When can't I take 2 tablets of Ibuprofen")
+
+    assert numbers == {"2"}
+    assert negations == {"cant"}
+    assert questions == {"when"}
+    assert tokens == ["take", "remedy", "ibuprofen"]
+
+
+def test_tokens_compatible_allows_typos_but_not_extra_words():
+    assert tokens_compatible(frozenset({"headache", "medicine"}), frozenset({"headach", "medicine"}))
+    assert not tokens_compatible(frozenset({"headache", "medicine"}), frozenset({"headache", "medicine", "kid"}))
+    assert not tokens_compatible(frozenset({"back", "pain"}), frozenset({"knee", "pain"}))
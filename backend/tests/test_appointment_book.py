@@ -0,0 +1,65 @@
+import json
+from datetime import datetime, timedelta
+
+from app.services.appointment_service import AppointmentBook
+
+
+def make_book(tmp_path, monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return AppointmentBook(path=str(tmp_path / "appointments.json"))
+
+
+def search_result(place_id):
+    return {"id": place_id, "name": f"Hospital {place_id}", "address": "Somewhere", "phone": "N/A"}
+
+
+def tomorrow_morning():
+    day = datetime.now().date() + timedelta(days=1)
+    return datetime.combine(day, datetime.min.time()).replace(hour=10)
+
+
+def persisted_hospitals(tmp_path, monkeypatch):
+    return set(make_book(tmp_path, monkeypatch).hospitals)
+
+
+def test_search_results_are_bookable_but_not_persisted(tmp_path, monkeypatch):
+    book = make_book(tmp_path, monkeypatch)
+    book.remember_hospital(search_result(101))
+
+    assert book.get_hospital(101)["name"] == "Hospital 101"
+    assert persisted_hospitals(tmp_path, monkeypatch) == set()
+
+
+def test_booking_persists_the_hospital(tmp_path, monkeypatch):
+    book = make_book(tmp_path, monkeypatch)
+    book.remember_hospital(search_result(101))
+    book.remember_hospital(search_result(102))
+
+    appointment = book.reserve(101, tomorrow_morning(), {"user_id": "u1"}, "fever")
+
+    assert appointment["hospital_id"] == "101"
+    assert persisted_hospitals(tmp_path, monkeypatch) == {"101"}
+
+
+def test_seen_hospitals_are_capped_and_expire(tmp_path, monkeypatch):
+    book = make_book(tmp_path, monkeypatch, APPOINTMENT_SEEN_HOSPITALS_MAX="2")
+    for place_id in (1, 2, 3):
+        book.remember_hospital(search_result(place_id))
+    assert book.get_hospital(1) is None
+    assert book.get_hospital(3) is not None
+
+    book = make_book(tmp_path, monkeypatch, APPOINTMENT_SEEN_HOSPITAL_TTL="-1")
+    book.remember_hospital(search_result(4))
+    assert book.get_hospital(4) is None
+
+
+def test_journal_only_records_bookings(tmp_path, monkeypatch):
+    book = make_book(tmp_path, monkeypatch)
+    for place_id in range(50):
+        book.remember_hospital(search_result(place_id))
+    book.reserve(7, tomorrow_morning(), {"user_id": "u1"}, "cough")
+
+    with open(tmp_path / "appointments.json.journal", encoding="utf-8") as f:
+        ops = [json.loads(line)["op"] for line in f]
+    assert ops == ["hospital", "book"]
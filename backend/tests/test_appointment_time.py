@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.appointment_service import parse_preferred_time
+
+# A Sunday
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("next monday 10am", datetime(2026, 10, 19, 10, 0)),
+    ("on friday at 11:00", datetime(2026, 10, 23, 11, 0)),
+    ("sat 9am", datetime(2026, 10, 24, 9, 0)),
+    ("day after tomorrow 9am", datetime(2026, 10, 20, 9, 0)),
+    ("20th october 10am", datetime(2026, 10, 20, 10, 0)),
+    ("october 25 at 9:30am", datetime(2026, 10, 25, 9, 30)),
+    ("1st nov 2026 10am", datetime(2026, 11, 1, 10, 0)),
+    ("march 3rd 10am", datetime(2027, 3, 3, 10, 0)),
+    ("10/20 3pm", datetime(2026, 10, 20, 15, 0)),
+    ("20/10 3pm", datetime(2026, 10, 20, 15, 0)),
+    ("15.11.2026 11am", datetime(2026, 11, 15, 11, 0)),
+    ("tomorrow 10 AM", datetime(2026, 10, 19, 10, 0)),
+    ("tomorrow 10.30 am", datetime(2026, 10, 19, 10, 30)),
+    ("today 3:30pm", datetime(2026, 10, 18, 15, 30)),
+    ("10:00", datetime(2026, 10, 19, 10, 0)),
+    ("2026-10-19 10:30", datetime(2026, 10, 19, 10, 30)),
+    ("2026-10-20 at 10am", datetime(2026, 10, 20, 10, 0)),
+])
+def test_reads_dates_and_times(text, expected):
+    assert parse_preferred_time(text, now=NOW) == expected
+
+
+def test_weekday_named_on_that_day():
+    assert parse_preferred_time("sunday 3pm", now=NOW) == datetime(2026, 10, 18, 15, 0)
+    assert parse_preferred_time("sunday 10am", now=NOW) == datetime(2026, 10, 25, 10, 0)
+    assert parse_preferred_time("next sunday 3pm", now=NOW) == datetime(2026, 10, 25, 15, 0)
+
+
+@pytest.mark.parametrize("text", [
+    "10/11 3pm",           # 10 Nov or 11 Oct
+    "next week 10am",
+    "monday after next 10am",
+    "monday 20th october 10am",
+    "31st february 10am",
+    "tomorrow 3",
+    "monday",
+    "whenever",
+])
+def test_unreadable_or_ambiguous_days_are_rejected(text):
+    assert parse_preferred_time(text, now=NOW) is None
@@ -0,0 +1,25 @@
+from app.services.http_cache import etag_matches
+
+ETAG = '"3f2a"'
+
+
+def test_exact_tag_matches():
+    assert etag_matches('"3f2a"', ETAG)
+
+
+def test_any_tag_in_list_matches():
+    assert etag_matches('"old", "3f2a"', ETAG)
+
+
+def test_weak_tags_compare_weakly():
+    assert etag_matches('W/"3f2a"', ETAG)
+    assert etag_matches('"3f2a"', 'W/"3f2a"')
+
+
+def test_star_matches_any_representation():
+    assert etag_matches("*", ETAG)
+
+
+def test_other_tags_do_not_match():
+    assert not etag_matches('"3f2a0"', ETAG)
+    assert not etag_matches('"old", W/"older"', ETAG)
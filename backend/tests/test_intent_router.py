@@ -0,0 +1,66 @@
+import pytest
+
+from app.services.intent_router import IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+def routed(router, message):
+    result = router.classify(message)
+    return (result["intent"], result["action"]["data"]) if result["routed"] else None
+
+
+@pytest.mark.parametrize("message, medicine", [
+    ("order paracetamol", "Paracetamol"),
+    ("buy dolo 650", "Dolo 650"),
+    ("order 2 strips of dolo 650", "Dolo 650"),
+    ("get me a strip of cetzine 10mg", "Cetzine 10mg"),
+    ("buy a bottle of benadryl syrup", "Benadryl Syrup"),
+    ("order azithromycin x2", "Azithromycin"),
+    ("dolo 650 mangwa do", "Dolo 650"),
+])
+def test_orders_known_medicines(router, message, medicine):
+    assert routed(router, message) == ("ORDER_MEDICINE", medicine)
+
+
+@pytest.mark.parametrize("message", [
+    "get me a glass of water",
+    "buy a new phone",
+    "I need to order a pizza",
+    "get me out of here",
+    "get me a nurse",
+    "deliver me from pain",
+    "I want to buy time",
+    "order medicine",
+    "buy a tablet",
+])
+def test_non_medicine_orders_go_to_the_llm(router, message):
+    assert routed(router, message) is None
+
+
+def test_product_cache_names_count_as_medicines():
+    router = IntentRouter(known_medicine=lambda name: name == "zincovit")
+    assert routed(router, "order zincovit") == ("ORDER_MEDICINE", "Zincovit")
+    assert routed(router, "order vitacorp") is None
+
+
+@pytest.mark.parametrize("message", ["help", "help me", "help!", "help me please"])
+def test_bare_help_is_not_an_emergency(router, message):
+    assert routed(router, message) is None
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("call an ambulance", "EMERGENCY"),
+    ("sos", "EMERGENCY"),
+    ("find hospitals near me", "HOSPITAL_SEARCH"),
+    ("book an appointment", "BOOK_APPOINTMENT"),
+])
+def test_routes_actions(router, message, intent):
+    assert routed(router, message) == (intent, None)
+
+
+def test_questions_are_deferred(router):
+    assert routed(router, "should I call an ambulance for a sprained ankle?") is None
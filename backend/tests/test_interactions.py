@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from app.services.interaction_service import InteractionIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    return InteractionIndex()
+
+
+def ingredient_names(index, name):
+    return [index.ingredients[i] for i in index.resolve(name)]
+
+
+@pytest.mark.parametrize("name, ingredients", [
+    ("paracetamol", ["paracetamol"]),
+    ("Dolo 650", ["paracetamol"]),
+    ("Tab. Dolo 500mg", ["paracetamol"]),
+    ("Crocin Advance", ["paracetamol"]),
+    ("Brufen-400", ["ibuprofen"]),
+    ("Combiflam", ["ibuprofen", "paracetamol"]),
+    ("Vitamin C", []),
+    ("dolomite", []),
+])
+def test_resolve_brand_dose_and_combination_names(index, name, ingredients):
+    assert sorted(ingredient_names(index, name)) == sorted(ingredients)
+
+
+def test_strength_and_form_share_one_cache_entry(index):
+    index._resolved.clear()
+    for name in ("Dolo-650", "Tab. Dolo 500mg", "dolo"):
+        index.resolve(name)
+
+    assert list(index._resolved) == ["dolo"]
+
+
+def test_shared_ingredient_is_a_duplicate_warning(index):
+    warnings = index.check(["Combiflam", "Brufen 400"])
+
+    assert [(w["type"], w["ingredients"], w["severity"]) for w in warnings] == [("duplicate", ["ibuprofen"], "moderate")]
+    assert warnings[0]["medications"] == ["Combiflam", "Brufen 400"]
+    assert "ibuprofen" in warnings[0]["effect"]
+
+
+def test_class_rule_applies_to_member_brands(index):
+    warnings = index.check([{"name": "Warfarin 5mg", "dosage": "1 tab"}, {"name": "Ecosprin 75", "dosage": "1 tab"}])
+
+    assert [(w["type"], w["ingredients"], w["severity"]) for w in warnings] == [("interaction", ["warfarin", "aspirin"], "major")]
+
+
+def test_warnings_are_sorted_most_severe_first(index):
+    warnings = index.check(["Dolo 650", "Brufen", "Warfarin"])
+
+    severities = [w["severity"] for w in warnings]
+    assert severities == sorted(severities, key=lambda s: -index.ranks[s])
+    assert severities[0] == "major" and severities[-1] == "minor"
+
+
+def test_unknown_and_repeated_names_are_ignored(index):
+    assert index.check(["Vitamin C", "xyz", None, {"dosage": "1 tab"}]) == []
+    assert index.check(["Dolo 650", "dolo 650 "]) == []
+
+
+def test_unknown_rule_member_fails_at_load(tmp_path):
+    database = {
+        "severity_ranks": {"major": 3},
+        "duplicate": {"severity": "major", "effect": "Both contain {ingredient}.", "advice": "Take one."},
+        "ingredients": [{"id": "warfarin", "names": ["warfarin"], "classes": []}],
+        "products": {},
+        "interactions": [{"a": "warfarin", "b": "nsaid", "severity": "major", "effect": "", "advice": ""}],
+    }
+    path = tmp_path / "interactions.json"
+    path.write_text(json.dumps(database), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="nsaid"):
+        InteractionIndex(str(path))
@@ -0,0 +1,79 @@
+import os
+import threading
+
+from app.services import llm_gateway
+from app.services.llm_gateway import LLMGateway, SystemPromptCache
+
+key = LLMGateway._flight_key
+IMAGE = os.urandom(4 * 1024 * 1024)
+
+
+def image_prompt(data):
+    return ["Extract the medications", {"mime_type": "image/jpeg", "data": data}]
+
+
+def test_same_prompt_same_key():
+    assert key("gemini-flash", image_prompt(IMAGE), {}) == key("gemini-flash", image_prompt(bytes(IMAGE)), {})
+
+
+def test_image_bytes_change_the_key():
+    other = IMAGE[:-1] + bytes([IMAGE[-1] ^ 1])
+    assert key("gemini-flash", image_prompt(IMAGE), {}) != key("gemini-flash", image_prompt(other), {})
+
+
+def test_model_config_changes_the_key():
+    contents = [{"role": "user", "parts": ["hello"]}]
+    base = key("gemini-flash", contents, {}, {"system_instruction": "You are a medical assistant"})
+    assert base != key("gemini-flash", contents, {}, {"system_instruction": "You are a shopping assistant"})
+    assert base != key("gemini-flash", contents, {}, {"system_instruction": "You are a medical assistant",
+                                                      "generation_config": {"temperature": 0.2}})
+    assert base != key("gemini-pro", contents, {}, {"system_instruction": "You are a medical assistant"})
+
+
+def test_call_kwargs_are_order_independent():
+    config = {"temperature": 0.1, "max_output_tokens": 256}
+    reordered = {"max_output_tokens": 256, "temperature": 0.1}
+    assert key("m", "hi", {"generation_config": config}) == key("m", "hi", {"generation_config": reordered})
+
+
+def test_values_are_not_confused_across_types():
+    assert key("m", ["ab", "c"], {}) != key("m", ["a", "bc"], {})
+    assert key("m", b"hello", {}) != key("m", "hello", {})
+    assert key("m", "1", {}) != key("m", 1, {})
+
+
+def test_prompt_below_the_caching_minimum_is_never_sent(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_gateway.caching.CachedContent, "create", lambda **kwargs: calls.append(kwargs))
+    cache = SystemPromptCache(ttl=3600, retry_after=900, min_tokens=4096)
+
+    assert cache.model("gemini-flash", "You are a medical assistant") is None
+    assert calls == []
+
+
+def test_one_thread_creates_the_cache_outside_the_lock(monkeypatch):
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if kwargs["system_instruction"] == "You are a medical assistant":
+            started.set()
+            assert release.wait(5)
+        raise ValueError("Cached content is too small")
+
+    monkeypatch.setattr(llm_gateway.caching.CachedContent, "create", create)
+    cache = SystemPromptCache(ttl=3600, retry_after=900, min_tokens=0)
+    creator = threading.Thread(target=cache.model, args=("gemini-flash", "You are a medical assistant"))
+    creator.start()
+    assert started.wait(5)
+
+    # Neither another prompt nor the same one waits on the round trip in flight
+    assert cache.model("gemini-flash", "You are a shopping assistant") is None
+    assert cache.model("gemini-flash", "You are a medical assistant") is None
+    release.set()
+    creator.join(5)
+
+    assert [call["system_instruction"] for call in calls] == ["You are a medical assistant", "You are a shopping assistant"]
+    # The failure is remembered until retry_after
+    assert cache.model("gemini-flash", "You are a medical assistant") is None
+    assert len(calls) == 2
@@ -0,0 +1,34 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import ops
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("OPS_TOKEN", "s3cret")
+    app = FastAPI()
+    app.include_router(ops.router, prefix="/api/ops")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("method, path", [
+    ("put", "/api/ops/models/overrides/chat"),
+    ("delete", "/api/ops/models/overrides/chat"),
+    ("delete", "/api/ops/answer-cache"),
+])
+@pytest.mark.parametrize("headers", [{}, {"X-Ops-Token": "wrong"}])
+def test_mutations_need_the_ops_token(client, method, path, headers):
+    response = client.request(method, path, json={"model": None}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_mutations_are_disabled_without_a_configured_token(client, monkeypatch):
+    monkeypatch.delenv("OPS_TOKEN")
+    assert client.delete("/api/ops/answer-cache", headers={"X-Ops-Token": ""}).status_code == 403
+
+
+def test_answer_cache_clear_with_token(client):
+    response = client.delete("/api/ops/answer-cache", headers={"X-Ops-Token": "s3cret"})
+    assert response.status_code == 200 and response.json() == {"cleared": True}
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from app.agents.product_lookup import SearchPageError, parse_search_results
+from app.services.product_cache import ProductCache
+
+BASE_URL = "https://pharmacy.test"
+
+
+def next_data_page(props):
+    return f'<html><script id="__NEXT_DATA__" type="application/json">{json.dumps(props)}</script></html>'
+
+
+def test_products_from_page_data():
+    page = next_data_page({"props": {"products": [{"name": "Dolo 650", "slug": "dolo-650", "salePrice": "30.5"}]}})
+    assert parse_search_results(page, BASE_URL) == [
+        {"name": "Dolo 650", "url": f"{BASE_URL}/online-medicine-order/dolo-650", "price": "₹30.50"}
+    ]
+
+
+def test_empty_listing_is_not_an_error():
+    assert parse_search_results(next_data_page({"props": {"products": []}}), BASE_URL) == []
+
+
+@pytest.mark.parametrize("page", [
+    "<html><body>Access denied</body></html>",
+    '<html><script id="__NEXT_DATA__">{"props": </script></html>'
+])
+def test_unreadable_page_raises(page):
+    with pytest.raises(SearchPageError):
+        parse_search_results(page, BASE_URL)
+
+
+def test_lookup_failure_is_not_negative_cached(tmp_path):
+    def fetcher(name):
+        raise SearchPageError("layout changed")
+
+    cache = ProductCache(path=str(tmp_path / "products.json"), fetcher=fetcher)
+    assert cache.lookup("Dolo 650") is None
+    assert cache.get("Dolo 650", allow_stale=True) is None
+
+
+def test_empty_listing_is_negative_cached(tmp_path):
+    cache = ProductCache(path=str(tmp_path / "products.json"), fetcher=lambda name: None)
+    assert cache.lookup("Unobtainium 5mg")["available"] is False
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.reminder_service import DAY, parse_duration_days, parse_frequency
+
+
+@pytest.mark.parametrize("text, times, interval", [
+    ("twice daily", ["09:00", "21:00"], DAY),
+    ("BD after food", ["09:00", "21:00"], DAY),
+    ("thrice a day", ["08:00", "14:00", "20:00"], DAY),
+    ("4 times daily", ["08:00", "12:00", "16:00", "20:00"], DAY),
+    ("once daily", ["09:00"], DAY),
+    ("once daily at night", ["21:00"], DAY),
+    ("1 tab at bedtime", ["21:00"], DAY),
+    ("1-0-1", ["08:00", "21:00"], DAY),
+    ("0 - 0 - 1", ["21:00"], DAY),
+    ("1-1-1-1", ["08:00", "13:00", "18:00", "22:00"], DAY),
+    ("once a week", ["09:00"], 7 * DAY),
+    ("every 6 hours", None, 6 * 3600),
+    ("q8h", None, 8 * 3600),
+])
+def test_parse_frequency(text, times, interval):
+    assert parse_frequency(text) == {"times": times, "interval": interval}
+
+
+@pytest.mark.parametrize("text", [
+    "", None, "not specified", "as needed", "SOS for pain", "prn", "0-0-0", "every 48 hours", "with food",
+])
+def test_unreadable_or_as_needed_frequency_has_no_schedule(text):
+    assert parse_frequency(text) is None
+
+
+@pytest.mark.parametrize("text, days", [
+    ("5 days", 5),
+    ("2 weeks", 14),
+    ("1 month", 30),
+    ("6 months", 90),
+    ("continue", 90),
+    ("long-term", 90),
+    ("", 7),
+    ("till better", 7),
+])
+def test_parse_duration_days(text, days):
+    assert parse_duration_days(text, default_days=7, max_days=90) == days
@@ -0,0 +1,90 @@
+import json
+
+from app.agents.selector_stats import SelectorStats
+
+SITE = "pharmeasy.in"
+STEP = "add_to_cart"
+SELECTORS = ["#specific", "button[type='button']", "//button[text()='Add to Cart']"]
+
+
+def make_stats(tmp_path, monkeypatch, **env):
+    monkeypatch.setenv("SHOPPING_SELECTOR_QUARANTINE_AFTER", env.get("quarantine_after", "3"))
+    monkeypatch.setenv("SHOPPING_SELECTOR_STATS_FLUSH_SECONDS", env.get("flush_seconds", "3600"))
+    return SelectorStats(str(tmp_path / "selector_stats.json"))
+
+
+def test_unknown_selectors_keep_their_declared_order(tmp_path, monkeypatch):
+    stats = make_stats(tmp_path, monkeypatch)
+    assert stats.rank(SITE, STEP, SELECTORS) == (SELECTORS, [])
+
+
+def test_verified_winner_is_promoted_and_earlier_selectors_miss(tmp_path, monkeypatch):
+    stats = make_stats(tmp_path, monkeypatch)
+    stats.record(SITE, STEP, SELECTORS, SELECTORS[2], 40.0, succeeded=True)
+    active, _ = stats.rank(SITE, STEP, SELECTORS)
+    assert active[0] == SELECTORS[2]
+    rows = {row["selector"]: row for row in stats.snapshot()[SITE][STEP]}
+    assert rows[SELECTORS[2]]["hits"] == 1
+    assert rows[SELECTORS[0]]["misses"] == 1 and rows[SELECTORS[1]]["misses"] == 1
+
+
+def test_match_whose_step_failed_counts_as_a_miss(tmp_path, monkeypatch):
+    stats = make_stats(tmp_path, monkeypatch)
+    # The generic selector matched, but the click didn't add anything
+    stats.record(SITE, STEP, SELECTORS[:2], SELECTORS[1], 5.0, succeeded=False)
+    rows = {row["selector"]: row for row in stats.snapshot()[SITE][STEP]}
+    assert rows[SELECTORS[1]]["hits"] == 0
+    assert rows[SELECTORS[1]]["misses"] == 1
+    assert SELECTORS[2] not in rows
+
+
+def test_wrong_element_matches_get_demoted_below_the_working_selector(tmp_path, monkeypatch):
+    stats = make_stats(tmp_path, monkeypatch)
+    # History from when the generic selector still worked
+    for _ in range(2):
+        stats.record(SITE, STEP, SELECTORS[:2], SELECTORS[1], 5.0, succeeded=True)
+
+    # Now both match the page, but only the text selector hits the real button
+    matching, working = {SELECTORS[1], SELECTORS[2]}, SELECTORS[2]
+    outcomes = []
+    for _ in range(5):
+        order, _ = stats.rank(SITE, STEP, SELECTORS)
+        index = next(i for i, selector in enumerate(order) if selector in matching)
+        stats.record(SITE, STEP, order[:index + 1], order[index], 5.0, succeeded=order[index] == working)
+        outcomes.append(order[index] == working)
+
+    assert outcomes[0] is False
+    assert outcomes[-2:] == [True, True]
+    assert stats.rank(SITE, STEP, SELECTORS)[0][0] == working
+
+
+def test_quarantine_lifts_after_a_verified_hit(tmp_path, monkeypatch):
+    stats = make_stats(tmp_path, monkeypatch)
+    for _ in range(3):
+        stats.record(SITE, STEP, SELECTORS[:1], None, 0.0, succeeded=False)
+    assert stats.rank(SITE, STEP, SELECTORS)[1] == [SELECTORS[0]]
+    stats.record(SITE, STEP, SELECTORS[:1], SELECTORS[0], 10.0, succeeded=True)
+    assert stats.rank(SITE, STEP, SELECTORS)[1] == []
+
+
+def test_writes_are_batched_until_flush(tmp_path, monkeypatch):
+    stats = make_stats(tmp_path, monkeypatch)
+    path = tmp_path / "selector_stats.json"
+    stats.flush()
+    for _ in range(50):
+        stats.record(SITE, STEP, SELECTORS[:1], SELECTORS[0], 10.0)
+    # First write is due immediately, the rest wait for the flush interval
+    stats._flush_timer and stats._flush_timer.join(1)
+    first = json.loads(path.read_text())
+    stats.record(SITE, STEP, SELECTORS[:1], SELECTORS[0], 10.0)
+    assert json.loads(path.read_text()) == first
+    stats.flush()
+    assert json.loads(path.read_text())[SITE][STEP][SELECTORS[0]]["hits"] == 51
+
+
+def test_stats_survive_a_restart(tmp_path, monkeypatch):
+    stats = make_stats(tmp_path, monkeypatch)
+    stats.record(SITE, STEP, SELECTORS, SELECTORS[2], 40.0)
+    stats.flush()
+    reloaded = make_stats(tmp_path, monkeypatch)
+    assert reloaded.rank(SITE, STEP, SELECTORS)[0][0] == SELECTORS[2]
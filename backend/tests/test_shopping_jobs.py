@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from app.agents.shopping_jobs import JobRejected, ShoppingJobManager
+from app.services.prefetch_service import PrefetchStore
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("SHOPPING_JOB_WORKERS", "2")
+    monkeypatch.setenv("SHOPPING_JOB_PER_USER", "1")
+    return ShoppingJobManager()
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def blocking_task(release):
+    def task(job):
+        while not release.wait(0.01):
+            job.report("waiting")
+        return {"success": True}
+    return task
+
+
+def test_speculative_jobs_do_not_count_toward_the_user_cap(manager, release):
+    manager.submit("user", "prefetch", blocking_task(release), speculative=True)
+    manager.submit("user", "real", blocking_task(release))
+    with pytest.raises(JobRejected):
+        manager.submit("user", "second real", blocking_task(release))
+
+
+def test_speculative_jobs_only_use_idle_workers(manager, release):
+    manager.submit("a", "real", blocking_task(release))
+    manager.submit("b", "real", blocking_task(release))
+    with pytest.raises(JobRejected):
+        manager.submit("c", "prefetch", blocking_task(release), speculative=True)
+
+
+def test_adopted_job_counts_toward_the_cap(manager, release):
+    job = manager.submit("user", "prefetch", blocking_task(release), speculative=True)
+    manager.adopt(job)
+    assert not job.speculative
+    with pytest.raises(JobRejected):
+        manager.submit("user", "real", blocking_task(release))
+
+
+def test_declined_prefetch_cancels_the_job(manager, release):
+    store = PrefetchStore()
+    prefetch = store.start(
+        "session", "buy_medicine", "dolo 650",
+        launch=lambda: manager.submit("user", "prefetch", blocking_task(release), speculative=True),
+        cancel=lambda job: job.cancel()
+    )
+    assert store.release("session", "buy_medicine")
+    assert prefetch.handle.status == "cancelled"
+    assert store.claim("session", "buy_medicine", lambda key: True) is None
+
+
+def test_unclaimed_prefetch_expires(manager, release):
+    store = PrefetchStore()
+    prefetch = store.start(
+        "session", "buy_medicine", "dolo 650",
+        launch=lambda: manager.submit("user", "prefetch", blocking_task(release), speculative=True),
+        cancel=lambda job: job.cancel(),
+        ttl=0.05
+    )
+    prefetch.timer.join(1)
+    assert prefetch.handle.status == "cancelled"
@@ -0,0 +1,177 @@
+"""
+ShoppingAgent selector probing against the fixture pharmacy site in
+tests/fixtures/pharmacy. The browser tests need headless Chrome and are
+skipped without it; FakeDriver covers the same flow everywhere.
+"""
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.agents import page_waits
+from app.agents.selector_stats import SelectorStats
+from app.agents.shopping_agent import ShoppingAgent
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "pharmacy")
+ROUTES = {"/search/all": "search.html", "/buy/dolo-650": "product.html"}
+GENERIC_BUTTON = "button[type='button']"
+
+
+def make_agent(tmp_path, monkeypatch, site="fixture"):
+    monkeypatch.setenv("SHOPPING_SELECTOR_STATS_FLUSH_SECONDS", "3600")
+    agent = object.__new__(ShoppingAgent)
+    agent.site = site
+    agent.selector_stats = SelectorStats(str(tmp_path / "selector_stats.json"))
+    agent.IDLE_TIMEOUT = 2
+    agent.ADD_TO_CART_TIMEOUT = 2
+    agent.PRODUCT_TIMEOUT = 2
+    return agent
+
+
+def seed_generic_button(agent):
+    """The generic selector used to work, so it's ranked first"""
+    agent.selector_stats.record(agent.site, "add_to_cart", [GENERIC_BUTTON], GENERIC_BUTTON, 5.0, succeeded=True)
+
+
+class FakeElement:
+    def __init__(self, text, on_click=None):
+        self.text = text
+        self.on_click = on_click
+        self.connected = True
+
+    def click(self):
+        if self.on_click:
+            self.on_click()
+
+
+class FakeDriver:
+    """
+    The product page with a Share button that matches the generic selector
+    and the real Add to Cart button, which only the text selectors match
+    """
+
+    def __init__(self):
+        self.current_url = "http://fixture/buy/dolo-650"
+        self.cart_count = 0
+        self.share = FakeElement("Share")
+        self.add = FakeElement("Add to Cart", on_click=self._add)
+
+    def _add(self):
+        self.cart_count += 1
+        self.add.connected = False
+
+    def _matches(self, selector):
+        if selector == GENERIC_BUTTON:
+            return self.share
+        if "add to cart" in selector.lower() and self.add.connected:
+            return self.add
+        return None
+
+    def execute_script(self, script, *args):
+        if script == page_waits.PROBE_SCRIPT:
+            for index, selector in enumerate(args[0]):
+                element = self._matches(selector)
+                if element is not None:
+                    return [index, element]
+            return None
+        if script == page_waits.IDLE_STATE_SCRIPT:
+            return [0, 1000.0, "complete"]
+        if script == page_waits.CLICK_EFFECT_SCRIPT:
+            element = args[0]
+            return [element.connected, element.text if element.connected else None, str(self.cart_count), self.current_url]
+        return None
+
+    def save_screenshot(self, path):
+        return True
+
+
+def test_add_to_cart_demotes_a_selector_that_clicks_the_wrong_button(tmp_path, monkeypatch):
+    agent = make_agent(tmp_path, monkeypatch)
+    seed_generic_button(agent)
+
+    results = [agent._add_to_cart(FakeDriver())["success"] for _ in range(3)]
+
+    assert results[0] is False
+    assert results[-1] is True
+    active, _ = agent.selector_stats.rank(agent.site, "add_to_cart", agent.ADD_TO_CART_SELECTORS)
+    assert active.index(GENERIC_BUTTON) > min(i for i, s in enumerate(active) if "add to cart" in s.lower())
+
+
+def test_missing_button_records_misses_without_a_winner(tmp_path, monkeypatch):
+    agent = make_agent(tmp_path, monkeypatch)
+    driver = FakeDriver()
+    driver.add.connected = False
+    driver.share = None
+
+    assert agent._add_to_cart(driver)["success"] is False
+    rows = agent.selector_stats.snapshot()[agent.site]["add_to_cart"]
+    assert rows and all(row["hits"] == 0 for row in rows)
+
+
+@pytest.fixture(scope="module")
+def fixture_site():
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            name = ROUTES.get(self.path.split("?", 1)[0])
+            if name is None:
+                self.send_error(404)
+                return
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def browser():
+    webdriver = pytest.importorskip("selenium.webdriver")
+    options = webdriver.ChromeOptions()
+    for argument in ("--headless=new", "--no-sandbox", "--disable-dev-shm-usage"):
+        options.add_argument(argument)
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception as e:
+        pytest.skip(f"headless Chrome unavailable: {e}")
+    yield driver
+    driver.quit()
+
+
+def test_browser_select_product_opens_the_product_page(tmp_path, monkeypatch, fixture_site, browser):
+    agent = make_agent(tmp_path, monkeypatch)
+    browser.get(f"{fixture_site}/search/all?name=dolo")
+
+    result = agent._select_product(browser)
+
+    assert result["success"] and result["navigated"]
+    assert result["product_name"] == "Dolo 650 Tablet 15's"
+    assert browser.current_url.endswith("/buy/dolo-650")
+    rows = {row["selector"]: row for row in agent.selector_stats.snapshot()[agent.site]["select_product"]}
+    assert sum(row["hits"] for row in rows.values()) == 1
+
+
+def test_browser_add_to_cart_learns_past_the_share_button(tmp_path, monkeypatch, fixture_site, browser):
+    agent = make_agent(tmp_path, monkeypatch)
+    seed_generic_button(agent)
+
+    results = []
+    for _ in range(3):
+        browser.get(f"{fixture_site}/buy/dolo-650")
+        results.append(agent._add_to_cart(browser)["success"])
+
+    assert results[0] is False
+    assert results[-1] is True
+    assert browser.find_element("css selector", ".cart-count").text == "1"
+    active, _ = agent.selector_stats.rank(agent.site, "add_to_cart", agent.ADD_TO_CART_SELECTORS)
+    assert active[0] != GENERIC_BUTTON
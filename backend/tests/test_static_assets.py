@@ -0,0 +1,78 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from app.services import static_assets
+
+
+@pytest.fixture
+def frontend(tmp_path, monkeypatch):
+    source = tmp_path / "frontend"
+    (source / "js").mkdir(parents=True)
+    (source / "index.html").write_text('<html><head></head><body><script src="js/app.js"></script></body></html>')
+    (source / "js" / "app.js").write_text("console.log('nexus');\n" * 40)
+    dist = source / "dist"
+    monkeypatch.setattr(static_assets, "FRONTEND_DIR", str(source))
+    monkeypatch.setattr(static_assets, "FRONTEND_DIST_DIR", str(dist))
+    return source, dist
+
+
+def assert_complete(dist):
+    with open(dist / "manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    for path in manifest["files"]:
+        assert (dist / path).is_file()
+    return manifest
+
+
+def test_rebuild_replaces_the_whole_dist(frontend):
+    source, dist = frontend
+    first = static_assets.build_frontend(str(source), str(dist))
+    (source / "js" / "app.js").write_text("console.log('v2');\n" * 40)
+    second = static_assets.build_frontend(str(source), str(dist))
+
+    assert first["aliases"]["js/app.js"] != second["aliases"]["js/app.js"]
+    assert not (dist / first["aliases"]["js/app.js"]).exists()
+    assert_complete(dist)
+    assert [name for name in os.listdir(source) if name.startswith(".dist-")] == []
+
+
+def test_lock_and_temp_dirs_do_not_make_the_build_stale(frontend):
+    source, dist = frontend
+    assert static_assets.get_frontend_app() is not None
+    built_at = os.path.getmtime(dist / "manifest.json")
+    (source / ".dist-leftover").mkdir()
+    (source / ".dist-leftover" / "index.html").write_text("half written")
+    assert (source / ".dist.lock").exists()
+
+    assert static_assets.get_frontend_app() is not None
+    assert os.path.getmtime(dist / "manifest.json") == built_at
+
+
+def test_without_build_on_start_only_the_cli_build_is_served(frontend, monkeypatch):
+    monkeypatch.setenv("FRONTEND_BUILD_ON_START", "false")
+    assert static_assets.get_frontend_app() is None
+    static_assets.build_frontend(str(frontend[0]), str(frontend[1]))
+    assert static_assets.get_frontend_app() is not None
+
+
+def _start_worker(source, dist):
+    static_assets.FRONTEND_DIR, static_assets.FRONTEND_DIST_DIR = source, dist
+    static_assets.get_frontend_app()
+
+
+@pytest.mark.skipif(static_assets.fcntl is None, reason="no cross-process build lock on this platform")
+def test_workers_starting_together_leave_a_complete_build(frontend):
+    source, dist = frontend
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_start_worker, args=(str(source), str(dist))) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    assert_complete(dist)
+    assert [name for name in os.listdir(source) if name.startswith(".dist-")] == []
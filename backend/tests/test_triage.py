@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.triage_service import TriageEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return TriageEngine()
+
+
+def affirmed(engine, text):
+    return {flag["concept"] for flag in engine.assess(text)["red_flags"] if not flag["negated"]}
+
+
+@pytest.mark.parametrize("text, concept", [
+    ("I can not breathe", "breathing_difficulty"),
+    ("I am not able to breathe properly", "breathing_difficulty"),
+    ("she is not responding", "unconscious"),
+    ("my father is not conscious", "unconscious"),
+    ("I feel like killing myself", "suicidal"),
+    ("I cannot move my arm after the fall", "fracture"),
+    ("chest pain since morning", "chest_pain"),
+    ("no fever, but chest pain", "chest_pain"),
+    ("no fever but chest pain", "chest_pain"),
+    ("no fever and chest pain", "chest_pain"),
+    ("no appetite and difficulty breathing", "breathing_difficulty"),
+    ("no fever & chest pain", "chest_pain"),
+    ("no fever or chest pain", "chest_pain"),
+    ("no fever with chest pain", "chest_pain"),
+])
+def test_red_flags_detected(engine, text, concept):
+    assert concept in affirmed(engine, text)
+
+
+@pytest.mark.parametrize("text, concept", [
+    ("never had chest pain before but now i have it", "chest_pain"),
+    ("no chest pain until this morning", "chest_pain"),
+    ("I wasn't worried, now chest pain and sweating", "chest_pain"),
+])
+def test_negation_stops_at_clause_and_reversal(engine, text, concept):
+    assert concept in affirmed(engine, text)
+
+
+@pytest.mark.parametrize("text, concept", [
+    ("no chest pain", "chest_pain"),
+    ("I don't have chest pain now", "chest_pain"),
+    ("denies shortness of breath", "breathing_difficulty"),
+    ("chest pain gone", "chest_pain"),
+    ("never had a seizure", "seizure"),
+])
+def test_negated_mentions_are_not_affirmed(engine, text, concept):
+    result = engine.assess(text)
+    assert concept not in affirmed(engine, text)
+    assert any(flag["concept"] == concept and flag["negated"] for flag in result["red_flags"])
+
+
+@pytest.mark.parametrize("text", ["no fever and chest pain", "no appetite and difficulty breathing"])
+def test_negated_symptom_before_and_does_not_lower_the_level(engine, text):
+    assert engine.assess(text)["level"] == "high"
+
+
+def test_high_severity_short_circuits(engine):
+    result = engine.assess("she is not responding")
+    assert result["level"] == "high" and result["short_circuit"]
+
+
+def test_medium_flags_do_not_short_circuit(engine):
+    result = engine.assess("I have a high fever")
+    assert result["level"] == "medium" and not result["short_circuit"]
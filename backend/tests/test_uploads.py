@@ -0,0 +1,38 @@
+import io
+import os
+import tempfile
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.uploads import upload_buffer, upload_path
+
+
+def spooled_upload(data, max_size=1024 * 1024):
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(file=spool, filename="scan.jpg")
+
+
+@pytest.mark.parametrize("size", [0, 100, 64 * 1024])
+@pytest.mark.parametrize("max_size", [1024, 1024 * 1024])
+def test_buffer_and_path_hold_the_upload(size, max_size):
+    data = os.urandom(size)
+    upload = spooled_upload(data, max_size=max_size)
+
+    with upload_buffer(upload) as view:
+        assert view.readonly and bytes(view) == data
+    with upload_path(upload, suffix=".jpg") as path:
+        with open(path, "rb") as f:
+            assert f.read() == data
+    assert not os.path.exists(path)
+
+
+def test_file_objects_without_a_descriptor():
+    upload = UploadFile(file=io.BytesIO(b"audio bytes"), filename="note.wav")
+    with upload_buffer(upload) as view:
+        assert bytes(view) == b"audio bytes"
+    with upload_path(upload) as path:
+        with open(path, "rb") as f:
+            assert f.read() == b"audio bytes"
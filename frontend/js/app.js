@@ -1,9 +1,12 @@
 // Configuration
-const API_BASE_URL = 'http://localhost:8000';
+// Builds served by the API set this meta tag (empty = same origin); raw files talk to a local backend
+const apiBaseMeta = document.querySelector('meta[name="api-base-url"]');
+const API_BASE_URL = apiBaseMeta ? apiBaseMeta.content : 'http://localhost:8000';
 
 // Initialize global variables
 var isVoiceMode = false;
 var currentSessionId = 'session_' + Date.now();
+var lastKnownLocation = null; // lets the backend prefetch hospital searches
 var SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
 var recognition;
 
@@ -339,6 +342,7 @@ async function handleFileUpload(event) {
 
     const formData = new FormData();
     formData.append('file', file);
+    formData.append('user_id', 'user_123');
 
     try {
         const response = await fetch(`${API_BASE_URL}/api/medical/analyze-prescription`, {
@@ -352,17 +356,22 @@ async function handleFileUpload(event) {
         const analysisHtml = renderPrescriptionResult(data.analysis);
         addMessage(analysisHtml, 'bot');
 
+        if (data.interactions && data.interactions.length > 0) {
+            addMessage(renderInteractionWarnings(data.interactions), 'bot');
+        }
+
         if (data.analysis && data.analysis.medications) {
             const count = data.analysis.medications.length;
-            addMessage(`✅ I've extracted ${count} medications and automatically set reminders for you.`, 'bot');
+            const reminderCount = new Set((data.reminders || []).map(r => r.medication)).size;
+            addMessage(`✅ I've extracted ${count} medications and set reminders for ${reminderCount} of them.`, 'bot');
 
             if (isVoiceMode) {
-                speakText(`I have analyzed your prescription and set reminders for ${count} medications.`);
+                speakText(`I have analyzed your prescription and set reminders for ${reminderCount} medications.`);
             }
 
-            data.analysis.medications.forEach(med => {
-                setReminder(med.name, med.frequency, true);
-            });
+            if (reminderCount && Notification.permission === 'default') {
+                Notification.requestPermission();
+            }
         }
 
     } catch (error) {
@@ -424,6 +433,21 @@ function renderPrescriptionResult(analysis) {
     return html;
 }
 
+function renderInteractionWarnings(interactions) {
+    const alertClass = { major: 'alert-danger', moderate: 'alert-warning', minor: 'alert-info' };
+    let html = '';
+    interactions.forEach(warning => {
+        html += `
+            <div class="alert ${alertClass[warning.severity] || 'alert-warning'} py-1 px-2 mb-1 small">
+                <strong><i class="fas fa-triangle-exclamation"></i> ${warning.medications.join(' + ')}</strong>
+                <span class="badge bg-secondary">${warning.severity}</span><br>
+                ${warning.effect} <em>${warning.advice}</em>
+            </div>
+        `;
+    });
+    return html;
+}
+
 function renderMedicineCards(medicines) {
     if (!medicines || medicines.length === 0) return;
 
@@ -467,7 +491,9 @@ async function sendMessage() {
             body: JSON.stringify({
                 message: message,
                 session_id: currentSessionId,
-                user_id: "user_123"
+                user_id: "user_123",
+                latitude: lastKnownLocation ? lastKnownLocation.latitude : null,
+                longitude: lastKnownLocation ? lastKnownLocation.longitude : null
             })
         });
 
@@ -511,6 +537,10 @@ async function sendMessage() {
             renderMedicineCards(data.medicine_recommendations);
         }
 
+        if (data.interactions && data.interactions.length > 0) {
+            addMessage(renderInteractionWarnings(data.interactions), 'bot');
+        }
+
     } catch (error) {
         console.error('Error:', error);
         removeTypingIndicator();
@@ -518,40 +548,33 @@ async function sendMessage() {
     }
 }
 
-function setReminder(medicineName, frequency, silent = false) {
-    const time = new Date();
-    time.setSeconds(time.getSeconds() + 5);
+function showReminder(medicineName, dosage) {
+    const audio = new Audio('https://actions.google.com/sounds/v1/alarms/beep_short.ogg');
+    audio.play().catch(e => console.log('Audio play failed', e));
 
-    if (!silent) {
-        alert(`Reminder set for ${medicineName} (${frequency}).`);
+    if (Notification.permission === "granted") {
+        new Notification(`⏰ Time to take ${medicineName}!`, {
+            body: dosage ? `Dosage: ${dosage}` : ''
+        });
+    } else {
+        addMessage(`⏰ <strong>Reminder:</strong> time to take ${medicineName}${dosage ? ` (${dosage})` : ''}.`, 'bot');
     }
 
-    setTimeout(() => {
-        const audio = new Audio('https://actions.google.com/sounds/v1/alarms/beep_short.ogg');
-        audio.play().catch(e => console.log('Audio play failed', e));
-
-        if (Notification.permission === "granted") {
-            new Notification(`⏰ Time to take ${medicineName}!`, {
-                body: `Dosage: ${frequency}`
-            });
-        } else if (Notification.permission !== "denied") {
-            Notification.requestPermission().then(permission => {
-                if (permission === "granted") {
-                    new Notification(`⏰ Time to take ${medicineName}!`, {
-                        body: `Dosage: ${frequency}`
-                    });
-                } else {
-                    alert(`⏰ REMINDER: Time to take ${medicineName}!`);
-                }
-            });
-        } else {
-            alert(`⏰ REMINDER: Time to take ${medicineName}!`);
-        }
+    if (isVoiceMode) {
+        speakText(`It is time to take your ${medicineName}.`);
+    }
+}
 
-        if (isVoiceMode) {
-            speakText(`It is time to take your ${medicineName}.`);
-        }
-    }, 5000 + (Math.random() * 2000));
+// Reminders are scheduled server-side; poll for the ones that have fired
+async function pollDueReminders() {
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/medical/reminders/due?user_id=user_123`);
+        if (!response.ok) return;
+        const data = await response.json();
+        (data.reminders || []).forEach(r => showReminder(r.medication, r.dosage));
+    } catch (error) {
+        console.log('Reminder poll failed', error);
+    }
 }
 
 // Add message to UI only (no saving)
@@ -687,20 +710,12 @@ async function orderMedicine(medicineName = null) {
     if (!medicineName) return;
 
     if (confirm(`Do you want to place an order for ${medicineName}?`)) {
-        showTypingIndicator();
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/medical/order-medicine?medicine_id=1&user_id=user_123&quantity=1`, {
-                method: 'POST'
-            });
-            const data = await response.json();
-            removeTypingIndicator();
-            addMessage(`Order placed successfully for ${medicineName}! Order ID: ${data.order_id}`, 'bot');
-            alert(data.message);
-        } catch (error) {
-            console.error('Error:', error);
-            removeTypingIndicator();
-            addMessage('Failed to place order.', 'bot');
-        }
+        // Claims the shopping run the chat reply already started for this session
+        await buyMedicine(medicineName);
+    } else if (currentSessionId) {
+        fetch(`${API_BASE_URL}/api/medical/buy-medicine/prefetch?session_id=${encodeURIComponent(currentSessionId)}`, {
+            method: 'DELETE'
+        }).catch(error => console.error('Error:', error));
     }
 }
 
@@ -735,7 +750,8 @@ async function buyMedicine(medicineName) {
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 medicine_name: medicineName,
-                user_id: 'user_123'
+                user_id: 'user_123',
+                session_id: currentSessionId
             })
         });
 
@@ -786,10 +802,11 @@ async function findHospitals() {
         try {
             const lat = position.coords.latitude;
             const lon = position.coords.longitude;
+            lastKnownLocation = { latitude: lat, longitude: lon };
 
             console.log(`Searching hospitals at: ${lat}, ${lon}`);
 
-            const response = await fetch(`${API_BASE_URL}/api/emergency/hospitals/nearby?latitude=${lat}&longitude=${lon}`);
+            const response = await fetch(`${API_BASE_URL}/api/emergency/hospitals/nearby?latitude=${lat}&longitude=${lon}&session_id=${encodeURIComponent(currentSessionId)}`);
             const data = await response.json();
             removeTypingIndicator();
 
@@ -805,7 +822,7 @@ async function findHospitals() {
                                 <small class="text-muted">${hospital.distance_km} km</small>
                             </div>
                             <p class="mb-1 small text-muted"><i class="fas fa-map-marker-alt me-1"></i> ${hospital.address}</p>
-                            <button class="btn btn-sm btn-outline-primary mt-2 w-100" onclick="bookAppointment('${hospital.name.replace(/'/g, "\\'")}')">
+                            <button class="btn btn-sm btn-outline-primary mt-2 w-100" onclick="bookAppointment('${hospital.name.replace(/'/g, "\\'")}', '${hospital.id}')">
                                 <i class="fas fa-calendar-check me-1"></i> Book Appointment
                             </button>
                         </div>
@@ -835,14 +852,14 @@ async function findHospitals() {
     });
 }
 
-async function bookAppointment(hospitalName = null) {
+async function bookAppointment(hospitalName = null, hospitalId = null) {
     let message = 'I want to book a doctor appointment';
     if (hospitalName) {
         message += ` at ${hospitalName}`;
     }
     addMessage(message, 'user');
 
-    const time = prompt("Enter preferred time (e.g., Tomorrow 10 AM):");
+    const time = prompt("Enter preferred time (e.g., Tomorrow 10:30 AM or 2025-06-01 14:00):");
     if (!time) return;
 
     showTypingIndicator();
@@ -851,7 +868,7 @@ async function bookAppointment(hospitalName = null) {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
-                hospital_id: 1,
+                hospital_id: hospitalId || 1,
                 user_id: 'user_123',
                 user_name: 'John Doe',
                 user_phone: '555-0123',
@@ -863,9 +880,19 @@ async function bookAppointment(hospitalName = null) {
         const data = await response.json();
         removeTypingIndicator();
 
+        if (!response.ok) {
+            const detail = data.detail || {};
+            let errorMsg = detail.message || detail || 'Failed to book appointment.';
+            if (detail.alternatives && detail.alternatives.length) {
+                errorMsg += `<br>Available times: ${detail.alternatives.map(t => t.replace('T', ' ')).join(', ')}`;
+            }
+            addMessage(errorMsg, 'bot');
+            return;
+        }
+
         let confirmationMsg = `Appointment booked!`;
         if (hospitalName) {
-            confirmationMsg += ` Your appointment at <strong>${hospitalName}</strong> is confirmed.`;
+            confirmationMsg += ` Your appointment at <strong>${hospitalName}</strong> on <strong>${data.scheduled_time}</strong> is confirmed (code ${data.confirmation_code}).`;
         } else {
             confirmationMsg += ` ${data.message}`;
         }
@@ -896,6 +923,7 @@ async function triggerEmergency() {
         navigator.geolocation.getCurrentPosition(async (position) => {
             try {
                 const location = `${position.coords.latitude}, ${position.coords.longitude}`;
+                lastKnownLocation = { latitude: position.coords.latitude, longitude: position.coords.longitude };
                 console.log(`🚨 Emergency at real location: ${location}`);
 
                 const response = await fetch(`${API_BASE_URL}/api/emergency/ambulance`, {
@@ -947,6 +975,8 @@ window.addEventListener('error', function (e) {
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function () {
+    setInterval(pollDueReminders, 30000);
+
     // Initialize sidebar
     const sidebarToggle = document.getElementById('sidebar-toggle');
     const sidebarClose = document.getElementById('sidebar-close');